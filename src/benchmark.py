@@ -0,0 +1,564 @@
+""" Modulo que mide el rendimiento de los operadores del algoritmo genético
+
+No usa EJECUTAR sino partes internas de AlgoritmoGenetico (prepara,
+inicializa_poblacion, solucion_aleatoria, las reparaciones, la cruza, la
+selección y poblacion_generacional) y de la evaluación (evalua_lote,
+evalua_lote_acotada, ordena_reglas), así que sólo compara versiones de
+genetico.py que las tengan.
+"""
+
+import sys
+import json
+import time
+import platform
+import subprocess
+import tempfile
+import argparse
+import tracemalloc
+import numpy as np
+from pathlib import Path
+from genetico import AlgoritmoGenetico
+from temporada import TemporadaNFL
+from evaluacion.evaluacion2023 import EvaluacionNFL2023
+from seleccion import ArbolFenwick
+
+EJEMPLAR = "../data/temporada2023.txt"
+SOLUCIONES = "../output"
+SEMILLA = 42
+NUM_SOLUCIONES = 200
+REPETICIONES = 5
+CALENTAMIENTO = 1
+TAMANOS_POBLACION = (50, 100, 200)
+GENERACIONES = 5
+# Comandos de nfl cuyo arranque en frío se mide, run con tiempo 0 sólo lee el
+# ejemplar y crea una población chica
+ARRANQUES = {
+  "ayuda" : ["--help"],
+  "evaluate" : ["evaluate", EJEMPLAR, f"{SOLUCIONES}/nfl2023.txt"],
+  "run" : ["run", EJEMPLAR, "10", "0", "0.9", "0.01", str(SEMILLA)]
+}
+# Mediana máxima en segundos del arranque de cada comando
+OBJETIVOS_ARRANQUE = {"evaluate" : 0.25, "run" : 0.4}
+# Soluciones que se exportan a Excel con --excel
+NUM_EXCEL = 500
+# Tamaños de población de la medición de memoria y evaluación con --memoria
+TAMANOS_MEMORIA = (1000, 10000, 100000)
+# Evaluaciones conocidas de las soluciones de SOLUCIONES, --verifica las
+# compara con las actuales. La versión original de JuegosDivisionalesAlFinal
+# revisaba un solo partido por semana y daba 2751765, 2741948 y 2754404
+EVALUACIONES_CONOCIDAS = {
+  "mejor_encontrada.txt" : 2751699,
+  "mejor_iteracion.txt" : 2741880,
+  "nfl2023.txt" : 2754347
+}
+# Generaciones (o iteraciones en el modo estacionario) de las ejecuciones
+# cortas de --verifica
+PASOS_VERIFICA = 10
+
+def soluciones_cruzadas(algoritmo: AlgoritmoGenetico, n: int) -> list:
+  """ Genera soluciones recién cruzadas por filas, todavía sin reparar
+
+  Parámetros
+  ----------
+  algoritmo : AlgoritmoGenetico
+    Algoritmo con el generador de aleatorios ya inicializado
+  n : int
+    Número de soluciones a generar
+
+  Devuelve
+  --------
+  list of np.ndarray : Soluciones generadas
+  """
+  limite = algoritmo.ejemplar.num_equipos
+  soluciones = []
+  for _ in range(n):
+    sol1 = algoritmo.solucion_aleatoria()
+    sol2 = algoritmo.solucion_aleatoria()
+    m = algoritmo.rng.integers(limite-1)
+    n = algoritmo.rng.integers(m+1, limite) + 1
+    sol1[m:n,:,0] = sol2[m:n,:,0]
+    soluciones.append(sol1)
+  return soluciones
+
+def resumen(tiempos: list) -> dict:
+  """ Obtiene las estadísticas de los segundos por llamada de cada repetición
+
+  Parámetros
+  ----------
+  tiempos : list of float
+    Segundos por llamada medidos en cada repetición
+
+  Devuelve
+  --------
+  dict : Diccionario con las llaves 'minimo', 'mediana', 'media',
+    'desviacion', 'maximo' (segundos por llamada) y 'llamadas_por_segundo'
+    (con el mínimo, el menos afectado por otros procesos)
+  """
+  t = np.array(tiempos)
+  return {
+    "minimo" : float(t.min()),
+    "mediana" : float(np.median(t)),
+    "media" : float(t.mean()),
+    "desviacion" : float(t.std()),
+    "maximo" : float(t.max()),
+    "llamadas_por_segundo" : float(1 / t.min())
+  }
+
+def mide(operador: "Callable", entradas: list, copiar: bool = False) -> dict:
+  """ Mide el tiempo por llamada de un operador sobre una lista de entradas
+
+  Se hacen CALENTAMIENTO repeticiones sin medir y luego REPETICIONES
+  mediciones, en cada una se aplica el operador a todas las entradas.
+
+  Parámetros
+  ----------
+  operador : Callable
+    Operador que recibe una entrada
+  entradas : list
+    Entradas del operador
+  copiar : bool
+    Si es True el operador se aplica sobre copias de las entradas (para los
+    que las modifican). Por defecto es False
+
+  Devuelve
+  --------
+  dict : Estadísticas de RESUMEN
+  """
+  tiempos = []
+  for i in range(CALENTAMIENTO + REPETICIONES):
+    copias = [e.copy() for e in entradas] if copiar else entradas
+    t_inicio = time.perf_counter()
+    for e in copias:
+      operador(e)
+    if i >= CALENTAMIENTO:
+      tiempos.append((time.perf_counter() - t_inicio) / len(copias))
+  return resumen(tiempos)
+
+def mide_generaciones(algoritmo: AlgoritmoGenetico, tam_poblacion: int) -> dict:
+  """ Mide el tiempo por generación de POBLACION_GENERACIONAL
+
+  En cada repetición se crea la población desde la misma semilla (sin medir)
+  y se miden GENERACIONES generaciones.
+
+  Parámetros
+  ----------
+  algoritmo : AlgoritmoGenetico
+    Algoritmo a medir
+  tam_poblacion : int
+    Tamaño de la población
+
+  Devuelve
+  --------
+  dict : Estadísticas de RESUMEN
+  """
+  tiempos = []
+  for i in range(CALENTAMIENTO + REPETICIONES):
+    algoritmo.prepara(tam_poblacion, 0.8, 0.01, SEMILLA)
+    algoritmo.inicializa_poblacion()
+    t_inicio = time.perf_counter()
+    for _ in range(GENERACIONES):
+      algoritmo.poblacion_generacional()
+    if i >= CALENTAMIENTO:
+      tiempos.append((time.perf_counter() - t_inicio) / GENERACIONES)
+  return resumen(tiempos)
+
+def mide_arranque(argumentos: list) -> dict:
+  """ Mide el tiempo de pared de nfl en un proceso nuevo
+
+  Incluye el arranque del intérprete y todas las importaciones, que es lo que
+  espera el usuario en cada llamada. Se repite como MIDE.
+
+  Parámetros
+  ----------
+  argumentos : list of str
+    Argumentos de nfl
+
+  Devuelve
+  --------
+  dict : Estadísticas de RESUMEN
+  """
+  comando = [sys.executable, str(Path(__file__).parent / "nfl")] + argumentos
+  tiempos = []
+  for i in range(CALENTAMIENTO + REPETICIONES):
+    t_inicio = time.perf_counter()
+    subprocess.run(comando, stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL, check=True)
+    if i >= CALENTAMIENTO:
+      tiempos.append(time.perf_counter() - t_inicio)
+  return resumen(tiempos)
+
+def ejecuta() -> dict:
+  """ Ejecuta todas las mediciones
+
+  Las reglas y la evaluación se miden sobre las soluciones de SOLUCIONES y
+  NUM_SOLUCIONES soluciones aleatorias, los operadores sobre soluciones
+  aleatorias. Todo se genera desde SEMILLA.
+
+  Devuelve
+  --------
+  dict : Diccionario con las llaves 'metadatos' y 'resultados', los
+    resultados tienen las estadísticas de RESUMEN de cada medición
+  """
+  temporada = TemporadaNFL.leer_archivo(EJEMPLAR)
+  evaluacion = EvaluacionNFL2023(temporada)
+  problema = AlgoritmoGenetico(temporada, evaluacion)
+  problema.prepara(NUM_SOLUCIONES, 0.8, 0.01, SEMILLA)
+  resultados = {}
+
+  def registra(nombre: str, datos: dict) -> None:
+    resultados[nombre] = datos
+    print(f"{nombre:52} {datos['mediana']*1000:10.4f} ms",
+          f"{datos['llamadas_por_segundo']:12.1f} llamadas/s", file=sys.stderr)
+
+  guardadas = [temporada.leer_solucion(archivo)
+               for archivo in sorted(Path(SOLUCIONES).glob("*.txt"))]
+  aleatorias = [problema.solucion_aleatoria()
+                for _ in range(NUM_SOLUCIONES)]
+  soluciones = guardadas + aleatorias
+
+  for regla in evaluacion.reglas:
+    registra(f"regla.{regla.nombre}.evalua", mide(regla.evalua, soluciones))
+    registra(f"regla.{regla.nombre}.evalua_vectorizada",
+             mide(regla.evalua_vectorizada, soluciones))
+  registra("evaluacion.__call__", mide(evaluacion, soluciones))
+  registra("evaluacion.evalua_lote",
+           mide(evaluacion.evalua_lote, [np.stack(soluciones)]))
+  # Con la mediana como umbral la mitad de las soluciones termina antes
+  lote = np.stack(soluciones)
+  umbrales = np.full(len(lote), int(np.median(evaluacion.evalua_lote(lote))))
+  evaluacion.ordena_reglas(lote)
+  registra("evaluacion.evalua_lote_acotada",
+           mide(lambda s: evaluacion.evalua_lote_acotada(s, umbrales), [lote]))
+  evaluacion.ordena_reglas()
+
+  registra("solucion_aleatoria",
+           mide(lambda _: problema.solucion_aleatoria(), [None]*NUM_SOLUCIONES))
+
+  cruzadas = soluciones_cruzadas(problema, NUM_SOLUCIONES)
+  registra("repara_filas", mide(problema.repara_filas, cruzadas, True))
+  for s in cruzadas:
+    problema.repara_filas(s)
+  registra("repara_columnas", mide(problema.repara_columnas, cruzadas, True))
+
+  parejas = list(zip(aleatorias[::2], aleatorias[1::2]))
+  registra("cruza_filas", mide(lambda p: problema.cruza_filas(*p), parejas))
+
+  for tam in TAMANOS_POBLACION:
+    problema.prepara(tam, 0.8, 0.01, SEMILLA)
+    problema.inicializa_poblacion()
+    registra(f"selecciona_padres[{tam}]",
+             mide(lambda _: problema.selecciona_padres(), [None]*tam))
+  for tam in TAMANOS_POBLACION:
+    registra(f"poblacion_generacional[{tam}]",
+             mide_generaciones(problema, tam))
+
+  for nombre, argumentos in ARRANQUES.items():
+    registra(f"arranque.{nombre}", mide_arranque(argumentos))
+    objetivo = OBJETIVOS_ARRANQUE.get(nombre)
+    if objetivo is not None and resultados[f"arranque.{nombre}"]["mediana"] > objetivo:
+      print(f"El arranque de {nombre} supera el objetivo de {objetivo*1000:.0f} ms",
+            file=sys.stderr)
+
+  return {
+    "metadatos" : {
+      "ejemplar" : EJEMPLAR,
+      "semilla" : SEMILLA,
+      "repeticiones" : REPETICIONES,
+      "calentamiento" : CALENTAMIENTO,
+      "num_soluciones" : len(soluciones),
+      "generaciones" : GENERACIONES,
+      "python" : platform.python_version(),
+      "numpy" : np.__version__,
+      "plataforma" : platform.platform()
+    },
+    "resultados" : resultados
+  }
+
+def mide_excel() -> dict:
+  """ Mide la exportación a Excel de NUM_EXCEL soluciones aleatorias
+
+  Se miden un libro con una hoja por solución y un archivo por solución. Cada
+  medición tarda varios segundos, así que se hace una sola vez y sin
+  calentamiento.
+
+  Devuelve
+  --------
+  dict : Estadísticas de RESUMEN (segundos por solución) de cada medición
+  """
+  from excel import exporta_soluciones, exporta_archivos
+
+  temporada = TemporadaNFL.leer_archivo(EJEMPLAR)
+  problema = AlgoritmoGenetico(temporada, EvaluacionNFL2023(temporada))
+  problema.prepara(NUM_EXCEL, 0.8, 0.01, SEMILLA)
+  soluciones = np.stack([problema.solucion_aleatoria()
+                         for _ in range(NUM_EXCEL)])
+  resultados = {}
+  with tempfile.TemporaryDirectory() as carpeta:
+    carpeta = Path(carpeta)
+    t_inicio = time.perf_counter()
+    exporta_soluciones(temporada, soluciones, carpeta / "libro.xlsx")
+    resultados[f"excel.libro[{NUM_EXCEL}]"] = resumen(
+      [(time.perf_counter() - t_inicio) / NUM_EXCEL])
+    t_inicio = time.perf_counter()
+    exporta_archivos(temporada, soluciones,
+                     [carpeta / f"{i}.xlsx" for i in range(NUM_EXCEL)])
+    resultados[f"excel.archivos[{NUM_EXCEL}]"] = resumen(
+      [(time.perf_counter() - t_inicio) / NUM_EXCEL])
+  for nombre, datos in resultados.items():
+    print(f"{nombre:52} {datos['mediana']*NUM_EXCEL:10.2f} s", file=sys.stderr)
+  return resultados
+
+def mide_memoria() -> dict:
+  """ Mide la memoria por individuo y la evaluación con poblaciones grandes
+
+  Para cada tamaño de TAMANOS_MEMORIA se comparan las soluciones en int64 y
+  en el tipo compacto del ejemplar (TemporadaNFL.tipo_solucion). La memoria
+  por individuo es la de sus dos copias en la población del algoritmo
+  (población y reserva) más sus evaluaciones, y la evaluación se mide con
+  EVALUA_LOTE sobre toda la población una sola vez, junto con la memoria
+  temporal máxima que usa. Las poblaciones repiten NUM_SOLUCIONES soluciones
+  aleatorias, sin cache repetirlas no cambia el tiempo.
+
+  Devuelve
+  --------
+  dict : Estadísticas de RESUMEN (segundos por solución) de cada medición,
+    además con las llaves 'bytes_por_individuo' y 'pico_evaluacion' (bytes
+    temporales de la evaluación)
+  """
+  temporada = TemporadaNFL.leer_archivo(EJEMPLAR)
+  evaluacion = EvaluacionNFL2023(temporada)
+  problema = AlgoritmoGenetico(temporada, evaluacion)
+  problema.prepara(NUM_SOLUCIONES, 0.8, 0.01, SEMILLA)
+  aleatorias = np.stack([problema.solucion_aleatoria()
+                         for _ in range(NUM_SOLUCIONES)])
+  resultados = {}
+  for tam in TAMANOS_MEMORIA:
+    for tipo in (np.dtype(np.int64), temporada.tipo_solucion):
+      poblacion = np.resize(aleatorias.astype(tipo),
+                            (tam,) + aleatorias.shape[1:])
+      tracemalloc.start()
+      t_inicio = time.perf_counter()
+      evaluacion.evalua_lote(poblacion)
+      segundos = time.perf_counter() - t_inicio
+      pico = tracemalloc.get_traced_memory()[1]
+      tracemalloc.stop()
+      datos = resumen([segundos / tam])
+      datos["bytes_por_individuo"] = 2 * (poblacion[0].nbytes + 8)
+      datos["pico_evaluacion"] = pico
+      nombre = f"memoria.evalua_lote[{tipo.name}][{tam}]"
+      resultados[nombre] = datos
+      print(f"{nombre:52} {datos['bytes_por_individuo']:8d} B/individuo",
+            f"{datos['llamadas_por_segundo']:10.1f} soluciones/s",
+            f"{pico / 2**20:8.1f} MiB pico", file=sys.stderr)
+  return resultados
+
+def verifica() -> list:
+  """ Comprueba que las distintas formas de evaluar den los mismos resultados
+
+  Sobre las soluciones de SOLUCIONES y NUM_SOLUCIONES soluciones aleatorias
+  compara cada regla con ciclos, vectorizada y en lote, y la evaluación
+  completa con la de las contribuciones, con la acotada (también con una
+  penalización negativa de CalificacionHorarios) y con
+  EVALUACIONES_CONOCIDAS. La evaluación incremental se compara con la completa en hijos cruzados y
+  mutados. También compara ArbolFenwick con np.cumsum, las evaluaciones que
+  lleva el algoritmo en ejecuciones cortas (generacional y estacionario, con
+  y sin evaluación incremental) con las de EVALUA_LOTE, y una ejecución
+  reanudada de un checkpoint con la original. Todo se genera desde SEMILLA.
+
+  Devuelve
+  --------
+  list of str : Descripción de cada diferencia, vacía si todo coincide
+  """
+  temporada = TemporadaNFL.leer_archivo(EJEMPLAR)
+  evaluacion = EvaluacionNFL2023(temporada)
+  ciclos = EvaluacionNFL2023(temporada, vectorizada=False)
+  problema = AlgoritmoGenetico(temporada, evaluacion)
+  problema.prepara(NUM_SOLUCIONES, 0.8, 0.01, SEMILLA)
+  errores = []
+
+  def revisa(prueba: str, esperadas: list, obtenidas: list,
+      nombres: list) -> None:
+    # Con arreglos de varias dimensiones se compara cada renglón completo
+    diferentes = np.asarray(esperadas) != np.asarray(obtenidas)
+    diferentes = np.flatnonzero(
+      diferentes.reshape(len(diferentes), -1).any(axis=1))
+    if len(diferentes):
+      errores.append(f"{prueba}: difiere en {len(diferentes)} de "
+                     f"{len(esperadas)}, la primera {nombres[diferentes[0]]}")
+
+  archivos = sorted(Path(SOLUCIONES).glob("*.txt"))
+  soluciones = [temporada.leer_solucion(archivo) for archivo in archivos] + \
+    [problema.solucion_aleatoria() for _ in range(NUM_SOLUCIONES)]
+  nombres = [archivo.name for archivo in archivos] + \
+    [f"aleatoria[{i}]" for i in range(NUM_SOLUCIONES)]
+  lote = np.stack(soluciones)
+
+  # Reglas y evaluación completa
+  evaluaciones, pen = evaluacion.evalua_lote(lote, penalizaciones=True)
+  for k, (regla, regla_ciclos) in enumerate(zip(evaluacion.reglas,
+                                                ciclos.reglas)):
+    esperadas = [regla_ciclos(s) for s in soluciones]
+    revisa(f"{regla.nombre} vectorizada", esperadas,
+           [regla(s) for s in soluciones], nombres)
+    revisa(f"{regla.nombre} lote", esperadas, pen[:,k], nombres)
+  esperadas = [ciclos(s) for s in soluciones]
+  revisa("evaluacion vectorizada", esperadas,
+         [evaluacion(s) for s in soluciones], nombres)
+  revisa("evalua_lote", esperadas, evaluaciones, nombres)
+  revisa("evalua_contribuciones", esperadas, [
+    evaluacion.evalua_contribuciones(evaluacion.contribuciones(s))
+    for s in soluciones], nombres)
+  # Evaluación acotada con el umbral justo debajo de la evaluación, debe ser
+  # exacta. Se agrega una solución con todos sus partidos en horario estelar,
+  # CalificacionHorarios le da una penalización negativa
+  estelar = soluciones[0].copy()
+  estelar[...,1] = np.where(estelar[...,0] != temporada.bye,
+                            temporada.horarios["MNF"],
+                            temporada.horarios["NONE"])
+  acotadas = np.concatenate([lote, estelar[None]])
+  exactas = esperadas + [ciclos(estelar)]
+  nombres_acotadas = nombres + ["estelar"]
+  evaluacion.ordena_reglas(acotadas)
+  umbrales = np.array(exactas) - 1
+  cotas, son_exactas = evaluacion.evalua_lote_acotada(acotadas, umbrales)
+  revisa("evalua_lote_acotada", exactas, cotas, nombres_acotadas)
+  revisa("evalua_lote_acotada exactas", [True] * len(exactas), son_exactas,
+         nombres_acotadas)
+  revisa("evalua_acotada", [(e, True) for e in exactas],
+         [evaluacion.evalua_acotada(s, u) for s, u in zip(acotadas, umbrales)],
+         nombres_acotadas)
+  evaluacion.ordena_reglas()
+  conocidas = [n for n in nombres if n in EVALUACIONES_CONOCIDAS]
+  revisa("evaluacion conocida",
+         [EVALUACIONES_CONOCIDAS[n] for n in conocidas],
+         [esperadas[nombres.index(n)] for n in conocidas], conocidas)
+
+  # Evaluación incremental de hijos a partir del primer padre
+  incrementales, completas = [], []
+  for padre1, padre2 in zip(soluciones[::2], soluciones[1::2]):
+    for padre, hijo in zip((padre1, padre2),
+                           problema.cruza_filas(padre1, padre2)):
+      problema.muta_filas(hijo)
+      cambios = (hijo != padre).any(axis=-1)
+      incrementales.append(evaluacion.evalua_incremental(
+        hijo, evaluacion.contribuciones(padre), cambios)[0])
+      completas.append(ciclos(hijo))
+  revisa("evalua_incremental", completas, incrementales,
+         [f"hijo[{i}]" for i in range(len(completas))])
+
+  # Árbol de Fenwick después de cambiar algunos pesos
+  rng = np.random.default_rng(SEMILLA)
+  pesos = rng.integers(1, 1000, NUM_SOLUCIONES)
+  arbol = ArbolFenwick(pesos.copy())
+  for i, peso in zip(rng.integers(len(pesos), size=NUM_SOLUCIONES),
+                     rng.integers(1, 1000, NUM_SOLUCIONES)):
+    arbol.suma(i, peso - pesos[i])
+    pesos[i] = peso
+  valores = rng.random(NUM_SOLUCIONES) * pesos.sum()
+  revisa("ArbolFenwick.total", [pesos.sum()], [arbol.total()], ["total"])
+  revisa("ArbolFenwick.busca",
+         np.searchsorted(np.cumsum(pesos), valores, side="right"),
+         arbol.busca(valores), [f"valor[{i}]" for i in range(len(valores))])
+
+  # Evaluaciones que lleva el algoritmo en ejecuciones cortas
+  for modo in ("generacional", "estacionario"):
+    for incremental in (False, True):
+      algoritmo = AlgoritmoGenetico(temporada, evaluacion)
+      algoritmo.prepara(20, 0.9, 0.3, SEMILLA, incremental, modo=modo)
+      algoritmo.inicializa_poblacion()
+      if algoritmo.acotada:
+        evaluacion.ordena_reglas(algoritmo.poblacion)
+      paso = algoritmo.poblacion_estacionaria if modo == "estacionario" \
+        else algoritmo.poblacion_generacional
+      for _ in range(PASOS_VERIFICA):
+        paso()
+      revisa(f"poblacion {modo}" + (" incremental" if incremental else ""),
+             evaluacion.evalua_lote(algoritmo.poblacion),
+             algoritmo.evaluaciones,
+             [f"individuo[{i}]" for i in range(algoritmo.tam_poblacion)])
+  evaluacion.ordena_reglas()
+
+  # Ejecución reanudada de un checkpoint
+  original = AlgoritmoGenetico(temporada, evaluacion)
+  original.prepara(20, 0.9, 0.3, SEMILLA)
+  original.inicializa_poblacion()
+  for _ in range(PASOS_VERIFICA):
+    original.poblacion_generacional()
+  reanudada = AlgoritmoGenetico(temporada, evaluacion)
+  with tempfile.TemporaryDirectory() as carpeta:
+    ruta = Path(carpeta) / "estado.npz"
+    original.guarda_estado(ruta, PASOS_VERIFICA, [], [], 0.0)
+    reanudada.carga_estado(ruta)
+  for _ in range(PASOS_VERIFICA):
+    original.poblacion_generacional()
+    reanudada.poblacion_generacional()
+  individuos = [f"individuo[{i}]" for i in range(original.tam_poblacion)]
+  revisa("checkpoint evaluaciones", original.evaluaciones,
+         reanudada.evaluaciones, individuos)
+  revisa("checkpoint poblacion", original.poblacion, reanudada.poblacion,
+         individuos)
+  return errores
+
+def compara(anterior: dict, actual: dict) -> None:
+  """ Muestra la aceleración de cada medición entre dos resultados
+
+  Se comparan las medianas, una aceleración mayor a 1 indica que ACTUAL es
+  más rápido.
+
+  Parámetros
+  ----------
+  anterior : dict
+    Resultados de EJECUTA de la versión anterior
+  actual : dict
+    Resultados de EJECUTA de la versión actual
+  """
+  print(f"{'Medición':52} {'Anterior (ms)':>14} {'Actual (ms)':>12}",
+        f"{'Aceleración':>12}")
+  for nombre, datos in actual["resultados"].items():
+    if nombre not in anterior["resultados"]:
+      continue
+    antes = anterior["resultados"][nombre]["mediana"]
+    ahora = datos["mediana"]
+    print(f"{nombre:52} {antes*1000:14.4f} {ahora*1000:12.4f}",
+          f"{antes/ahora:12.2f}")
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(
+    description="Mide el rendimiento de las reglas y operadores")
+  parser.add_argument("salida", nargs="?",
+                      help="archivo .json donde se guardan los resultados")
+  parser.add_argument("--compara", nargs=2, metavar=("ANTERIOR", "ACTUAL"),
+                      help="compara dos archivos de resultados")
+  parser.add_argument("--excel", action="store_true",
+                      help=f"mide también la exportación de {NUM_EXCEL} "
+                      "soluciones a Excel")
+  parser.add_argument("--memoria", action="store_true",
+                      help="mide también la memoria por individuo y la "
+                      "evaluación con poblaciones de hasta "
+                      f"{max(TAMANOS_MEMORIA)} individuos")
+  parser.add_argument("--verifica", action="store_true",
+                      help="sólo comprueba que las evaluaciones con ciclos, "
+                      "vectorizada, en lote e incremental coincidan")
+  args = parser.parse_args()
+
+  if args.verifica:
+    errores = verifica()
+    for error in errores:
+      print(error)
+    print("Hay diferencias" if errores else "Todas las pruebas coinciden")
+    sys.exit(1 if errores else 0)
+  elif args.compara:
+    with open(args.compara[0]) as f1, open(args.compara[1]) as f2:
+      compara(json.load(f1), json.load(f2))
+  else:
+    datos = ejecuta()
+    if args.excel:
+      datos["resultados"].update(mide_excel())
+    if args.memoria:
+      datos["resultados"].update(mide_memoria())
+    datos = json.dumps(datos, indent=2, sort_keys=True)
+    if args.salida is None:
+      print(datos)
+    else:
+      with open(args.salida, "w") as f:
+        f.write(datos)
@@ -0,0 +1,168 @@
+""" Implementación de la búsqueda local para el algoritmo genético """
+
+import time
+import numpy as np
+
+class BusquedaLocal:
+  """ Búsqueda local de primera mejora por intercambios de semanas
+
+  Un movimiento toma un equipo y dos semanas e intercambia de semana los
+  partidos del equipo, para que los partidos sigan emparejados también se
+  intercambian los de sus contrarios en esas semanas, los contrarios de éstos
+  y así hasta cerrar el grupo de equipos (intercambio parcial de jornadas).
+  Después se reparan los horarios con REPARA_COLUMNAS. La solución vecina se
+  evalúa de forma incremental, sólo cambian las filas del grupo y las dos
+  semanas.
+
+  Se acepta el primer vecino que mejora la evaluación y se sigue desde él
+  hasta acabar el tiempo o hasta que ningún vecino al azar mejore en
+  MAX_INTENTOS intentos seguidos.
+  """
+
+  # Optimizar accesos
+  __slots__ = ("algoritmo", "evalua_solucion", "max_intentos", "tiempo",
+               "evaluados", "aceptados", "mejora")
+
+  def __init__(self, algoritmo: "AlgoritmoGenetico",
+      max_intentos: int = None) -> None:
+    """
+    Parámetros
+    ----------
+    algoritmo : AlgoritmoGenetico
+      Algoritmo del que se usan la función de evaluación, la reparación de
+      horarios y el generador de aleatorios
+    max_intentos : int
+      Intentos seguidos sin mejora para detenerse, si es None es el número de
+      movimientos distintos (equipos x pares de semanas)
+    """
+    ejemplar = algoritmo.ejemplar
+    self.algoritmo = algoritmo
+    self.evalua_solucion = algoritmo.evalua_solucion
+    if max_intentos is None:
+      max_intentos = ejemplar.num_equipos * ejemplar.num_semanas * \
+        (ejemplar.num_semanas - 1) // 2
+    self.max_intentos = max_intentos
+    # Estadísticas
+    self.tiempo = 0.0
+    self.evaluados = 0
+    self.aceptados = 0
+    self.mejora = 0
+
+  def grupo(self, contras: list, equipo: int, s1: int,
+      s2: int) -> np.ndarray:
+    """ Obtiene los equipos que cambian al mover a EQUIPO entre S1 y S2
+
+    Parámetros
+    ----------
+    contras : list of (list of int)
+      Contrario de cada equipo en cada semana, -1 en el BYE
+    equipo : int
+      Equipo que inicia el movimiento
+    s1, s2 : int
+      Semanas que se intercambian
+
+    Devuelve
+    --------
+    np.ndarray : Equipos del grupo
+    """
+    grupo = {equipo}
+    pendientes = [equipo]
+    while pendientes:
+      e = pendientes.pop()
+      for contra in (contras[e][s1], contras[e][s2]):
+        if contra >= 0 and contra not in grupo:
+          grupo.add(contra)
+          pendientes.append(contra)
+    return np.fromiter(grupo, dtype=int, count=len(grupo))
+
+  def vecino(self, solucion: np.ndarray, contras: list) -> np.ndarray:
+    """ Genera una solución vecina al azar
+
+    Parámetros
+    ----------
+    solucion : np.ndarray
+      Solución actual, no se modifica
+    contras : list of (list of int)
+      Contrario de cada equipo en cada semana en SOLUCION
+
+    Devuelve
+    --------
+    np.ndarray : Solución vecina
+    """
+    rng = self.algoritmo.rng
+    equipo = int(rng.integers(solucion.shape[0]))
+    s1, s2 = rng.choice(solucion.shape[1], 2, replace=False).tolist()
+    equipos = self.grupo(contras, equipo, s1, s2)
+
+    vecina = solucion.copy()
+    vecina[equipos,s1,0] = solucion[equipos,s2,0]
+    vecina[equipos,s2,0] = solucion[equipos,s1,0]
+    self.algoritmo.repara_columnas(vecina)
+    return vecina
+
+  def mejora_solucion(self, solucion: np.ndarray, evaluacion: int,
+      contribuciones: list, t_limite: float) -> tuple:
+    """ Aplica la búsqueda local a una solución
+
+    Parámetros
+    ----------
+    solucion : np.ndarray
+      Solución inicial, no se modifica
+    evaluacion : int
+      Evaluación de la solución
+    contribuciones : list of np.ndarray
+      Contribuciones de la solución, como las devuelve
+      EvaluacionNFL.contribuciones
+    t_limite : float
+      Segundos que puede durar la búsqueda
+
+    Devuelve
+    --------
+    np.ndarray : Mejor solución encontrada (SOLUCION si no hubo mejora)
+    int : Evaluación de la solución
+    list of np.ndarray : Contribuciones de la solución
+    """
+    t_inicio = time.perf_counter()
+    timeout = t_inicio + t_limite
+    contrarios = self.algoritmo.ejemplar.contrarios
+    equipos = np.arange(solucion.shape[0])[:,None]
+    contras = contrarios[equipos, solucion[:,:,0]].tolist()
+    inicial = evaluacion
+    intentos = 0
+
+    while intentos < self.max_intentos and \
+        time.perf_counter() < timeout and \
+        evaluacion != self.evalua_solucion.max_eval:
+      vecina = self.vecino(solucion, contras)
+      cambios = np.any(vecina != solucion, axis=2)
+      nueva, nuevas_contribuciones = self.evalua_solucion.evalua_incremental(
+        vecina, contribuciones, cambios)
+      self.evaluados += 1
+      intentos += 1
+      if nueva > evaluacion:
+        solucion, evaluacion = vecina, nueva
+        contribuciones = nuevas_contribuciones
+        contras = contrarios[equipos, solucion[:,:,0]].tolist()
+        self.aceptados += 1
+        intentos = 0
+
+    self.tiempo += time.perf_counter() - t_inicio
+    self.mejora += evaluacion - inicial
+    return solucion, evaluacion, contribuciones
+
+  def estadisticas(self) -> dict:
+    """ Devuelve las estadísticas acumuladas de la búsqueda
+
+    Devuelve
+    --------
+    dict : Diccionario con las llaves 'tiempo', 'evaluados' (vecinos
+      evaluados), 'aceptados' (movimientos que mejoraron), 'mejora' (suma de
+      lo que mejoraron las soluciones) y 'mejora_por_segundo'
+    """
+    return {
+      "tiempo" : self.tiempo,
+      "evaluados" : self.evaluados,
+      "aceptados" : self.aceptados,
+      "mejora" : self.mejora,
+      "mejora_por_segundo" : self.mejora / self.tiempo if self.tiempo else 0.0
+    }
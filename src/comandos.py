@@ -0,0 +1,468 @@
+""" Implementa los subcomandos de la interfaz nfl
+
+Cada subcomando importa los módulos que usa al ejecutarse, así el arranque de
+uno no paga por las dependencias de los demás (tqdm, openpyxl, pandas,
+matplotlib, multiprocessing).
+"""
+
+import sys
+import argparse
+
+EPILOGO = "Revisar el README para más información"
+
+# Opciones de run que el modelo de islas no implementa
+SIN_ISLAS = ("procesos", "modo", "reemplazo", "busqueda_cada", "busqueda_k",
+             "busqueda_fraccion", "tiempos", "checkpoint", "checkpoint_cada",
+             "checkpoint_segundos", "reanudar", "telemetria",
+             "telemetria_cada", "estancamiento", "diversidad_minima",
+             "desviacion_minima", "acciones")
+
+def lee_ejemplar(archivo: str) -> "TemporadaNFL":
+  """ Lee el ejemplar y muestra un mensaje si hay un error """
+  from temporada import TemporadaNFL
+  try:
+    return TemporadaNFL.leer_archivo(archivo)
+  except Exception as err:
+    print("Hubo un error con la lectura del ejemplar", err, sep="\n")
+    raise
+
+def run(argv: list, prog: str = None) -> None:
+  """ Ejecuta el algoritmo genético (antes el script genetico) """
+  from genetico import AlgoritmoGenetico, MODOS, REEMPLAZOS
+  from seleccion import SELECCIONES
+  from estancamiento import ACCIONES
+
+  # Lee parámetros
+  parser = argparse.ArgumentParser(
+    prog=prog,
+    usage="%(prog)s ejemplar TAM_POBLACION TIEMPO PROB_CRUZA PROB_MUT "
+          "[SEMILLA] [ARCHIVO] [opciones]",
+    epilog=EPILOGO)
+  parser.add_argument("ejemplar")
+  parser.add_argument("tam_poblacion", type=int)
+  parser.add_argument("tiempo", type=int)
+  parser.add_argument("p_cruza", type=float)
+  parser.add_argument("p_mut", type=float)
+  parser.add_argument("extra", nargs="*", metavar="[SEMILLA] [ARCHIVO]")
+  parser.add_argument("--islas", type=int, default=1,
+                      help="número de islas (procesos), por defecto 1")
+  parser.add_argument("--migra-cada", type=int, default=50,
+                      help="generaciones entre migraciones, por defecto 50")
+  parser.add_argument("--migrantes", type=int, default=2,
+                      help="individuos que manda cada isla, por defecto 2")
+  # Las mismas de islas.TOPOLOGIAS, islas sólo se importa si se usa
+  parser.add_argument("--topologia", choices=("anillo", "aleatoria"),
+                      default="anillo",
+                      help="a qué isla se migra, por defecto anillo")
+  parser.add_argument("--procesos", type=int, default=1,
+                      help="procesos para evaluar a los hijos, por defecto 1")
+  parser.add_argument("--seleccion", choices=SELECCIONES, default="ruleta",
+                      help="selección de padres, por defecto ruleta")
+  parser.add_argument("--modo", choices=MODOS, default="generacional",
+                      help="reemplazo de la población, por defecto "
+                      "generacional")
+  parser.add_argument("--reemplazo", choices=REEMPLAZOS, default="peor",
+                      help="en el modo estacionario a quién reemplazan los "
+                      "hijos")
+  parser.add_argument("--busqueda-cada", type=int, default=0, metavar="N",
+                      help="aplica búsqueda local cada N generaciones")
+  parser.add_argument("--busqueda-k", type=int, default=1, metavar="K",
+                      help="individuos a los que se aplica, por defecto 1")
+  parser.add_argument("--busqueda-fraccion", type=float, default=0.1,
+                      metavar="F", help="fracción del tiempo para la búsqueda "
+                      "local, por defecto 0.1")
+  parser.add_argument("--tiempos", action="store_true",
+                      help="mide y muestra el tiempo de operadores y reglas")
+  parser.add_argument("--checkpoint", metavar="ARCHIVO",
+                      help="archivo donde se guarda el estado de la ejecución")
+  parser.add_argument("--checkpoint-cada", type=int, default=0, metavar="N",
+                      help="guarda el estado cada N generaciones")
+  parser.add_argument("--checkpoint-segundos", type=float, default=0,
+                      metavar="T", help="guarda el estado cada T segundos")
+  parser.add_argument("--reanudar", metavar="ARCHIVO",
+                      help="continúa la ejecución guardada en ARCHIVO")
+  parser.add_argument("--telemetria", metavar="ARCHIVO",
+                      help="escribe un registro por generación en ARCHIVO "
+                      "(.jsonl o .bin)")
+  parser.add_argument("--telemetria-cada", type=int, default=1, metavar="N",
+                      help="escribe el registro cada N generaciones")
+  parser.add_argument("--estancamiento", type=int, default=0, metavar="N",
+                      help="reacciona si el mejor no mejora en N generaciones")
+  parser.add_argument("--diversidad-minima", type=float, default=0,
+                      metavar="D", help="reacciona si la diversidad de la "
+                      "población baja de D (entre 0 y 1)")
+  parser.add_argument("--desviacion-minima", type=float, default=0,
+                      metavar="R", help="reacciona si la desviación estándar "
+                      "entre el promedio de las evaluaciones baja de R")
+  parser.add_argument("--acciones", nargs="+", choices=ACCIONES,
+                      default=list(ACCIONES), metavar="ACCION",
+                      help="acciones contra el estancamiento en el orden en "
+                      "que escalan: " + ", ".join(ACCIONES))
+  args = parser.parse_args(argv)
+
+  semilla = None
+  archivo = None
+  try:
+    if len(args.extra) == 1:
+      if args.extra[0].isnumeric():
+        semilla = int(args.extra[0])
+      else:
+        archivo = args.extra[0]
+    elif len(args.extra) == 2:
+      semilla = int(args.extra[0])
+      archivo = args.extra[1]
+    elif len(args.extra) > 2:
+      parser.error("Error en el número de argumentos")
+  except ValueError:
+    parser.error("Error en algunos de los parámetros")
+  if args.islas > 1:
+    # Las islas sólo reciben la selección, no se ignoran las demás opciones
+    no_soportadas = [
+      "--" + opcion.replace("_", "-") for opcion in SIN_ISLAS
+      if getattr(args, opcion) != parser.get_default(opcion)]
+    if no_soportadas:
+      parser.error("con --islas no se pueden usar: " +
+                   ", ".join(no_soportadas))
+
+  # Ejecuta algoritmo
+  from pathlib import Path
+  from temporada import FORMATOS_BINARIOS
+  from evaluacion.evaluacion2023 import EvaluacionNFL2023
+
+  temporada = lee_ejemplar(args.ejemplar)
+  evl = EvaluacionNFL2023(temporada)
+  opciones = {
+    "checkpoint" : args.checkpoint,
+    "checkpoint_cada" : args.checkpoint_cada,
+    "checkpoint_segundos" : args.checkpoint_segundos,
+    "reanudar" : args.reanudar,
+    "seleccion" : args.seleccion,
+    "modo" : args.modo,
+    "reemplazo" : args.reemplazo,
+    "busqueda_cada" : args.busqueda_cada,
+    "busqueda_k" : args.busqueda_k,
+    "busqueda_fraccion" : args.busqueda_fraccion,
+    "instrumentar" : args.tiempos,
+    "telemetria" : args.telemetria,
+    "telemetria_cada" : args.telemetria_cada,
+    "estancamiento" : args.estancamiento,
+    "diversidad_minima" : args.diversidad_minima,
+    "desviacion_minima" : args.desviacion_minima,
+    "acciones" : tuple(args.acciones)
+  }
+  if args.checkpoint is not None and not (args.checkpoint_cada or
+                                          args.checkpoint_segundos):
+    opciones["checkpoint_cada"] = 100
+  if args.islas > 1:
+    from islas import ejecutar_islas
+    res = ejecutar_islas(temporada, evl, args.islas, args.tam_poblacion,
+                         args.tiempo, args.p_cruza, args.p_mut, semilla,
+                         args.migra_cada, args.migrantes, args.topologia,
+                         seleccion=args.seleccion)
+    semilla = res["semilla"]
+  elif args.procesos > 1:
+    from evaluacion.paralela import EvaluacionParalela
+    with EvaluacionParalela(evl, args.procesos) as evl_paralela:
+      alg = AlgoritmoGenetico(temporada, evl_paralela)
+      res = alg.ejecutar(args.tam_poblacion, args.tiempo, args.p_cruza,
+                         args.p_mut, semilla, **opciones)
+    semilla = alg.semilla
+  else:
+    alg = AlgoritmoGenetico(temporada, evl)
+    res = alg.ejecutar(args.tam_poblacion, args.tiempo, args.p_cruza,
+                       args.p_mut, semilla, **opciones)
+    semilla = alg.semilla
+
+  if args.tiempo <= res["tiempo"]:
+    print("Tiempo límite alcanzado")
+  if res["es_optimo"]:
+    print("Solución óptima encontrada")
+  print("Semilla:", semilla)
+  # print("Solución encontrada:", res["solucion"])
+  print("Objetivo:", evl.max_eval)
+  print("Evaluación:", res["evaluacion"])
+  if args.islas > 1:
+    print("Isla:", res["isla"])
+    for i, isla in enumerate(res["islas"]):
+      print(f"  Isla {i}: evaluación {isla['evaluacion']},",
+            f"generaciones {isla['generacion']},",
+            f"migrantes enviados {isla['enviados']},",
+            f"recibidos {isla['recibidos']}")
+  else:
+    print("Generación:", res["generacion"])
+  print(f"Tiempo de ejecución: {res['tiempo']:.3f}")
+  if res.get("busqueda") is not None:
+    busqueda = res["busqueda"]
+    print(f"Búsqueda local: {busqueda['tiempo']:.3f} s,",
+          f"{busqueda['aceptados']} de {busqueda['evaluados']} movimientos,",
+          f"mejora del mejor {busqueda['mejora_mejor_por_segundo']:.1f}/s",
+          "(algoritmo genético",
+          f"{busqueda['mejora_mejor_por_segundo_ga']:.1f}/s)")
+
+  if res.get("estancamiento") is not None:
+    eventos = res["estancamiento"]["eventos"]
+    print(f"Estancamientos: {len(eventos)} (" + ", ".join(
+      f"{accion} {veces}" for accion, veces in
+      res["estancamiento"]["acciones"].items()) + ")")
+    for evento in eventos:
+      print(f"  Generación {evento['generacion']} ({evento['tiempo']:.1f} s):",
+            f"{evento['criterio']} -> {evento['accion']},",
+            f"mejor {evento['mejor']},",
+            f"diversidad {evento['diversidad']:.3f},",
+            f"mutación {evento['p_mutacion']:.3f}")
+
+  if res.get("tiempos") is not None:
+    for grupo in ("operadores", "reglas"):
+      print(f"\n{grupo.capitalize():30} {'Llamadas':>10} {'Tiempo (s)':>12}",
+            f"{'Promedio (ms)':>14}")
+      medidos = sorted(res["tiempos"][grupo].items(),
+                       key=lambda v: v[1]["tiempo"], reverse=True)
+      for nombre, datos in medidos:
+        print(f"{nombre:30} {datos['llamadas']:10} {datos['tiempo']:12.3f}",
+              f"{datos['promedio']*1000:14.4f}")
+    print()
+
+  if archivo is not None:
+    if Path(archivo).suffix in FORMATOS_BINARIOS:
+      temporada.guardar_soluciones(archivo, res["solucion"])
+    else:
+      with open(archivo, "w") as f:
+        f.write(temporada.guardar_solucion(res["solucion"]))
+    print("Solución guardada en", archivo)
+
+# Soluciones que se evalúan juntas, así los lotes mapeados a memoria no se
+# cargan completos
+TAM_LOTE = 1024
+
+def evaluate(argv: list, prog: str = None) -> None:
+  """ Evalúa una o varias soluciones (antes el script evalua) """
+  parser = argparse.ArgumentParser(
+    prog=prog,
+    usage="%(prog)s EJEMPLAR SOLUCION [SOLUCION ...] [--salida TABLA]",
+    epilog=EPILOGO)
+  parser.add_argument("ejemplar")
+  parser.add_argument("soluciones", nargs="+", metavar="SOLUCION",
+                      help="archivo .txt, .npy o .npz, o directorio")
+  parser.add_argument("--salida", metavar="TABLA",
+                      help="archivo .csv o .json donde se guarda la tabla "
+                           "(por defecto se escribe CSV en la salida estándar)")
+  args = parser.parse_args(argv)
+
+  import numpy as np
+  from pathlib import Path
+  from evaluacion.evaluacion2023 import EvaluacionNFL2023
+
+  temporada = lee_ejemplar(args.ejemplar)
+  evl = EvaluacionNFL2023(temporada)
+  ruta = Path(args.soluciones[0])
+
+  # Una sola solución, se muestra el análisis de cada regla
+  if len(args.soluciones) == 1 and args.salida is None and ruta.is_file():
+    sol, _ = temporada.leer_soluciones(ruta)
+    if len(sol) == 1:
+      evl.analiza_solucion(np.asarray(sol[0]))
+      return
+
+  # Varias soluciones, se evalúan por lotes y se genera la tabla
+  columnas = ["nombre", "evaluacion", "factible"] + \
+    [r.nombre for r in evl.reglas]
+  duras = np.array([r.es_dura for r in evl.reglas])
+  filas = []
+  for ruta in args.soluciones:
+    soluciones, nombres = temporada.leer_soluciones(ruta)
+    for i in range(0, len(soluciones), TAM_LOTE):
+      lote = np.asarray(soluciones[i:i+TAM_LOTE])
+      evaluaciones, pen = evl.evalua_lote(lote, penalizaciones=True)
+      factibles = ~np.any(pen[:,duras] > 0, axis=1)
+      for nombre, e, f, p in zip(nombres[i:i+TAM_LOTE], evaluaciones.tolist(),
+                                 factibles.tolist(), pen.tolist()):
+        filas.append([nombre, e, f] + p)
+
+  if args.salida is not None and Path(args.salida).suffix == ".json":
+    import json
+    with open(args.salida, "w") as f:
+      json.dump({
+        "max_eval" : evl.max_eval,
+        "soluciones" : [dict(zip(columnas, fila)) for fila in filas]
+      }, f, indent=2)
+  else:
+    import csv
+    f = sys.stdout if args.salida is None else \
+      open(args.salida, "w", newline="")
+    escritor = csv.writer(f)
+    escritor.writerow(columnas)
+    escritor.writerows(filas)
+    if f is not sys.stdout:
+      f.close()
+  print(f"{len(filas)} soluciones evaluadas", file=sys.stderr)
+
+def nombre_archivo(nombre: str) -> str:
+  """ Nombre de archivo de una solución, los de los lotes son ARCHIVO[I] """
+  from pathlib import Path
+  archivo, _, indice = nombre.partition("[")
+  return Path(archivo).stem + (f"_{indice[:-1]}" if indice else "")
+
+def export(argv: list, prog: str = None) -> None:
+  """ Exporta soluciones a Excel (antes el script solucion-a-excel) """
+  parser = argparse.ArgumentParser(
+    prog=prog,
+    usage="%(prog)s EJEMPLAR SOLUCION [SOLUCION ...] SALIDA [--procesos P]",
+    description="Guarda soluciones como calendarios en archivos .xlsx",
+    epilog=EPILOGO)
+  parser.add_argument("ejemplar")
+  parser.add_argument("soluciones", nargs="+", metavar="SOLUCION",
+                      help="archivo .txt, .npy o .npz, o directorio")
+  parser.add_argument("salida",
+                      help="archivo .xlsx (una hoja por solución) o "
+                           "directorio (sin extensión) para un .xlsx por "
+                           "solución")
+  parser.add_argument("--procesos", type=int, default=1,
+                      help="procesos que escriben los archivos de un "
+                           "directorio, por defecto 1")
+  args = parser.parse_args(argv)
+
+  from pathlib import Path
+  from excel import LibroExcel, exporta_archivos
+
+  temporada = lee_ejemplar(args.ejemplar)
+  salida = Path(args.salida)
+  total = 0
+  # Sin extensión la salida es un directorio
+  if salida.suffix and not salida.is_dir():
+    libro = LibroExcel(temporada)
+    for entrada in args.soluciones:
+      soluciones, nombres = temporada.leer_soluciones(entrada)
+      for solucion, nombre in zip(soluciones, nombres):
+        # Con una sola solución la hoja conserva el título por defecto
+        titulo = None if len(args.soluciones) == 1 and len(nombres) == 1 \
+          else nombre_archivo(nombre)
+        libro.agrega(solucion, titulo)
+      total += len(soluciones)
+    libro.guarda(salida)
+  else:
+    salida.mkdir(parents=True, exist_ok=True)
+    for entrada in args.soluciones:
+      soluciones, nombres = temporada.leer_soluciones(entrada)
+      exporta_archivos(temporada, soluciones,
+                       [salida / f"{nombre_archivo(n)}.xlsx" for n in nombres],
+                       args.procesos)
+      total += len(soluciones)
+  print(f"{total} soluciones guardadas en {salida}", file=sys.stderr)
+
+def convert(argv: list, prog: str = None) -> None:
+  """ Convierte soluciones entre formatos (antes convierte-solucion) """
+  parser = argparse.ArgumentParser(
+    prog=prog,
+    usage="%(prog)s EJEMPLAR ENTRADA [ENTRADA ...] SALIDA",
+    description="Convierte soluciones entre el formato de texto y el binario",
+    epilog=EPILOGO)
+  parser.add_argument("ejemplar")
+  parser.add_argument("entradas", nargs="+", metavar="ENTRADA",
+                      help="archivo .txt, .npy o .npz, o directorio")
+  parser.add_argument("salida",
+                      help="archivo .npy o .npz para juntar todas las entradas "
+                           "en un lote, o directorio para un .txt por solución")
+  args = parser.parse_args(argv)
+
+  import numpy as np
+  from pathlib import Path
+  from temporada import FORMATOS_BINARIOS
+
+  temporada = lee_ejemplar(args.ejemplar)
+  lotes, nombres = [], []
+  for entrada in args.entradas:
+    soluciones, n = temporada.leer_soluciones(entrada)
+    lotes.append(soluciones)
+    nombres += n
+  soluciones = np.concatenate(lotes)
+
+  salida = Path(args.salida)
+  if salida.suffix in FORMATOS_BINARIOS:
+    temporada.guardar_soluciones(salida, soluciones, nombres)
+  elif salida.suffix == ".txt":
+    if len(soluciones) != 1:
+      print(f"Hay {len(soluciones)} soluciones, la salida debe ser un",
+            "directorio")
+      exit(1)
+    with open(salida, "w") as f:
+      f.write(temporada.guardar_solucion(soluciones[0]))
+  else:
+    salida.mkdir(parents=True, exist_ok=True)
+    for nombre, solucion in zip(nombres, soluciones):
+      with open(salida / f"{nombre_archivo(nombre)}.txt", "w") as f:
+        f.write(temporada.guardar_solucion(solucion))
+  print(f"{len(soluciones)} soluciones guardadas en {salida}")
+
+def experiments(argv: list, prog: str = None) -> None:
+  """ Corre las ejecuciones para obtener datos (ejecuciones.py) """
+  parser = argparse.ArgumentParser(
+    prog=prog,
+    description="Corre las ejecuciones configuradas en ejecuciones.py",
+    epilog=EPILOGO)
+  parser.add_argument("procesos", nargs="?", type=int,
+                      help="ejecuciones simultáneas, por defecto el número "
+                           "de CPUs")
+  args = parser.parse_args(argv)
+
+  import ejecuciones
+
+  procesos = ejecuciones.PROCESOS if args.procesos is None else args.procesos
+  print("Semillas:", list(ejecuciones.SEMILLAS), end="\n\n")
+  fallidas = ejecuciones.guardar_datos(procesos)
+  print(f"Datos guardados en {ejecuciones.RUTA}")
+  if fallidas:
+    print("Ejecuciones fallidas:", fallidas)
+
+def report(argv: list, prog: str = None) -> None:
+  """ Genera las gráficas y la tabla de las ejecuciones (lectura.py) """
+  parser = argparse.ArgumentParser(
+    prog=prog,
+    description="Genera las gráficas y la tabla de las ejecuciones",
+    epilog=EPILOGO)
+  parser.add_argument("--sigue", metavar="ARCHIVO",
+                      help="muestra el avance de la telemetría de una "
+                      "ejecución en curso")
+  args = parser.parse_args(argv)
+
+  if args.sigue is None:
+    from lectura import resultados
+    resultados()
+    return
+
+  # Seguir la telemetría no necesita pandas ni matplotlib
+  from telemetria import sigue_telemetria
+  for registros in sigue_telemetria(args.sigue):
+    print(f"Generación: {registros['generacion'][-1]}",
+          f"Mejor: {registros['mejor'][-1]}",
+          f"Promedio: {registros['promedio'][-1]:.1f}",
+          f"Diversidad: {registros['diversidad'][-1]:.3f}",
+          f"Evaluaciones/s: {registros['evaluaciones_por_segundo'][-1]:.0f}")
+
+COMANDOS = {
+  "run" : run,
+  "evaluate" : evaluate,
+  "export" : export,
+  "convert" : convert,
+  "experiments" : experiments,
+  "report" : report
+}
+
+def main(argv: list = None) -> None:
+  """ Punto de entrada de nfl, el primer argumento es el subcomando
+
+  Parámetros
+  ----------
+  argv : list of str
+    Argumentos sin el nombre del programa, por defecto sys.argv[1:]
+  """
+  parser = argparse.ArgumentParser(
+    prog="nfl",
+    usage="%(prog)s COMANDO [argumentos]",
+    description="Calendarización de la NFL con algoritmos genéticos",
+    epilog="Cada comando tiene su propia ayuda: %(prog)s COMANDO --help")
+  parser.add_argument("comando", choices=COMANDOS, metavar="COMANDO",
+                      help=", ".join(COMANDOS))
+  parser.add_argument("argumentos", nargs=argparse.REMAINDER,
+                      help=argparse.SUPPRESS)
+  args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+  COMANDOS[args.comando](args.argumentos, prog=f"nfl {args.comando}")
@@ -1,6 +1,10 @@
 """ Modulo que implementa la ejecución para obtención de datos """
 
+import os
+import sys
 import json
+import multiprocessing as mp
+from multiprocessing.connection import wait
 from pathlib import Path
 from genetico import AlgoritmoGenetico
 from temporada import TemporadaNFL
@@ -14,7 +18,18 @@ TAM_POBLACION = 100
 T_LIMITE = 2400 # 3600 # segundos
 MUESTRA_CADA = 100
 GRAFICA_CADA = 100
+# Guarda en cada .json los tiempos de los operadores y de las reglas, medirlos
+# cuesta generaciones así que está desactivado por defecto
+INSTRUMENTAR = False
+# Escribe un registro por generación en telemetria_I.jsonl mientras corre cada
+# ejecución, así una ejecución interrumpida conserva su historial
+TELEMETRIA = False
 EJEMPLAR = "../data/temporada2023.txt"
+# Ejemplares a ejecutar, con más de uno los datos de cada uno se guardan en una
+# carpeta con su nombre
+EJEMPLARES = [EJEMPLAR]
+# Ejecuciones simultáneas, se puede cambiar con el primer argumento del script
+PROCESOS = os.cpu_count()
 
 # Las semillas estás fijas, se pueden volver aleatorias quitando el 42 (semilla)
 SEMILLAS = np.random.default_rng(42).integers(32767, size=ITERACIONES)
@@ -22,31 +37,90 @@ SEMILLAS = np.random.default_rng(42).integers(32767, size=ITERACIONES)
 RUTA = Path.cwd() / "data"
 RUTA.mkdir(exist_ok=True)
 
-def guardar_datos() -> None:
-  """ Ejecuta los algoritmos el número de iteaciones determinado 
+def ruta_ejemplar(ejemplar: str) -> Path:
+  """ Devuelve la carpeta donde se guardan los datos de un ejemplar """
+  if len(EJEMPLARES) == 1:
+    return RUTA
+  ruta = RUTA / Path(ejemplar).stem
+  ruta.mkdir(exist_ok=True)
+  return ruta
+
+def ejecucion(ejemplar: str, i: int) -> None:
+  """ Realiza la ejecución I de un ejemplar y guarda sus datos en un .json
+
+  Se corre en su propio proceso, así los datos se guardan en cuanto termina.
 
   Parámetros
   ----------
-  Algoritmo: AlgoritmoGenetico
-    Instancia del algoritmo a utilizar
-  nombre: Callable
-    Función que determina el nombre de los archivos con respecto al ejemplar
-    y la ejecución
+  ejemplar : str
+    Ruta del ejemplar
+  i : int
+    Número de la ejecución, empieza en 1
   """
-  temporada = TemporadaNFL.leer_archivo(EJEMPLAR)
+  temporada = TemporadaNFL.leer_archivo(ejemplar)
   evaluacion = EvaluacionNFL2023(temporada)
   problema = AlgoritmoGenetico(temporada, evaluacion)
-  for i in range(1, ITERACIONES+1):
-    resultado = problema.ejecutar(
-      TAM_POBLACION, T_LIMITE, P_CRUZA, P_MUTACION, SEMILLAS[i-1],
-      MUESTRA_CADA, GRAFICA_CADA)
-    resultado["solucion"] = list(map(int, resultado["solucion"].flatten()))
-    with open(RUTA / f"ejecucion_{i}.json", "w") as f:
-      json.dump(resultado, f, indent=2)
-    print(f"Datos del ejemplar {i} guardados UwU", end="\n\n")
-    
+  ruta = ruta_ejemplar(ejemplar)
+  telemetria = ruta / f"telemetria_{i}.jsonl" if TELEMETRIA else None
+  if telemetria is not None and telemetria.exists():
+    telemetria.unlink()
+  resultado = problema.ejecutar(
+    TAM_POBLACION, T_LIMITE, P_CRUZA, P_MUTACION, SEMILLAS[i-1],
+    MUESTRA_CADA, GRAFICA_CADA, instrumentar=INSTRUMENTAR,
+    telemetria=telemetria)
+  resultado["solucion"] = list(map(int, resultado["solucion"].flatten()))
+  if telemetria is not None:
+    # El historial ya está en la telemetría
+    del resultado["optimos"], resultado["promedios"]
+  with open(ruta / f"ejecucion_{i}.json", "w") as f:
+    json.dump(resultado, f, indent=2)
+
+def guardar_datos(procesos: int = PROCESOS) -> list:
+  """ Ejecuta los algoritmos el número de iteaciones determinado
+
+  Las ejecuciones de todos los ejemplares se reparten en PROCESOS procesos
+  simultáneos, cada una en un proceso nuevo. Si un proceso falla las demás
+  ejecuciones siguen y se devuelven las que fallaron.
+
+  Parámetros
+  ----------
+  procesos : int
+    Número máximo de ejecuciones simultáneas, por defecto es PROCESOS
+
+  Devuelve
+  --------
+  list of tuple : Ejemplar y número de cada ejecución que falló
+  """
+  pendientes = [(ejemplar, i) for ejemplar in EJEMPLARES
+                for i in range(1, ITERACIONES+1)]
+  pendientes.reverse()
+  activas = {}
+  fallidas = []
+
+  while pendientes or activas:
+    while pendientes and len(activas) < procesos:
+      ejemplar, i = pendientes.pop()
+      proceso = mp.Process(target=ejecucion, args=(ejemplar, i))
+      proceso.start()
+      activas[proceso.sentinel] = (proceso, ejemplar, i)
+
+    for sentinel in wait(list(activas)):
+      proceso, ejemplar, i = activas.pop(sentinel)
+      proceso.join()
+      if proceso.exitcode == 0:
+        print(f"Datos de la ejecución {i} de {ejemplar} guardados UwU",
+              end="\n\n")
+      else:
+        print(f"La ejecución {i} de {ejemplar} falló", end="\n\n")
+        fallidas.append((ejemplar, i))
+
+  return fallidas
+
 if __name__ == "__main__":
+  procesos = int(sys.argv[1]) if len(sys.argv) > 1 else PROCESOS
   print("Semillas:", list(SEMILLAS), end="\n\n")
-  guardar_datos()
+  fallidas = guardar_datos(procesos)
   print(f"Datos guardados en {RUTA}")
+  if fallidas:
+    print("Ejecuciones fallidas:", fallidas)
 
@@ -0,0 +1,238 @@
+""" Implementa la detección del estancamiento del algoritmo genético """
+
+import numpy as np
+
+# Acciones contra el estancamiento, en el orden en que escalan
+ACCIONES = ("mutacion", "inyeccion", "reinicio")
+
+class Estancamiento:
+  """ Detecta cuándo se estanca una ejecución y reacciona
+
+  La ejecución está estancada si el mejor individuo no mejora en GENERACIONES
+  generaciones, si la diversidad de la población (distancia de Hamming entre
+  pares de una muestra) baja de DIVERSIDAD_MINIMA o si la desviación estándar
+  de las evaluaciones relativa al promedio baja de DESVIACION_MINIMA. Los dos
+  últimos criterios se revisan sólo cuando pasan ESPERA generaciones desde la
+  última mejora o el último evento.
+
+  En cada estancamiento se aplica la siguiente acción de ACCIONES (la última
+  se repite): 'mutacion' multiplica la probabilidad de mutación por
+  FACTOR_MUTACION, 'inyeccion' reemplaza a los peores individuos por
+  soluciones aleatorias y 'reinicio' reemplaza a todos salvo los ELITE
+  mejores. Cuando el mejor individuo mejora o después de un reinicio la
+  probabilidad de mutación vuelve a la original y las acciones empiezan de
+  nuevo.
+  """
+
+  # Optimizar accesos
+  __slots__ = ("algoritmo", "generaciones", "diversidad_minima",
+               "desviacion_minima", "espera", "acciones", "factor_mutacion",
+               "max_mutacion", "fraccion_inyeccion", "elite", "tam_muestra",
+               "p_mutacion", "nivel", "mejor", "ultima_mejora",
+               "ultimo_evento", "eventos")
+
+  def __init__(self, algoritmo: "AlgoritmoGenetico", generaciones: int = 500,
+      diversidad_minima: float = 0.0, desviacion_minima: float = 0.0,
+      espera: int = 50, acciones: tuple = ACCIONES,
+      factor_mutacion: float = 4.0, max_mutacion: float = 0.5,
+      fraccion_inyeccion: float = 0.25, elite: int = 1,
+      tam_muestra: int = 10) -> None:
+    """
+    Parámetros
+    ----------
+    algoritmo : AlgoritmoGenetico
+      Algoritmo preparado (con población) al que se aplican las acciones
+    generaciones : int
+      Generaciones sin mejora del mejor para considerar estancada la
+      ejecución, con 0 no se usa el criterio. Por defecto es 500
+    diversidad_minima : float
+      Diversidad entre 0 y 1 por debajo de la que la ejecución está
+      estancada, con 0 no se usa. Por defecto es 0
+    desviacion_minima : float
+      Desviación estándar de las evaluaciones entre su promedio por debajo de
+      la que la ejecución está estancada, con 0 no se usa. Por defecto es 0
+    espera : int
+      Generaciones desde la última mejora o evento antes de revisar la
+      diversidad y la desviación. Por defecto es 50
+    acciones : tuple of str
+      Acciones de ACCIONES en el orden en que se aplican
+    factor_mutacion : float
+      Factor por el que se multiplica la probabilidad de mutación, por
+      defecto es 4
+    max_mutacion : float
+      Probabilidad de mutación máxima, por defecto es 0.5
+    fraccion_inyeccion : float
+      Fracción de la población que se reemplaza al inyectar, por defecto 0.25
+    elite : int
+      Individuos que se conservan al reiniciar, por defecto es 1
+    tam_muestra : int
+      Individuos de la muestra para medir la diversidad, por defecto es 10
+    """
+    for accion in acciones:
+      if accion not in ACCIONES:
+        raise ValueError(f"Acción desconocida: {accion}")
+    self.algoritmo = algoritmo
+    self.generaciones = generaciones
+    self.diversidad_minima = diversidad_minima
+    self.desviacion_minima = desviacion_minima
+    self.espera = espera
+    self.acciones = tuple(acciones)
+    self.factor_mutacion = factor_mutacion
+    self.max_mutacion = max_mutacion
+    self.fraccion_inyeccion = fraccion_inyeccion
+    self.elite = max(elite, 1)
+    self.tam_muestra = tam_muestra
+    # Estado
+    self.p_mutacion = algoritmo.p_mutacion
+    self.nivel = 0
+    self.mejor = algoritmo.evaluacion_mejor()
+    self.ultima_mejora = 0
+    self.ultimo_evento = 0
+    self.eventos = []
+
+  def diversidad(self) -> float:
+    """ Distancia de Hamming promedio entre los pares de una muestra
+
+    La muestra son TAM_MUESTRA individuos espaciados de forma regular, así
+    medir la diversidad no usa el generador de aleatorios. Se comparan los
+    partidos de todos los pares a la vez.
+
+    Devuelve
+    --------
+    float : Fracción promedio de partidos distintos, entre 0 y 1
+    """
+    alg = self.algoritmo
+    m = min(self.tam_muestra, alg.tam_poblacion)
+    if m < 2:
+      return 0.0
+    indices = np.linspace(0, alg.tam_poblacion - 1, m, dtype=int)
+    muestra = alg.poblacion[indices,:,:,0].reshape(m, -1)
+    distintos = (muestra[:,None,:] != muestra[None,:,:]).sum(axis=2)
+    # Sin la diagonal, que siempre es 0
+    return float(distintos.sum() / (m * (m - 1) * muestra.shape[1]))
+
+  def desviacion(self) -> float:
+    """ Desviación estándar de las evaluaciones entre su promedio """
+    evaluaciones = self.algoritmo.evaluaciones
+    promedio = abs(float(evaluaciones.mean()))
+    return float(evaluaciones.std()) / promedio if promedio else 0.0
+
+  def criterio(self, generacion: int) -> str:
+    """ Devuelve el criterio por el que la ejecución está estancada o None """
+    desde = generacion - max(self.ultima_mejora, self.ultimo_evento)
+    if self.generaciones and desde >= self.generaciones:
+      return "sin_mejora"
+    if desde < self.espera:
+      return None
+    if self.desviacion_minima and self.desviacion() < self.desviacion_minima:
+      return "desviacion"
+    if self.diversidad_minima and self.diversidad() < self.diversidad_minima:
+      return "diversidad"
+    return None
+
+  def revisa(self, generacion: int, tiempo: float) -> str:
+    """ Revisa la generación actual y aplica una acción si hay estancamiento
+
+    Parámetros
+    ----------
+    generacion : int
+      Generación actual
+    tiempo : float
+      Segundos que lleva la ejecución, sólo para el registro del evento
+
+    Devuelve
+    --------
+    str : Acción aplicada o None
+    """
+    alg = self.algoritmo
+    if alg.evaluacion_mejor() > self.mejor:
+      self.mejor = alg.evaluacion_mejor()
+      self.ultima_mejora = generacion
+      self.nivel = 0
+      alg.p_mutacion = self.p_mutacion
+      return None
+
+    criterio = self.criterio(generacion)
+    if criterio is None:
+      return None
+    accion = self.acciones[min(self.nivel, len(self.acciones) - 1)]
+    self.nivel += 1
+    self.ultimo_evento = generacion
+    evento = {
+      "generacion" : generacion,
+      "tiempo" : tiempo,
+      "criterio" : criterio,
+      "accion" : accion,
+      "mejor" : int(self.mejor),
+      "diversidad" : self.diversidad(),
+      "desviacion" : self.desviacion()
+    }
+    self.aplica(accion)
+    evento["p_mutacion"] = alg.p_mutacion
+    self.eventos.append(evento)
+    return accion
+
+  def aplica(self, accion: str) -> None:
+    """ Aplica una de las ACCIONES a la población del algoritmo """
+    alg = self.algoritmo
+    if accion == "mutacion":
+      alg.p_mutacion = min(max(alg.p_mutacion, 1e-3) * self.factor_mutacion,
+                           self.max_mutacion)
+      return
+
+    if accion == "inyeccion":
+      # Los peores, nunca el mejor
+      num = max(1, round(self.fraccion_inyeccion * alg.tam_poblacion))
+      reemplazados = [i for i in np.argsort(alg.evaluaciones).tolist()
+                      if i != alg.mejor][:num]
+    else:
+      reemplazados = np.argsort(-alg.evaluaciones, kind="stable")
+      reemplazados = reemplazados[self.elite:].tolist()
+      alg.p_mutacion = self.p_mutacion
+      self.nivel = 0
+    for i in reemplazados:
+      alg.solucion_aleatoria(alg.poblacion[i])
+    alg.evalua_individuos(reemplazados)
+    mejor = alg.mejor
+    alg.actualzia_datos_generacion()
+    # Con empates el mejor sigue siendo el mismo individuo
+    if alg.evaluaciones[mejor] == alg.evaluaciones[alg.mejor]:
+      alg.mejor = mejor
+
+  def estado(self) -> dict:
+    """ Devuelve el estado para guardarlo en un checkpoint """
+    return {
+      "p_mutacion" : self.p_mutacion,
+      "p_mutacion_actual" : self.algoritmo.p_mutacion,
+      "nivel" : self.nivel,
+      "mejor" : int(self.mejor),
+      "ultima_mejora" : self.ultima_mejora,
+      "ultimo_evento" : self.ultimo_evento,
+      "eventos" : self.eventos
+    }
+
+  def restaura(self, estado: dict) -> None:
+    """ Restaura el estado devuelto por ESTADO """
+    self.p_mutacion = estado["p_mutacion"]
+    self.algoritmo.p_mutacion = estado["p_mutacion_actual"]
+    self.nivel = estado["nivel"]
+    self.mejor = estado["mejor"]
+    self.ultima_mejora = estado["ultima_mejora"]
+    self.ultimo_evento = estado["ultimo_evento"]
+    self.eventos = estado["eventos"]
+
+  def estadisticas(self) -> dict:
+    """ Devuelve los eventos de la ejecución
+
+    Devuelve
+    --------
+    dict : Diccionario con las llaves 'eventos' (lista con la generación,
+      tiempo, criterio, acción, mejor evaluación, diversidad, desviación y
+      probabilidad de mutación resultante de cada evento) y 'acciones'
+      (número de veces que se aplicó cada acción)
+    """
+    return {
+      "eventos" : self.eventos,
+      "acciones" : {a : sum(e["accion"] == a for e in self.eventos)
+                    for a in ACCIONES}
+    }
@@ -0,0 +1,214 @@
+""" Implementa una cache para las evaluaciones de soluciones de la NFL """
+
+import numpy as np
+from collections import OrderedDict
+from evaluacion.evaluacion import EvaluacionNFL
+
+class CacheEvaluacion:
+  """ Memoriza las evaluaciones de una función de evaluación
+
+  Las soluciones se identifican con un hash de Zobrist: a cada valor posible
+  de cada casilla se le asigna un entero aleatorio de 64 bits y el hash es el
+  XOR de los de todas las casillas. Así el hash de una solución que cambió en
+  pocas casillas (como un intercambio de semanas) se actualiza con un par de
+  XOR por casilla sin recorrer toda la solución. La probabilidad de que dos
+  soluciones distintas compartan hash es despreciable.
+
+  La cache tiene un tamaño máximo, cuando se llena se descarta la evaluación
+  usada hace más tiempo (LRU).
+  """
+
+  # Optimizar accesos
+  __slots__ = ("evaluacion", "max_eval", "tam_maximo", "tabla", "aciertos",
+               "fallos", "zobrist_partidos", "zobrist_horarios", "equipos",
+               "semanas")
+
+  def __init__(self, evaluacion: EvaluacionNFL, tam_maximo: int = 10000,
+      semilla: int = 0) -> None:
+    """
+    Parámetros
+    ----------
+    evaluacion : EvaluacionNFL
+      Función de evaluación de las soluciones
+    tam_maximo : int
+      Número máximo de evaluaciones almacenadas, por defecto es 10000
+    semilla : int
+      Semilla para generar la tabla de Zobrist, por defecto es 0
+    """
+    self.evaluacion = evaluacion
+    self.max_eval = evaluacion.max_eval
+    self.tam_maximo = tam_maximo
+    self.tabla = OrderedDict()
+    self.aciertos = 0
+    self.fallos = 0
+
+    ejemplar = evaluacion.ejemplar
+    rng = np.random.default_rng(semilla)
+    forma = (ejemplar.num_equipos, ejemplar.num_semanas)
+    limite = np.iinfo(np.uint64).max
+    self.zobrist_partidos = rng.integers(
+      limite, size=forma + (ejemplar.bye + 1,), dtype=np.uint64,
+      endpoint=True)
+    self.zobrist_horarios = rng.integers(
+      limite, size=forma + (len(ejemplar.horarios),), dtype=np.uint64,
+      endpoint=True)
+    self.equipos = np.arange(ejemplar.num_equipos)[:,None]
+    self.semanas = np.arange(ejemplar.num_semanas)
+
+  def hash_lote(self, soluciones: np.ndarray) -> np.ndarray:
+    """ Calcula el hash de Zobrist de cada solución
+
+    Parámetros
+    ----------
+    soluciones : np.ndarray
+      Soluciones de la forma (..., equipos, semanas, 2)
+
+    Devuelve
+    --------
+    np.ndarray : Hashes de las soluciones como np.uint64, de la forma (...)
+    """
+    partidos = self.zobrist_partidos[
+      self.equipos, self.semanas, soluciones[...,0]]
+    horarios = self.zobrist_horarios[
+      self.equipos, self.semanas, soluciones[...,1]]
+    return np.bitwise_xor.reduce(partidos ^ horarios, axis=(-2,-1))
+
+  def hash(self, solucion: np.ndarray) -> int:
+    """ Calcula el hash de Zobrist de una solución
+
+    Parámetros
+    ----------
+    solucion : np.ndarray
+      Solución codificada
+
+    Devuelve
+    --------
+    int : Hash de la solución
+    """
+    return int(self.hash_lote(solucion))
+
+  def actualiza_hash(self, h: int, anterior: np.ndarray,
+      nueva: np.ndarray) -> int:
+    """ Actualiza el hash de una solución que cambió en algunas casillas
+
+    A cada casilla que cambió se le quita su valor anterior y se le agrega el
+    nuevo con XOR.
+
+    Parámetros
+    ----------
+    h : int
+      Hash de la solución ANTERIOR
+    anterior : np.ndarray
+      Solución antes de los cambios
+    nueva : np.ndarray
+      Solución después de los cambios
+
+    Devuelve
+    --------
+    int : Hash de la solución NUEVA
+    """
+    e, s = np.nonzero(np.any(anterior != nueva, axis=2))
+    cambio = self.zobrist_partidos[e,s,anterior[e,s,0]] ^ \
+      self.zobrist_partidos[e,s,nueva[e,s,0]] ^ \
+      self.zobrist_horarios[e,s,anterior[e,s,1]] ^ \
+      self.zobrist_horarios[e,s,nueva[e,s,1]]
+    return h ^ int(np.bitwise_xor.reduce(cambio))
+
+  def __call__(self, solucion: np.ndarray, h: int = None) -> int:
+    """ Evalúa una solución, usando la evaluación memorizada si existe
+
+    Parámetros
+    ----------
+    solucion : np.ndarray
+      Solución codificada a evaluar
+    h : int
+      Hash de la solución, si es None se calcula
+
+    Devuelve
+    --------
+    int : Evaluacion de la solución
+    """
+    if h is None:
+      h = self.hash(solucion)
+    if h in self.tabla:
+      self.aciertos += 1
+      self.tabla.move_to_end(h)
+      return self.tabla[h]
+    self.fallos += 1
+    evaluacion = self.evaluacion(solucion)
+    self.guarda(h, evaluacion)
+    return evaluacion
+
+  def evalua_lote(self, soluciones: np.ndarray,
+      hashes: list = None) -> np.ndarray:
+    """ Evalúa un lote de soluciones, sólo se evalúan las que no están
+
+    Las soluciones que no están en la cache se evalúan juntas con el
+    EVALUA_LOTE de la función de evaluación, las repetidas dentro del lote se
+    evalúan una sola vez.
+
+    Parámetros
+    ----------
+    soluciones : np.ndarray
+      Soluciones apiladas en un arreglo de la forma (P, equipos, semanas, 2)
+    hashes : list of int
+      Hash de cada solución, si es None se calculan
+
+    Devuelve
+    --------
+    np.ndarray : Vector con las P evaluaciones
+    """
+    if hashes is None:
+      hashes = self.hash_lote(soluciones).tolist()
+
+    evaluaciones = np.empty(len(hashes), dtype=int)
+    pendientes = {}
+    for i, h in enumerate(hashes):
+      if h in self.tabla:
+        self.aciertos += 1
+        self.tabla.move_to_end(h)
+        evaluaciones[i] = self.tabla[h]
+      elif h in pendientes:
+        self.aciertos += 1
+        pendientes[h].append(i)
+      else:
+        self.fallos += 1
+        pendientes[h] = [i]
+
+    if pendientes:
+      primeros = [ind[0] for ind in pendientes.values()]
+      nuevas = self.evaluacion.evalua_lote(soluciones[primeros]).tolist()
+      for (h, ind), e in zip(pendientes.items(), nuevas):
+        evaluaciones[ind] = e
+        self.guarda(h, e)
+
+    return evaluaciones
+
+  def guarda(self, h: int, evaluacion: int) -> None:
+    """ Guarda una evaluación, descarta la usada hace más tiempo si se llena
+
+    Parámetros
+    ----------
+    h : int
+      Hash de la solución
+    evaluacion : int
+      Evaluación de la solución
+    """
+    self.tabla[h] = evaluacion
+    if len(self.tabla) > self.tam_maximo:
+      self.tabla.popitem(last=False)
+
+  def estadisticas(self) -> dict:
+    """ Devuelve los contadores de la cache
+
+    Devuelve
+    --------
+    dict : Diccionario con las llaves 'aciertos', 'fallos', 'tam' (número de
+      evaluaciones almacenadas) y 'tam_maximo'
+    """
+    return {
+      "aciertos" : self.aciertos,
+      "fallos" : self.fallos,
+      "tam" : len(self.tabla),
+      "tam_maximo" : self.tam_maximo
+    }
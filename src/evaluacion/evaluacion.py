@@ -2,23 +2,40 @@
 
 import numpy as np
 from temporada import TemporadaNFL
+from instrumentacion import Instrumentacion, ReglaMedida
 from abc import ABC, abstractmethod
 
+# Soluciones que se evalúan juntas en EVALUA_LOTE, los arreglos temporales de
+# las reglas crecen con el bloque y no con el lote
+TAM_BLOQUE = 256
+
 class EvaluacionNFL(ABC):
   """ Define la estructura de las funciones de evaluación para calendarios """
 
-  __slots__ = ("ejemplar", "reglas", "max_eval")
+  __slots__ = ("ejemplar", "reglas", "max_eval", "vectorizada", "orden",
+               "holguras")
 
-  def __init__(self, ejemplar: TemporadaNFL):
+  def __init__(self, ejemplar: TemporadaNFL, vectorizada: bool = True):
     """
     Parámetros
     ----------
     ejemplar : TemporadaNFL
       Ejemplar para la evaluación
+    vectorizada : bool
+      Si es True las reglas se evalúan con operaciones sobre arreglos de NumPy,
+      si es False con las implementaciones por ciclos. Ambas dan los mismos
+      resultados. Por defecto es True
     """
     self.ejemplar = ejemplar
     self.reglas = self.carga_reglas()
     self.max_eval = sum(r.max_eval for r in self.reglas)
+    # Lo más que cada regla puede sumar a la evaluación (con penalizaciones
+    # negativas), la evaluación acotada lo suma a su cota mientras no la aplica
+    self.holguras = [max(-r.min_eval, 0) for r in self.reglas]
+    self.vectorizada = vectorizada
+    for r in self.reglas:
+      r.vectorizada = vectorizada
+    self.ordena_reglas()
 
   @abstractmethod
   def carga_reglas(self) -> list:
@@ -44,6 +61,212 @@ class EvaluacionNFL(ABC):
     """
     return self.max_eval - sum(r(solucion) for r in self.reglas)
 
+  def evalua_lote(self, soluciones: np.ndarray,
+      penalizaciones: bool = False) -> np.ndarray:
+    """ Evalúa un lote de soluciones codificadas en una sola llamada
+
+    Los lotes grandes se evalúan por bloques de TAM_BLOQUE soluciones, así la
+    memoria temporal no depende del tamaño del lote.
+
+    Parámetros
+    ----------
+    soluciones : np.ndarray
+      Soluciones apiladas en un arreglo de la forma (P, equipos, semanas, 2)
+    penalizaciones : bool
+      Si es True también se devuelve la penalización de cada regla.
+      Por defecto es False
+
+    Devuelve
+    --------
+    np.ndarray : Vector con las P evaluaciones obtenidas
+    np.ndarray : Sólo si PENALIZACIONES es True, matriz de P x reglas con la
+      penalización que dio cada regla a cada solución, en el orden de REGLAS
+    """
+    pen = np.concatenate([
+      np.stack([r.lote(soluciones[i:i+TAM_BLOQUE]) for r in self.reglas],
+               axis=-1)
+      for i in range(0, max(len(soluciones), 1), TAM_BLOQUE)])
+    evaluaciones = self.max_eval - pen.sum(axis=-1)
+    return (evaluaciones, pen) if penalizaciones else evaluaciones
+
+  def ordena_reglas(self, soluciones: np.ndarray = None) -> None:
+    """ Fija el orden en que la evaluación acotada aplica las reglas
+
+    Las reglas duras van primero, su penalización domina a la de las blandas.
+    Sin SOLUCIONES cada grupo se ordena por su máxima evaluación, con
+    SOLUCIONES por la penalización promedio sobre las primeras TAM_BLOQUE
+    soluciones entre el COSTO de la regla, así primero se aplican las que más
+    acercan la cota al umbral por menos costo. El orden sólo depende de las
+    soluciones y no cambia las evaluaciones.
+
+    Parámetros
+    ----------
+    soluciones : np.ndarray
+      Lote de soluciones representativas de la forma (P, equipos, semanas, 2)
+    """
+    if soluciones is None:
+      prioridad = [r.max_eval for r in self.reglas]
+    else:
+      muestra = soluciones[:TAM_BLOQUE]
+      prioridad = [float(np.mean(r.lote(muestra))) / r.costo
+                   for r in self.reglas]
+    self.orden = sorted(range(len(self.reglas)),
+                        key=lambda i: (not self.reglas[i].es_dura,
+                                       -prioridad[i]))
+
+  def evalua_acotada(self, solucion: np.ndarray, umbral: int) -> tuple:
+    """ Evalúa una solución deteniéndose si no puede superar UMBRAL
+
+    Las reglas se aplican en el orden de ORDENA_REGLAS. La evaluación
+    parcial (MAX_EVAL menos las penalizaciones acumuladas) más las HOLGURAS
+    de las reglas que faltan es una cota superior de la evaluación, aunque
+    alguna regla dé penalizaciones negativas. En cuanto la cota es menor o
+    igual a UMBRAL se devuelve la cota.
+
+    Parámetros
+    ----------
+    solucion : np.ndarray
+      Solución codificada a evaluar
+    umbral : int
+      Evaluación que la solución debe superar
+
+    Devuelve
+    --------
+    int : Evaluación, o una cota superior menor o igual a UMBRAL
+    bool : True si la evaluación es exacta
+    """
+    cota = self.max_eval + sum(self.holguras)
+    ultima = len(self.orden) - 1
+    for k, i in enumerate(self.orden):
+      cota -= self.reglas[i](solucion) + self.holguras[i]
+      if cota <= umbral and k < ultima:
+        return cota, False
+    return cota, True
+
+  def evalua_lote_acotada(self, soluciones: np.ndarray,
+      umbrales: np.ndarray) -> tuple:
+    """ Versión de EVALUA_ACOTADA para lotes
+
+    Cada regla se aplica sólo a las soluciones que todavía pueden superar su
+    umbral. Como en EVALUA_LOTE, el lote se procesa por bloques de TAM_BLOQUE
+    soluciones.
+
+    Parámetros
+    ----------
+    soluciones : np.ndarray
+      Soluciones apiladas en un arreglo de la forma (P, equipos, semanas, 2)
+    umbrales : np.ndarray
+      Evaluación que debe superar cada solución
+
+    Devuelve
+    --------
+    np.ndarray : Vector con las P evaluaciones o cotas superiores
+    np.ndarray : Vector booleano, True si la evaluación es exacta
+    """
+    num = len(soluciones)
+    cotas = np.full(num, self.max_eval + sum(self.holguras), dtype=np.int64)
+    exactas = np.zeros(num, dtype=bool)
+    for inicio in range(0, num, TAM_BLOQUE):
+      fin = min(inicio + TAM_BLOQUE, num)
+      self._acota_bloque(soluciones[inicio:fin], umbrales[inicio:fin],
+                         cotas[inicio:fin], exactas[inicio:fin])
+    return cotas, exactas
+
+  def _acota_bloque(self, soluciones: np.ndarray, umbrales: np.ndarray,
+      cotas: np.ndarray, exactas: np.ndarray) -> None:
+    """ Aplica EVALUA_LOTE_ACOTADA a un bloque, escribe COTAS y EXACTAS """
+    num = len(soluciones)
+    activas = np.arange(num)
+    ultima = len(self.orden) - 1
+    for k, i in enumerate(self.orden):
+      lote = soluciones if len(activas) == num else soluciones[activas]
+      cotas[activas] -= self.reglas[i].lote(lote) + self.holguras[i]
+      if k < ultima:
+        activas = activas[cotas[activas] > umbrales[activas]]
+        if not len(activas):
+          break
+    exactas[activas] = True
+
+  def contribuciones(self, solucion: np.ndarray) -> list:
+    """ Calcula las contribuciones de cada regla para evaluar incrementalmente
+
+    Siempre se usan las versiones vectorizadas de las reglas.
+
+    Parámetros
+    ----------
+    solucion : np.ndarray
+      Solución codificada
+
+    Devuelve
+    --------
+    list of np.ndarray : Contribuciones por equipo o semana de cada regla, en
+      el orden de REGLAS
+    """
+    return [r.contribuciones(solucion) for r in self.reglas]
+
+  def evalua_contribuciones(self, contribuciones: list) -> int:
+    """ Obtiene la evaluación a partir de las contribuciones de cada regla
+
+    Parámetros
+    ----------
+    contribuciones : list of np.ndarray
+      Contribuciones de cada regla, como las devuelve CONTRIBUCIONES
+
+    Devuelve
+    --------
+    int : Evaluacion obtenida según las reglas de la función
+    """
+    return self.max_eval - sum(int(r.penaliza(r.total(c)))
+                               for r, c in zip(self.reglas, contribuciones))
+
+  def evalua_incremental(self, solucion: np.ndarray, contribuciones: list,
+      cambios: np.ndarray) -> tuple:
+    """ Evalúa una solución a partir de las contribuciones de otra parecida
+
+    Sólo se recalculan los equipos y semanas con alguna casilla en CAMBIOS,
+    para las reglas que no se descomponen se recalcula todo.
+
+    Parámetros
+    ----------
+    solucion : np.ndarray
+      Solución codificada ya modificada
+    contribuciones : list of np.ndarray
+      Contribuciones de la solución original, no se modifican
+    cambios : np.ndarray
+      Arreglo booleano de (equipos, semanas) con las casillas que cambiaron
+      respecto a la solución original
+
+    Devuelve
+    --------
+    int : Evaluacion de SOLUCION
+    list of np.ndarray : Contribuciones de SOLUCION
+    """
+    equipos = np.flatnonzero(cambios.any(axis=1))
+    semanas = np.flatnonzero(cambios.any(axis=0))
+    if len(equipos):
+      contribuciones = [r.actualiza(solucion, c, equipos, semanas)
+                        for r, c in zip(self.reglas, contribuciones)]
+    return self.evalua_contribuciones(contribuciones), contribuciones
+
+  def instrumenta(self, instrumentacion: Instrumentacion) -> None:
+    """ Empieza a medir el tiempo de cada regla
+
+    Las reglas se envuelven en ReglaMedida, sin instrumentar se usan
+    directamente y no hay ningún costo extra.
+
+    Parámetros
+    ----------
+    instrumentacion : Instrumentacion
+      Donde se registran los tiempos de las reglas
+    """
+    self.desinstrumenta()
+    self.reglas = [ReglaMedida(r, instrumentacion) for r in self.reglas]
+
+  def desinstrumenta(self) -> None:
+    """ Deja de medir el tiempo de las reglas """
+    self.reglas = [r.regla if isinstance(r, ReglaMedida) else r
+                   for r in self.reglas]
+
   def analiza_solucion(self, solucion: np.ndarray) -> None:
     """ Analiza las penalización de cada regla sobre una solución
 
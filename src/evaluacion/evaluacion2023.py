@@ -8,8 +8,8 @@ from evaluacion.reglas.blandas import *
 
 class EvaluacionNFL2023(EvaluacionNFL):
   """ Define la estructura de las funciones de evaluación para calendarios 2023 """
-  def __init__(self, ejemplar: TemporadaNFL):
-    super().__init__(ejemplar)
+  def __init__(self, ejemplar: TemporadaNFL, vectorizada: bool = True):
+    super().__init__(ejemplar, vectorizada)
 
   def carga_reglas(self):
     return [r(self.ejemplar) for r in [
@@ -0,0 +1,293 @@
+""" Implementa la evaluación en paralelo de lotes de soluciones de la NFL """
+
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory, resource_tracker
+from evaluacion.evaluacion import EvaluacionNFL
+
+# Estado de cada proceso trabajador, se crea una sola vez al iniciar el proceso
+_evaluacion = None
+_memorias = {}
+# Bloques de memoria compartida que un trabajador mantiene abiertos
+MAX_MEMORIAS = 4
+
+def _inicializa_trabajador(clase: type, ejemplar: "TemporadaNFL",
+    vectorizada: bool) -> None:
+  """ Construye la función de evaluación propia del proceso trabajador """
+  global _evaluacion
+  _evaluacion = clase(ejemplar, vectorizada)
+
+def _evalua_rebanada(nombre: str, forma: tuple, tipo: str, inicio: int,
+    fin: int, penalizaciones: bool) -> "np.ndarray | tuple":
+  """ Evalúa las soluciones INICIO:FIN del bloque de memoria compartida
+
+  Los bloques se abren la primera vez que se usan y se mantienen abiertos,
+  cuando hay más de MAX_MEMORIAS se cierra el más antiguo (el proceso
+  principal ya lo cambió por otro más grande).
+  """
+  if nombre not in _memorias:
+    if len(_memorias) >= MAX_MEMORIAS:
+      _memorias.pop(next(iter(_memorias))).close()
+    memoria = shared_memory.SharedMemory(name=nombre)
+    # El bloque es del proceso principal, si se queda registrado el proceso
+    # lo borraría al terminar
+    resource_tracker.unregister(memoria._name, "shared_memory")
+    _memorias[nombre] = memoria
+  soluciones = np.ndarray(forma, dtype=tipo, buffer=_memorias[nombre].buf)
+  return _evaluacion.evalua_lote(soluciones[inicio:fin], penalizaciones)
+
+class EvaluacionParalela:
+  """ Evalúa lotes de soluciones repartiéndolos en varios procesos
+
+  Las soluciones del lote se copian a un bloque de memoria compartida y cada
+  proceso evalúa una rebanada del bloque en su lugar, así las soluciones no se
+  serializan para mandarlas a los procesos, sólo regresan las evaluaciones.
+  Los lotes que ya están en un arreglo de ARREGLO_COMPARTIDO (la población de
+  AlgoritmoGenetico) no se copian.
+  Cada proceso construye su propia función de evaluación (de la misma clase
+  que EVALUACION) una sola vez y los procesos se mantienen entre lotes.
+
+  Se puede usar en lugar de la función de evaluación en AlgoritmoGenetico y
+  en CacheEvaluacion, las evaluaciones son las mismas. Las soluciones sueltas
+  se evalúan en el proceso principal.
+
+  Los procesos y el bloque se liberan con CIERRA o al usarla con 'with'.
+  """
+
+  # Optimizar accesos
+  __slots__ = ("evaluacion", "ejemplar", "max_eval", "num_procesos", "pool",
+               "memoria", "capacidad", "bloques")
+
+  def __init__(self, evaluacion: EvaluacionNFL,
+      num_procesos: int = None) -> None:
+    """
+    Parámetros
+    ----------
+    evaluacion : EvaluacionNFL
+      Función de evaluación, en los procesos se construye una de su clase con
+      el mismo ejemplar y el mismo valor de VECTORIZADA
+    num_procesos : int
+      Número de procesos trabajadores, si es None se usa el número de CPUs
+    """
+    self.evaluacion = evaluacion
+    self.ejemplar = evaluacion.ejemplar
+    self.max_eval = evaluacion.max_eval
+    self.num_procesos = num_procesos or mp.cpu_count()
+    self.pool = mp.Pool(self.num_procesos, initializer=_inicializa_trabajador,
+                        initargs=(type(evaluacion), evaluacion.ejemplar,
+                                  evaluacion.vectorizada))
+    self.memoria = None
+    self.capacidad = 0
+    # Bloques propios de los arreglos de ARREGLO_COMPARTIDO
+    self.bloques = []
+
+  def __call__(self, solucion: np.ndarray) -> int:
+    """ Evalúa una solución codificada en el proceso principal
+
+    Parámetros
+    ----------
+    solucion : np.ndarray
+      Solución codificada a evaluar
+
+    Devuelve
+    --------
+    int : Evaluacion obtenida según las reglas de la función
+    """
+    return self.evaluacion(solucion)
+
+  def contribuciones(self, solucion: np.ndarray) -> list:
+    """ Igual que EvaluacionNFL.contribuciones, en el proceso principal """
+    return self.evaluacion.contribuciones(solucion)
+
+  def evalua_contribuciones(self, contribuciones: list) -> int:
+    """ Igual que EvaluacionNFL.evalua_contribuciones """
+    return self.evaluacion.evalua_contribuciones(contribuciones)
+
+  def evalua_incremental(self, solucion: np.ndarray, contribuciones: list,
+      cambios: np.ndarray) -> tuple:
+    """ Igual que EvaluacionNFL.evalua_incremental, en el proceso principal """
+    return self.evaluacion.evalua_incremental(solucion, contribuciones, cambios)
+
+  def ordena_reglas(self, soluciones: np.ndarray = None) -> None:
+    """ Igual que EvaluacionNFL.ordena_reglas, en el proceso principal """
+    self.evaluacion.ordena_reglas(soluciones)
+
+  def evalua_lote_acotada(self, soluciones: np.ndarray,
+      umbrales: np.ndarray) -> tuple:
+    """ Igual que EvaluacionNFL.evalua_lote_acotada, en el proceso principal
+
+    Los lotes acotados son chicos (los hijos del modo estacionario), no
+    conviene repartirlos.
+    """
+    return self.evaluacion.evalua_lote_acotada(soluciones, umbrales)
+
+  def instrumenta(self, instrumentacion: "Instrumentacion") -> None:
+    """ Mide las reglas de la evaluación del proceso principal
+
+    Los lotes se evalúan en los procesos trabajadores y no se miden por
+    regla.
+    """
+    self.evaluacion.instrumenta(instrumentacion)
+
+  def desinstrumenta(self) -> None:
+    """ Deja de medir las reglas de la evaluación del proceso principal """
+    self.evaluacion.desinstrumenta()
+
+  def lote(self, n: int) -> np.ndarray:
+    """ Devuelve un arreglo en memoria compartida para N soluciones
+
+    Si el bloque actual es muy pequeño se reemplaza por uno del doble de
+    tamaño, los datos anteriores se pierden y los arreglos devueltos antes ya
+    no deben usarse.
+
+    Parámetros
+    ----------
+    n : int
+      Número de soluciones
+
+    Devuelve
+    --------
+    np.ndarray : Arreglo de la forma (N, equipos, semanas, 2) sobre el bloque,
+      en el tipo compacto del ejemplar (TemporadaNFL.tipo_solucion)
+    """
+    forma = (self.ejemplar.num_equipos, self.ejemplar.num_semanas, 2)
+    if n > self.capacidad:
+      capacidad = max(n, 2 * self.capacidad)
+      self.libera_memoria()
+      self.capacidad = capacidad
+      tam = capacidad * int(np.prod(forma)) * \
+        self.ejemplar.tipo_solucion.itemsize
+      self.memoria = shared_memory.SharedMemory(create=True, size=tam)
+    return np.ndarray((n,) + forma, dtype=self.ejemplar.tipo_solucion,
+                      buffer=self.memoria.buf)
+
+  def arreglo_compartido(self, n: int) -> np.ndarray:
+    """ Devuelve un arreglo para N soluciones en un bloque propio
+
+    A diferencia de LOTE el bloque no se reutiliza ni se reemplaza, el arreglo
+    es válido mientras exista el objeto (también después de CIERRA).
+    EVALUA_LOTE no copia los lotes que sean rebanadas contiguas de estos
+    arreglos, los procesos las leen en su lugar.
+
+    Parámetros
+    ----------
+    n : int
+      Número de soluciones
+
+    Devuelve
+    --------
+    np.ndarray : Arreglo de la forma (N, equipos, semanas, 2) en ceros, en el
+      tipo compacto del ejemplar (TemporadaNFL.tipo_solucion)
+    """
+    forma = (n, self.ejemplar.num_equipos, self.ejemplar.num_semanas, 2)
+    tam = int(np.prod(forma)) * self.ejemplar.tipo_solucion.itemsize
+    bloque = shared_memory.SharedMemory(create=True, size=max(tam, 1))
+    self.bloques.append(bloque)
+    arreglo = np.ndarray(forma, dtype=self.ejemplar.tipo_solucion,
+                         buffer=bloque.buf)
+    arreglo[...] = 0
+    return arreglo
+
+  def ubica(self, soluciones: np.ndarray) -> tuple:
+    """ Busca el bloque de memoria compartida en el que están SOLUCIONES
+
+    Sólo se encuentran los lotes contiguos en el tipo del ejemplar que empiezan
+    en el límite de una solución del bloque, como las rebanadas P:Q de LOTE o
+    de ARREGLO_COMPARTIDO.
+
+    Parámetros
+    ----------
+    soluciones : np.ndarray
+      Soluciones de la forma (P, equipos, semanas, 2)
+
+    Devuelve
+    --------
+    SharedMemory : Bloque con las soluciones, None si no están en ninguno
+    int : Índice de la primera solución del lote dentro del bloque
+    """
+    if soluciones.dtype != self.ejemplar.tipo_solucion or \
+        not soluciones.flags.c_contiguous:
+      return None, 0
+    tam_solucion = soluciones[0].nbytes if len(soluciones) else 1
+    inicio = soluciones.__array_interface__["data"][0]
+    bloques = self.bloques + ([self.memoria] if self.memoria else [])
+    for bloque in bloques:
+      base = np.frombuffer(bloque.buf, dtype=np.uint8).ctypes.data
+      desfase = inicio - base
+      if 0 <= desfase and desfase + soluciones.nbytes <= bloque.size and \
+          desfase % tam_solucion == 0:
+        return bloque, desfase // tam_solucion
+    return None, 0
+
+  def evalua_lote(self, soluciones: np.ndarray,
+      penalizaciones: bool = False) -> np.ndarray:
+    """ Evalúa un lote de soluciones repartido entre los procesos
+
+    Si SOLUCIONES no está en un bloque de memoria compartida (ver UBICA) se
+    copia al bloque de LOTE.
+
+    Parámetros
+    ----------
+    soluciones : np.ndarray
+      Soluciones apiladas en un arreglo de la forma (P, equipos, semanas, 2)
+    penalizaciones : bool
+      Igual que en EvaluacionNFL.evalua_lote. Por defecto es False
+
+    Devuelve
+    --------
+    np.ndarray : Vector con las P evaluaciones obtenidas
+    np.ndarray : Sólo si PENALIZACIONES es True, matriz de P x reglas con la
+      penalización que dio cada regla a cada solución
+    """
+    n = len(soluciones)
+    bloque, desfase = self.ubica(soluciones)
+    if bloque is None:
+      self.lote(n)[...] = soluciones
+      bloque, desfase = self.memoria, 0
+
+    tipo = self.ejemplar.tipo_solucion
+    forma_solucion = (self.ejemplar.num_equipos, self.ejemplar.num_semanas, 2)
+    capacidad = bloque.size // (int(np.prod(forma_solucion)) * tipo.itemsize)
+    forma = (capacidad,) + forma_solucion
+    limites = np.linspace(0, n, min(self.num_procesos, n) + 1).astype(int)
+    limites += desfase
+    limites = limites.tolist()
+    tareas = [(bloque.name, forma, tipo.str, inicio, fin, penalizaciones)
+              for inicio, fin in zip(limites[:-1], limites[1:])]
+    partes = self.pool.starmap(_evalua_rebanada, tareas)
+
+    if penalizaciones:
+      return (np.concatenate([e for e, _ in partes]),
+              np.concatenate([p for _, p in partes]))
+    return np.concatenate(partes)
+
+  def libera_memoria(self) -> None:
+    """ Libera el bloque de memoria compartida si existe """
+    if self.memoria is not None:
+      self.memoria.close()
+      self.memoria.unlink()
+      self.memoria = None
+      self.capacidad = 0
+
+  def cierra(self) -> None:
+    """ Termina los procesos trabajadores y libera la memoria compartida
+
+    Los bloques de ARREGLO_COMPARTIDO sólo se borran del sistema, sus arreglos
+    (la población de un AlgoritmoGenetico) se pueden seguir leyendo mientras
+    exista el objeto. Cerrarlos aquí invalidaría esos arreglos.
+    """
+    self.pool.close()
+    self.pool.join()
+    self.libera_memoria()
+    for bloque in self.bloques:
+      try:
+        bloque.unlink()
+      except FileNotFoundError:
+        # Ya se borró en una llamada anterior
+        pass
+
+  def __enter__(self) -> "EvaluacionParalela":
+    return self
+
+  def __exit__(self, *args) -> None:
+    self.cierra()
@@ -1,9 +1,13 @@
 import numpy as np
 from temporada import TemporadaNFL
-from evaluacion.reglas.regla import Regla
+from evaluacion.reglas.regla import Regla, excesos_racha
 
 class NoTresJuegosFuera(Regla):
   """ Penaliza equipos con tres juegos como visitante consecutivos """
+
+  eje = "equipos"
+  costo = 4
+
   def __init__(self, ejemplar: TemporadaNFL) -> None:
     super().__init__(ejemplar, False)
 
@@ -24,15 +28,33 @@ class NoTresJuegosFuera(Regla):
         else:
           cont_equipo += 1
     return penalizacion
+
+  def contribuciones(self, soluciones: np.ndarray,
+      indices: "slice | np.ndarray" = slice(None)) -> np.ndarray:
+    partidos = soluciones[...,indices,:,:][...,0]
+    visita = (partidos != self.ejemplar.bye) & \
+      (self.ejemplar.locales[partidos] != self.equipos[indices,None])
+    return excesos_racha(visita, 3)
     
 class CalificacionHorarios(Regla):
   """ Evalua la calificación de partidos en  horarios estelares """
+
+  eje = "equipos"
+  costo = 3
+
   def __init__(self, ejemplar: TemporadaNFL) -> None:
     super().__init__(ejemplar, False)
   
   @property
   def max_val(self) -> int:
-    return self.ejemplar.max_calif_partido * (16 * 3 + 12)
+    return self.ejemplar.max_calif_partido * self.ejemplar.max_estelares
+
+  @property
+  def min_eval(self) -> int:
+    # Cada partido cuenta una vez por cada equipo, con todos los partidos en
+    # horario estelar la suma es el doble de todas las calificaciones (si
+    # cada fila tiene los partidos del equipo, como en el algoritmo)
+    return self.max_val - 2 * int(self.ejemplar.calificaciones.sum())
     
   def evalua(self, solucion: np.ndarray) -> int:
     return self.max_val - sum(
@@ -43,8 +65,22 @@ class CalificacionHorarios(Regla):
         partido != self.ejemplar.bye
     )
 
+  def contribuciones(self, soluciones: np.ndarray,
+      indices: "slice | np.ndarray" = slice(None)) -> np.ndarray:
+    filas = soluciones[...,indices,:,:]
+    estelares = filas[...,1] != self.ejemplar.horarios["NONE"]
+    # El BYE no suma calificación
+    calificaciones = self.ejemplar.calificaciones[filas[...,0]]
+    return (calificaciones * estelares).sum(axis=-1)
+
+  def total(self, contribuciones: np.ndarray) -> np.ndarray:
+    return self.max_val - contribuciones.sum(axis=-1)
+
 class TodosHorarioEstelar(Regla):
   """ Penaliza por equipos sin horario estelar """
+
+  eje = "equipos"
+
   def __init__(self, ejemplar: TemporadaNFL) -> None:
     super().__init__(ejemplar, False)
 
@@ -55,27 +91,56 @@ class TodosHorarioEstelar(Regla):
   def evalua(self, solucion: np.ndarray) -> int:
     return sum(1 for partidos in solucion
                if np.all(partidos[:,1] == self.ejemplar.horarios["NONE"]))
+
+  def contribuciones(self, soluciones: np.ndarray,
+      indices: "slice | np.ndarray" = slice(None)) -> np.ndarray:
+    horarios = soluciones[...,indices,:,:][...,1]
+    return np.all(
+      horarios == self.ejemplar.horarios["NONE"], axis=-1).astype(int)
     
 class NoByesTempranosConsecutivos(Regla):
   """ Penaliza por equipos con dos byes  tempranos seguidos """
+
+  eje = "equipos"
+
   def __init__(self, ejemplar: TemporadaNFL) -> None:
     super().__init__(ejemplar, False)
+    self.bye_anterior_temprano = \
+      self.ejemplar.byes_anteriores < self.ejemplar.mitad_temporada
 
   @property
   def max_val(self) -> int:
     return self.ejemplar.num_equipos
     
   def evalua(self, solucion: np.ndarray) -> int:
+    mitad = self.ejemplar.mitad_temporada
     return sum(
       1 for equipo, partidos in enumerate(solucion)
       if np.any(partidos[:,:9] == self.ejemplar.bye)
-      and self.ejemplar.equipos[equipo]["bye_anterior"] < 9
+      and self.ejemplar.equipos[equipo]["bye_anterior"] < mitad
     )
+
+  def contribuciones(self, soluciones: np.ndarray,
+      indices: "slice | np.ndarray" = slice(None)) -> np.ndarray:
+    # Mismo corte que en EVALUA, aplicado a cada fila de la solución
+    con_bye = np.any(
+      soluciones[...,indices,:,:9] == self.ejemplar.bye, axis=(-2,-1))
+    return (con_bye & self.bye_anterior_temprano[indices]).astype(int)
       
 class JuegosDivisionalesAlFinal(Regla):
-  """ Penaliza por juegos divisionales al inicio de temporada """
+  """ Penaliza por juegos divisionales al inicio de temporada
+
+  Cada partido divisional de la primera mitad de la temporada cuenta una vez
+  por semana.
+  """
+
+  eje = "semanas"
+  costo = 3
+
   def __init__(self, ejemplar: TemporadaNFL) -> None:
     super().__init__(ejemplar, False)
+    self.semanas_revisadas = np.arange(self.ejemplar.num_semanas) < \
+      self.ejemplar.mitad_temporada
 
   @property
   def max_val(self) -> int:
@@ -83,7 +148,7 @@ class JuegosDivisionalesAlFinal(Regla):
     
   def evalua(self, solucion: np.ndarray) -> int:
     penalizacion = 0
-    for semana in range(9):
+    for semana in range(self.ejemplar.mitad_temporada):
       partidos = set(solucion[:,semana,0])
       partidos.discard(self.ejemplar.bye)
       for partido in partidos:
@@ -91,15 +156,36 @@ class JuegosDivisionalesAlFinal(Regla):
           self.ejemplar.partidos[partido]["local"]]["division"]
         dv = self.ejemplar.equipos[self.ejemplar.partidos[
           partido]["visitante"]]["division"]
-      if dl == dv: penalizacion += 1
+        if dl == dv: penalizacion += 1
     return penalizacion
 
+  def contribuciones(self, soluciones: np.ndarray,
+      indices: "slice | np.ndarray" = slice(None)) -> np.ndarray:
+    # Cada partido cuenta una vez por semana, como con el conjunto en EVALUA:
+    # con los partidos de la semana ordenados sólo cuenta el primero de cada
+    # grupo de iguales
+    ordenados = np.sort(soluciones[...,indices,0], axis=-2)
+    primeros = np.ones(ordenados.shape, dtype=bool)
+    primeros[...,1:,:] = ordenados[...,1:,:] != ordenados[...,:-1,:]
+    divisionales = np.count_nonzero(
+      primeros & self.ejemplar.divisionales[ordenados], axis=-2)
+    return divisionales * self.semanas_revisadas[indices]
+
 class NoMasDeDosHusosParaTNF(Regla):
   """ Penaliza por equipos que tienen que viajar mas de dos husos horarios para
   un partido de TNF """
+
+  eje = "equipos"
+  costo = 4
+
   def __init__(self, ejemplar: TemporadaNFL) -> None:
     super().__init__(ejemplar, False)
-    self.orden_huso = ("PST", "MST", "CST", "EST")
+    self.orden_huso = self.ejemplar.orden_husos
+    # Índice del huso horario del estadio de cada partido
+    self.husos = self.ejemplar.husos_estadios[self.ejemplar.estadios_partidos]
+    self.semanas_revisadas = np.array([
+      semana != 0 and semana not in self.ejemplar.semanas_sin_horario
+      for semana in range(self.ejemplar.num_semanas)])
 
   @property
   def max_val(self) -> int:
@@ -125,3 +211,13 @@ class NoMasDeDosHusosParaTNF(Regla):
           penalizacion +=1
     return penalizacion
 
+  def contribuciones(self, soluciones: np.ndarray,
+      indices: "slice | np.ndarray" = slice(None)) -> np.ndarray:
+    filas = soluciones[...,indices,:,:]
+    partidos = filas[...,1:,0]
+    tnf = (filas[...,1:,1] == self.ejemplar.horarios["TNF"]) & \
+      (partidos != self.ejemplar.bye) & self.semanas_revisadas[1:]
+    # Igual que en EVALUA, el partido anterior se lee de la columna de horarios
+    dif_huso = np.abs(self.husos[partidos] - self.husos[filas[...,:-1,1]])
+    return np.count_nonzero(tnf & (dif_huso > 2), axis=-1)
+
@@ -1,9 +1,13 @@
 import numpy as np
 from temporada import TemporadaNFL
-from evaluacion.reglas.regla import Regla
+from evaluacion.reglas.regla import Regla, excesos_racha
 
 class HorarioFactible(Regla):
   """ Verifica que el horarios sea factible/válido """
+
+  eje = "semanas"
+  costo = 15
+
   def __init__(self, ejemplar: TemporadaNFL) -> None:
     super().__init__(ejemplar, True)
     self.factor = 100
@@ -25,10 +29,41 @@ class HorarioFactible(Regla):
           partidos_mal.add(partido)
     return self.factor * len(partidos_mal)
 
+  def contribuciones(self, soluciones: np.ndarray,
+      indices: "slice | np.ndarray" = slice(None)) -> np.ndarray:
+    partidos = soluciones[...,indices,0]
+    # Para el BYE se revisa el último equipo, sus casillas se descartan
+    correctos = (np.take_along_axis(
+      partidos, self.ejemplar.locales[partidos], axis=-2) == partidos) & \
+      (np.take_along_axis(
+        partidos, self.ejemplar.visitantes[partidos], axis=-2) == partidos)
+    mal = (partidos != self.ejemplar.bye) & ~correctos
+    # Partidos mal de cada semana, de la forma (..., semanas, partidos)
+    partidos_mal = np.zeros(
+      partidos.shape[:-2] + (partidos.shape[-1], self.ejemplar.bye + 1),
+      dtype=bool)
+    pos = np.nonzero(mal)
+    partidos_mal[pos[:-2] + (pos[-1], partidos[mal])] = True
+    return partidos_mal
+
+  def total(self, contribuciones: np.ndarray) -> np.ndarray:
+    # Cada partido mal se cuenta una vez aunque falle en varias semanas
+    return self.factor * np.count_nonzero(
+      np.any(contribuciones, axis=-2), axis=-1)
+
 class PartidosTDAY(Regla):
-  """ Revisa que DET y DAL juegen en acción de gracias """
+  """ Revisa que DET y DAL juegen en acción de gracias
+
+  Si el ejemplar no tiene alguno de los dos equipos su parte no se evalúa.
+  """
+
+  eje = "equipos"
+
   def __init__(self, ejemplar: TemporadaNFL) -> None:
     super().__init__(ejemplar, True)
+    # -1 si el equipo no está en el ejemplar
+    self.det = -1
+    self.dal = -1
     for ind, equipo in enumerate(self.ejemplar.equipos):
       if equipo["acronimo"] == "DET":
         self.det = ind
@@ -41,11 +76,22 @@ class PartidosTDAY(Regla):
 
   def evalua(self, solucion: np.ndarray) -> int:
     tday = self.ejemplar.thanksgiving
-    return sum(1 if h == self.ejemplar.horarios["TDAY"] else 0
-               for h in (solucion[self.dal,tday,1], solucion[self.det,tday,0]))
+    return sum(1 if solucion[e,tday,i] == self.ejemplar.horarios["TDAY"] else 0
+               for e, i in ((self.dal, 1), (self.det, 0)) if e >= 0)
+
+  def contribuciones(self, soluciones: np.ndarray,
+      indices: "slice | np.ndarray" = slice(None)) -> np.ndarray:
+    equipos = self.equipos[indices]
+    tday = soluciones[...,indices,self.ejemplar.thanksgiving,:] == \
+      self.ejemplar.horarios["TDAY"]
+    return ((equipos == self.dal) & tday[...,1]).astype(int) + \
+      ((equipos == self.det) & tday[...,0])
 
 class NoMasDeSeisEstelares(Regla):
   """ Penaliza por equipos con más de 6 horarios estelares """
+
+  eje = "equipos"
+
   def __init__(self, ejemplar: TemporadaNFL) -> None:
     super().__init__(ejemplar, True)
 
@@ -56,8 +102,19 @@ class NoMasDeSeisEstelares(Regla):
   def evalua(self, solucion: np.ndarray) -> int:
     return sum(1 for partidos in solucion if sum(partidos[:,1] != self.ejemplar.horarios["NONE"]) > 6)
 
+  def contribuciones(self, soluciones: np.ndarray,
+      indices: "slice | np.ndarray" = slice(None)) -> np.ndarray:
+    horarios = soluciones[...,indices,:,:][...,1]
+    estelares = np.count_nonzero(
+      horarios != self.ejemplar.horarios["NONE"], axis=-1)
+    return (estelares > 6).astype(int)
+
 class NoCuatroJuegosFuera(Regla):
   """ Penaliza equipos con cuatro o más juegos como visitante consecutivos """
+
+  eje = "equipos"
+  costo = 4
+
   def __init__(self, ejemplar: TemporadaNFL) -> None:
     super().__init__(ejemplar, True)
 
@@ -78,26 +135,49 @@ class NoCuatroJuegosFuera(Regla):
         else:
           cont_equipo += 1
     return penalizacion
+
+  def contribuciones(self, soluciones: np.ndarray,
+      indices: "slice | np.ndarray" = slice(None)) -> np.ndarray:
+    partidos = soluciones[...,indices,:,:][...,0]
+    visita = (partidos != self.ejemplar.bye) & \
+      (self.ejemplar.locales[partidos] != self.equipos[indices,None])
+    return excesos_racha(visita, 4)
   
 class ByeEnSemanasValidas(Regla):
   """ Penaliza equipos con byes en semanas invalidas """
+
+  eje = "equipos"
+
   def __init__(self, ejemplar: TemporadaNFL) -> None:
     super().__init__(ejemplar, True)
+    semanas = np.arange(self.ejemplar.num_semanas)
+    inicio, fin = self.ejemplar.semanas_bye
+    self.semanas_invalidas = (semanas < inicio) | (semanas > fin)
 
   @property
   def max_val(self) -> int:
     return self.ejemplar.num_equipos
     
   def evalua(self, solucion: np.ndarray) -> int:
+    inicio, fin = self.ejemplar.semanas_bye
     penalizacion = 0
     for partidos in solucion:
       for semana, (partido, _) in enumerate(partidos):
-        if (semana < 4 or semana > 13) and partido == self.ejemplar.bye:
+        if (semana < inicio or semana > fin) and partido == self.ejemplar.bye:
           penalizacion += 1
     return penalizacion
 
+  def contribuciones(self, soluciones: np.ndarray,
+      indices: "slice | np.ndarray" = slice(None)) -> np.ndarray:
+    partidos = soluciones[...,indices,:,:][...,0]
+    return np.count_nonzero(
+      (partidos == self.ejemplar.bye) & self.semanas_invalidas, axis=-1)
+
 class NoMasDeSeisByes(Regla):
   """ Penaliza semana con más de seis byes """
+
+  eje = "semanas"
+
   def __init__(self, ejemplar: TemporadaNFL) -> None:
     super().__init__(ejemplar, True)
 
@@ -113,14 +193,24 @@ class NoMasDeSeisByes(Regla):
         penalizacion += 1
     return penalizacion
 
+  def contribuciones(self, soluciones: np.ndarray,
+      indices: "slice | np.ndarray" = slice(None)) -> np.ndarray:
+    byes = np.count_nonzero(
+      soluciones[...,indices,0] == self.ejemplar.bye, axis=-2)
+    return (byes > 6).astype(int)
+
 class NoEstelaresEnBye(Regla):
   """ Penaliza equipos con byes en semanas invalidas """
+
+  eje = "equipos"
+  costo = 2
+
   def __init__(self, ejemplar: TemporadaNFL) -> None:
     super().__init__(ejemplar, True)
 
   @property
   def max_val(self) -> int:
-    return 16 * 3 + 12
+    return self.ejemplar.max_estelares
 
   def evalua(self, solucion: np.ndarray) -> int:
     penalizacion = 0
@@ -130,3 +220,9 @@ class NoEstelaresEnBye(Regla):
           penalizacion += 1
     return penalizacion
 
+  def contribuciones(self, soluciones: np.ndarray,
+      indices: "slice | np.ndarray" = slice(None)) -> np.ndarray:
+    filas = soluciones[...,indices,:,:]
+    return np.count_nonzero((filas[...,0] == self.ejemplar.bye) & \
+      (filas[...,1] != self.ejemplar.horarios["NONE"]), axis=-1)
+
@@ -4,6 +4,15 @@ from abc import ABC, abstractmethod, abstractproperty
 
 class Regla(ABC):
   """ Define la estructura de una regla para evaluar calendarios """
+
+  # Eje sobre el que se descompone la evaluación de la regla, puede ser
+  # "equipos", "semanas" o None si la regla no se descompone
+  eje = None
+  # Costo relativo de evaluar la regla en lote con la versión vectorizada
+  # (1 son unos 0.5 ms con 256 soluciones de la temporada 2023), ordena las
+  # reglas de la evaluación acotada
+  costo = 1
+
   def __init__(self, ejemplar: TemporadaNFL, es_dura: bool) -> None:
     """
     Parámetros
@@ -16,6 +25,8 @@ class Regla(ABC):
     self.ejemplar = ejemplar
     self.es_dura = es_dura
     self.penalizacion = 100
+    self.vectorizada = False
+    self.equipos = np.arange(ejemplar.num_equipos)
 
   @property
   def max_eval(self) -> int:
@@ -44,6 +55,20 @@ class Regla(ABC):
     """
     raise NotImplementedError
 
+  @property
+  def min_eval(self) -> int:
+    """ Devuelve la mínima evaluación (ya penalizada) que la regla puede dar
+
+    Por defecto es 0, las reglas que pueden dar evaluaciones negativas la
+    sobreescriben con una cota inferior. La evaluación acotada la usa para
+    que su cota siga siendo superior antes de aplicar la regla.
+
+    Devuelve
+    --------
+    int : Valor mínimo de la regla
+    """
+    return 0
+
   def __call__(self, solucion: np.ndarray) -> int:
     """ Evalua la solucion y aplica la penalización necesario a reglas duras
 
@@ -56,7 +81,24 @@ class Regla(ABC):
     --------
     int : Evaluación
     """
-    e = self.evalua(solucion)
+    if self.vectorizada:
+      e = self.evalua_vectorizada(solucion)
+    else:
+      e = self.evalua(solucion)
+    return self.penaliza(e)
+
+  def penaliza(self, e: int) -> int:
+    """ Aplica la penalización a una evaluación si la regla es dura
+
+    Parámetros
+    ----------
+    e : int or np.ndarray
+      Evaluación obtenida con la regla
+
+    Devuelve
+    --------
+    int or np.ndarray : Evaluación penalizada
+    """
     return e * self.penalizacion if self.es_dura else e
 
   @abstractmethod
@@ -74,8 +116,177 @@ class Regla(ABC):
     """
     raise NotImplementedError
 
+  def evalua_vectorizada(self, solucion: np.ndarray) -> int:
+    """ Evalua la solucion con operaciones sobre arreglos completos
+
+    Debe devolver exactamente lo mismo que EVALUA.
+
+    Parámetros
+    ----------
+    solucion : np.ndarray
+      Solución a evaluar
+
+    Devuelve
+    --------
+    int : Evaluación
+    """
+    return int(self.evalua_lote(solucion))
+
+  def evalua_lote(self, soluciones: np.ndarray) -> np.ndarray:
+    """ Evalua un lote de soluciones con operaciones sobre arreglos completos
+
+    Las soluciones pueden tener cualquier número de ejes al inicio, el arreglo
+    es de la forma (..., equipos, semanas, 2).
+
+    Parámetros
+    ----------
+    soluciones : np.ndarray
+      Soluciones a evaluar
+
+    Devuelve
+    --------
+    np.ndarray : Evaluación de cada solución, de la forma (...)
+    """
+    return self.total(self.contribuciones(soluciones))
+
+  def contribuciones(self, soluciones: np.ndarray,
+      indices: "slice | np.ndarray" = slice(None)) -> np.ndarray:
+    """ Calcula la contribución de cada equipo o semana a la evaluación
+
+    La evaluación de la regla es TOTAL aplicado a las contribuciones de todos
+    los equipos o semanas (según EJE). La contribución de un equipo sólo
+    depende de su fila en la solución y la de una semana de su columna, así
+    después de un cambio sólo se recalculan las filas o columnas tocadas.
+
+    Por defecto la regla no se descompone, hay una sola contribución que es la
+    evaluación con EVALUA. Las reglas lo sobreescriben con su versión
+    vectorizada.
+
+    Parámetros
+    ----------
+    soluciones : np.ndarray
+      Soluciones de la forma (..., equipos, semanas, 2)
+    indices : slice or np.ndarray
+      Equipos o semanas de los que se calcula la contribución, por defecto
+      todos
+
+    Devuelve
+    --------
+    np.ndarray : Contribuciones de la forma (..., len(indices)), las reglas
+      pueden agregar ejes al final si lo necesitan
+    """
+    return self.evalua_cada(soluciones)[..., None]
+
+  def total(self, contribuciones: np.ndarray) -> np.ndarray:
+    """ Combina las contribuciones en la evaluación de la regla
+
+    Por defecto es la suma de las contribuciones.
+
+    Parámetros
+    ----------
+    contribuciones : np.ndarray
+      Contribuciones de todos los equipos o semanas de cada solución
+
+    Devuelve
+    --------
+    np.ndarray : Evaluación de cada solución
+    """
+    return contribuciones.sum(axis=-1)
+
+  def actualiza(self, solucion: np.ndarray, contribuciones: np.ndarray,
+      equipos: np.ndarray, semanas: np.ndarray) -> np.ndarray:
+    """ Recalcula las contribuciones de una solución que cambió
+
+    Sólo se recalculan los equipos o semanas tocados, el resto se copia de las
+    contribuciones anteriores. Si la regla no se descompone se recalcula todo.
+
+    Parámetros
+    ----------
+    solucion : np.ndarray
+      Solución ya modificada
+    contribuciones : np.ndarray
+      Contribuciones de la solución antes de los cambios, no se modifican
+    equipos : np.ndarray
+      Equipos con alguna casilla modificada
+    semanas : np.ndarray
+      Semanas con alguna casilla modificada
+
+    Devuelve
+    --------
+    np.ndarray : Contribuciones de la solución modificada
+    """
+    if self.eje is None:
+      return self.contribuciones(solucion)
+    indices = equipos if self.eje == "equipos" else semanas
+    nuevas = contribuciones.copy()
+    if len(indices):
+      nuevas[indices] = self.contribuciones(solucion, indices)
+    return nuevas
+
+  def evalua_cada(self, soluciones: np.ndarray) -> np.ndarray:
+    """ Evalua un lote de soluciones llamando a EVALUA con cada una
+
+    Parámetros
+    ----------
+    soluciones : np.ndarray
+      Soluciones a evaluar de la forma (..., equipos, semanas, 2)
+
+    Devuelve
+    --------
+    np.ndarray : Evaluación de cada solución, de la forma (...)
+    """
+    lote = soluciones.reshape((-1,) + soluciones.shape[-3:])
+    return np.array([self.evalua(s) for s in lote]).reshape(
+      soluciones.shape[:-3])
+
+  def lote(self, soluciones: np.ndarray) -> np.ndarray:
+    """ Evalua un lote de soluciones y aplica la penalización a reglas duras
+
+    Es la versión de __call__ para lotes.
+
+    Parámetros
+    ----------
+    soluciones : np.ndarray
+      Soluciones a evaluar de la forma (..., equipos, semanas, 2)
+
+    Devuelve
+    --------
+    np.ndarray : Evaluación de cada solución, de la forma (...)
+    """
+    if self.vectorizada:
+      e = self.evalua_lote(soluciones)
+    else:
+      e = self.evalua_cada(soluciones)
+    return self.penaliza(e)
+
   @property
   def nombre(self) -> str:
     """ Devuelve el nombre de la regla (el de su clase) """
     return self.__class__.__name__
 
+
+def excesos_racha(racha: np.ndarray, limite: int) -> np.ndarray:
+  """ Cuenta los excesos de las rachas de valores True sobre el último eje
+
+  Una racha de longitud L >= LIMITE aporta L - LIMITE + 1 (el número de
+  ventanas de LIMITE valores seguidos que contiene). Igual que en los ciclos de
+  las reglas, las rachas que llegan hasta el final del eje no se cuentan.
+
+  Parámetros
+  ----------
+  racha : np.ndarray
+    Arreglo booleano, las rachas se buscan sobre el último eje
+  limite : int
+    Longitud mínima de una racha para ser penalizada
+
+  Devuelve
+  --------
+  np.ndarray : Suma de los excesos de las rachas de cada fila, tiene la forma
+    de RACHA sin el último eje
+  """
+  ventanas = racha[..., limite-1:].copy()
+  for i in range(1, limite):
+    ventanas &= racha[..., limite-1-i:-i]
+  # Rachas que no se cierran antes del final
+  abiertas = np.logical_and.accumulate(racha[..., ::-1], axis=-1)[..., ::-1]
+  return np.count_nonzero(ventanas & ~abiertas[..., limite-1:], axis=-1)
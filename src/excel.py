@@ -0,0 +1,351 @@
+""" Exporta soluciones a hojas de cálculo de Excel (.xlsx)
+
+Los libros se escriben en el modo de sólo escritura de openpyxl: cada renglón
+se escribe en cuanto se agrega, así la memoria no crece con el número de
+soluciones. Los estilos se registran una vez por libro y las celdas se
+reutilizan entre renglones y hojas.
+"""
+
+import re
+import multiprocessing as mp
+import numpy as np
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
+from openpyxl.styles import PatternFill, NamedStyle, Font, Alignment, Side, Border
+from temporada import TemporadaNFL
+
+# Excel limita los títulos de las hojas a 31 caracteres y sin []:*?/\
+MAX_TITULO = 31
+CARACTERES_INVALIDOS = re.compile(r"[\[\]:*?/\\]")
+
+# Ejemplar de cada proceso trabajador de EXPORTA_ARCHIVOS
+_temporada = None
+
+#
+# ESTILOS
+#
+
+font_black = Font(name="Arial", size=10, bold=True, color="000000")
+font_white = Font(name="Arial", size=10, bold=True, color="FFFFFF")
+alignment = Alignment(horizontal="center", vertical="center")
+bd = Side(style="thin", color="000000")
+border = Border(left=bd, top=bd, right=bd, bottom=bd)
+
+MNF = NamedStyle(name="MNF")
+MNF.font = font_black
+MNF.border = border
+MNF.alignment = alignment
+MNF.fill = PatternFill(fill_type="solid", fgColor="92A8E4")
+
+SNF = NamedStyle(name="SNF")
+SNF.font = font_black
+SNF.border = border
+SNF.alignment = alignment
+SNF.fill = PatternFill(fill_type="solid", fgColor="FFC7CD")
+
+TNF = NamedStyle(name="TNF")
+TNF.font = font_black
+TNF.border = border
+TNF.alignment = alignment
+TNF.fill = PatternFill(fill_type="solid", fgColor="FCFC98")
+
+TDAY = NamedStyle(name="TDAY")
+TDAY.font = font_black
+TDAY.border = border
+TDAY.alignment = alignment
+TDAY.fill = PatternFill(fill_type="solid", fgColor="F9AC86")
+
+XMAS = NamedStyle(name="XMAS")
+XMAS.font = font_black
+XMAS.border = border
+XMAS.alignment = alignment
+XMAS.fill = PatternFill(fill_type="solid", fgColor="A9C892")
+
+WEEK = NamedStyle(name="WEEK")
+WEEK.font = font_white
+WEEK.border = border
+WEEK.alignment = alignment
+WEEK.fill = PatternFill(fill_type="solid", fgColor="1D840F")
+
+NONE = NamedStyle(name="NONE")
+NONE.font = font_black
+NONE.border = border
+NONE.alignment = alignment
+
+BYE = NamedStyle(name="BYE")
+BYE.font = font_white
+BYE.border = border
+BYE.alignment = alignment
+BYE.fill = PatternFill(fill_type="solid", fgColor="7F807E")
+
+colores_equipos = [
+  ("F71C06", "FFFFFF"),
+  ("020202", "FFFFFF"),
+  ("D69CFF", "000000"),
+  ("0100FB", "FF0000"),
+  ("00CEFC", "FFFFFF"),
+  ("0A3400", "FF0000"),
+  ("F96B00", "000000"),
+  ("8A3A15", "FFFFFF"),
+  ("C0C0C0", "0000F0"),
+  ("070276", "D5863D"),
+  ("0000BA", "EEEEEE"),
+  ("147B05", "EEEEEE"),
+  ("060175", "FFFFFF"),
+  ("0202FA", "FFFFFF"),
+  ("00070B", "75DAFF"),
+  ("EB1C00", "FAFA00"),
+  ("03017E", "FAFA00"),
+  ("0304E8", "FAFA00"),
+  ("030305", "A7A7A7"),
+  ("088277", "D6773E"),
+  ("7F027A", "FAFA00"),
+  ("65659B", "C5C8FF"),
+  ("F8C919", "2E1600"),
+  ("0000B5", "FFFFFF"),
+  ("3F9666", "FFFFFF"),
+  ("1D7D7F", "FFFFFF"),
+  ("000000", "FAFA00"),
+  ("0002FE", "FFFFFF"),
+  ("FD0500", "FAFA00"),
+  ("F6CE1C", "FF0000"),
+  ("97CDF8", "FFFFFF"),
+  ("973500", "FAFA00")
+]
+
+# Significado de los colores: texto, color (si no tiene estilo), columnas
+# que ocupa y estilo
+datos_colores = [
+  ("SATURDAY", "F4AE82", 2, None),
+  ("SUNDAY", "FFFFFF", 2, None),
+  ("SNF/NBC", None, 2, SNF),
+  ("MNF/ESPN/ABC", None, 2, MNF),
+  ("TNF", None, 1, TNF),
+  ("NFLN", "9AFD9B", 1, None),
+  ("THANKSGIVING", None, 2, TDAY),
+  ("BLACK FRIDAY", "000000", 2, None),
+  ("CHRISTMAS DAY", None, 2, XMAS),
+  ("INTERNATIONAL", "C366FA", 2, None)
+]
+
+class LibroExcel:
+  """ Libro de Excel al que se agregan soluciones de un ejemplar como hojas
+
+  El encabezado, la columna de equipos y la leyenda son iguales en todas las
+  hojas, se construyen una sola vez. Las celdas de los partidos se guardan por
+  texto y horario: openpyxl asigna el renglón y la columna al escribir cada
+  renglón, así la misma celda sirve en cualquier posición.
+  """
+
+  __slots__ = ("temporada", "libro", "orden", "estilo_horarios", "encabezado",
+               "equipos", "leyenda", "combinadas", "celdas", "hoja")
+
+  def __init__(self, temporada: TemporadaNFL) -> None:
+    """
+    Parámetros
+    ----------
+    temporada : TemporadaNFL
+      Ejemplar de las soluciones
+    """
+    self.temporada = temporada
+    self.libro = Workbook(write_only=True)
+    for estilo in (MNF, SNF, TNF, TDAY, XMAS, WEEK, NONE, BYE):
+      self.libro.add_named_style(estilo)
+    self.estilo_horarios = {temporada.horarios[v.name] : v.name
+                            for v in (MNF, SNF, TNF, TDAY, XMAS, NONE)}
+    self.orden = sorted(range(temporada.num_equipos),
+                        key=lambda v: temporada.equipos[v]["acronimo"])
+    self.celdas = {}
+    # Las celdas necesitan una hoja del libro, se crean con la primera
+    self.hoja = None
+
+    # Celdas combinadas de la leyenda, en el renglón después de los equipos
+    fila, col = temporada.num_equipos + 2, 2
+    self.combinadas = []
+    for _, _, num_cols, _ in datos_colores:
+      if num_cols > 1:
+        self.combinadas.append(f"{get_column_letter(col)}{fila}:"
+                               f"{get_column_letter(col+num_cols-1)}{fila}")
+      col += num_cols
+
+  def prepara_celdas(self) -> None:
+    """ Construye las celdas que se repiten en todas las hojas """
+    temporada = self.temporada
+
+    #
+    # ESTILO GENERAL SEMANAS
+    #
+
+    self.encabezado = [self.celda(None, WEEK.name)] + [
+      self.celda(f"WK {semana}", WEEK.name)
+      for semana in range(1, temporada.num_semanas+1)]
+
+    #
+    # ESTILO EQUIPOS
+    #
+
+    self.equipos = []
+    for fila, ind in enumerate(self.orden):
+      fondo, letra = colores_equipos[fila % len(colores_equipos)]
+      cell = WriteOnlyCell(self.hoja, temporada.equipos[ind]["acronimo"])
+      cell.font = Font(name="Arial", size=10, bold=True, color=letra)
+      cell.fill = PatternFill(fill_type="solid", fgColor=fondo)
+      cell.alignment = alignment
+      cell.border = border
+      self.equipos.append(cell)
+
+    #
+    # SIGNIFICADO DE COLORES
+    #
+
+    cell = WriteOnlyCell(self.hoja)
+    cell.fill = PatternFill(fill_type="solid", fgColor="AFAAA9")
+    cell.border = border
+    self.leyenda = [cell]
+    for valor, color, num_cols, stilo in datos_colores:
+      for col in range(num_cols):
+        cell = WriteOnlyCell(self.hoja, valor if col == 0 else None)
+        if stilo is not None:
+          cell.style = stilo.name
+        else:
+          cell.fill = PatternFill(fill_type="solid", fgColor=color)
+          cell.font = font_white if color == "000000" else font_black
+          cell.alignment = alignment
+          cell.border = border
+        self.leyenda.append(cell)
+
+  def celda(self, valor: str, estilo: str) -> WriteOnlyCell:
+    """ Devuelve la celda con el texto y el estilo dados, creándola una vez """
+    llave = (valor, estilo)
+    cell = self.celdas.get(llave)
+    if cell is None:
+      cell = WriteOnlyCell(self.hoja, valor)
+      cell.style = estilo
+      self.celdas[llave] = cell
+    return cell
+
+  def agrega(self, solucion: np.ndarray, titulo: str = None) -> None:
+    """ Agrega una solución como una hoja nueva
+
+    Parámetros
+    ----------
+    solucion : np.ndarray
+      Solución a agregar
+    titulo : str
+      Título de la hoja, se quitan los caracteres que Excel no permite y se
+      recorta a MAX_TITULO. Si se repite openpyxl le agrega un número
+    """
+    temporada = self.temporada
+    ws = self.libro.create_sheet(None if titulo is None else titulo_hoja(titulo))
+    if self.hoja is None:
+      self.hoja = ws
+      self.prepara_celdas()
+
+    ws.append(self.encabezado)
+
+    #
+    # PARTIDOS
+    #
+
+    solucion = np.asarray(solucion)
+    for fila, ind in enumerate(self.orden):
+      renglon = [self.equipos[fila]]
+      partidos = solucion[ind,:,0]
+      contras = temporada.contrarios[ind, partidos].tolist()
+      visita = (temporada.visitantes[partidos] == ind).tolist()
+      for partido, horario, contra, extra in zip(
+          partidos.tolist(), solucion[ind,:,1].tolist(), contras, visita):
+        if partido == temporada.bye:
+          renglon.append(self.celda("BYE", BYE.name))
+        else:
+          renglon.append(self.celda(
+            ("at " if extra else "") + temporada.equipos[contra]["acronimo"],
+            self.estilo_horarios[horario]))
+      ws.append(renglon)
+
+    for rango in self.combinadas:
+      ws.merged_cells.add(rango)
+    ws.append(self.leyenda)
+
+  def guarda(self, archivo: str) -> None:
+    """ Escribe el libro en ARCHIVO (.xlsx), después ya no se puede modificar """
+    self.libro.save(archivo)
+
+def titulo_hoja(nombre: str) -> str:
+  """ Quita de NOMBRE los caracteres que Excel no permite en un título """
+  return CARACTERES_INVALIDOS.sub("_", nombre)[:MAX_TITULO]
+
+def exporta(temporada: TemporadaNFL, solucion: np.ndarray,
+    archivo: str) -> None:
+  """ Guarda una solución como calendario en un archivo .xlsx
+
+  Parámetros
+  ----------
+  temporada : TemporadaNFL
+    Ejemplar de la solución
+  solucion : np.ndarray
+    Solución a exportar
+  archivo : str
+    Archivo .xlsx donde se guarda
+  """
+  libro = LibroExcel(temporada)
+  libro.agrega(solucion)
+  libro.guarda(archivo)
+
+def exporta_soluciones(temporada: TemporadaNFL, soluciones: np.ndarray,
+    archivo: str, nombres: list = None) -> None:
+  """ Guarda varias soluciones en un solo archivo .xlsx, una hoja por solución
+
+  Las soluciones se leen y se escriben de una en una, así SOLUCIONES puede ser
+  un lote mapeado a memoria.
+
+  Parámetros
+  ----------
+  temporada : TemporadaNFL
+    Ejemplar de las soluciones
+  soluciones : np.ndarray
+    Lote de soluciones de la forma (P, equipos, semanas, 2)
+  archivo : str
+    Archivo .xlsx donde se guardan
+  nombres : list of str
+    Títulos de las hojas, por defecto se numeran
+  """
+  libro = LibroExcel(temporada)
+  for i, solucion in enumerate(soluciones):
+    libro.agrega(solucion, str(i) if nombres is None else nombres[i])
+  libro.guarda(archivo)
+
+def _inicializa_trabajador(temporada: TemporadaNFL) -> None:
+  """ Guarda el ejemplar en el proceso trabajador """
+  global _temporada
+  _temporada = temporada
+
+def _exporta_tarea(tarea: tuple) -> None:
+  """ Exporta una solución del proceso trabajador, TAREA es (solucion, archivo) """
+  exporta(_temporada, *tarea)
+
+def exporta_archivos(temporada: TemporadaNFL, soluciones: np.ndarray,
+    archivos: list, procesos: int = 1) -> None:
+  """ Guarda cada solución en su propio archivo .xlsx
+
+  Parámetros
+  ----------
+  temporada : TemporadaNFL
+    Ejemplar de las soluciones
+  soluciones : np.ndarray
+    Lote de soluciones de la forma (P, equipos, semanas, 2)
+  archivos : list of str
+    Archivo .xlsx de cada solución
+  procesos : int
+    Procesos que escriben los archivos, por defecto 1 (sin procesos extra)
+  """
+  tareas = ((np.asarray(s), a) for s, a in zip(soluciones, archivos))
+  if procesos <= 1:
+    for tarea in tareas:
+      exporta(temporada, *tarea)
+    return
+  with mp.Pool(procesos, initializer=_inicializa_trabajador,
+               initargs=(temporada,)) as pool:
+    for _ in pool.imap_unordered(_exporta_tarea, tareas, chunksize=8):
+      pass
@@ -0,0 +1,248 @@
+""" Genera ejemplares sintéticos de temporadas de cualquier tamaño """
+
+import argparse
+import numpy as np
+from temporada import TemporadaNFL, nombres_horarios_semana
+
+SEMILLA = None
+HUSOS = ("PST", "MST", "CST", "EST")
+DIAS_NAVIDAD = ("S", "D", "L")
+# Distribución de las calificaciones de los partidos de temporada2023.txt
+CALIFICACIONES = np.array([84, 98, 64, 15, 11]) / 272
+
+def empareja(activos: np.ndarray, enfrentamientos: np.ndarray,
+    rng: np.random.Generator) -> list:
+  """ Empareja a los equipos de una semana
+
+  Cada equipo, en orden aleatorio, juega contra el equipo libre con el que se
+  ha enfrentado menos veces (los empates se deciden al azar).
+
+  Parámetros
+  ----------
+  activos : np.ndarray
+    Equipos que juegan la semana, debe ser un número par
+  enfrentamientos : np.ndarray
+    Matriz con las veces que se han enfrentado cada par de equipos, se
+    actualiza con los nuevos partidos
+  rng : np.random.Generator
+    Generador de aleatorios
+
+  Devuelve
+  --------
+  list of (int, int) : Pares de equipos
+  """
+  libres = list(rng.permutation(activos))
+  pares = []
+  while libres:
+    equipo = libres.pop()
+    veces = enfrentamientos[equipo, libres] + rng.random(len(libres))
+    contra = libres.pop(int(np.argmin(veces)))
+    enfrentamientos[equipo, contra] += 1
+    enfrentamientos[contra, equipo] += 1
+    pares.append((equipo, contra))
+  return pares
+
+def verifica_semanas(num_equipos: int, num_semanas: int,
+    semanas_validas: np.ndarray, horarios: tuple, thanksgiving: int,
+    navidad: tuple) -> None:
+  """ Verifica que cada semana tenga partidos para sus horarios estelares
+
+  Los pares que descansan se reparten como en GENERA_TEMPORADA, así que los
+  partidos de cada semana se conocen antes de generar el calendario.
+
+  Parámetros
+  ----------
+  num_equipos, num_semanas : int
+    Igual que en GENERA_TEMPORADA
+  semanas_validas : np.ndarray
+    Semanas en las que se permite el BYE indexadas desde 0
+  horarios : tuple of str
+    Horarios estelares de una semana normal
+  thanksgiving : int
+    Semana de acción de gracias indexada desde 1
+  navidad : tuple
+    Semana de navidad indexada desde 1 y día de navidad
+  """
+  num_parejas = num_equipos // 2
+  descansos = np.bincount(np.resize(semanas_validas, num_parejas),
+                          minlength=num_semanas)
+  for semana in range(num_semanas):
+    estelares = len(nombres_horarios_semana(
+      semana, horarios, (num_semanas-4, num_semanas-1), thanksgiving-1,
+      (navidad[0]-1, navidad[1])))
+    partidos = num_parejas - descansos[semana]
+    if partidos < estelares:
+      raise ValueError(
+        f"La semana {semana+1} tendría {partidos} partidos para {estelares} "
+        f"horarios estelares, con {num_equipos} equipos y "
+        f"{len(semanas_validas)} semanas de BYE no alcanzan los partidos")
+
+def genera_temporada(num_equipos: int = 32, num_divisiones: int = 8,
+    num_semanas: int = 18, horarios: tuple = ("MNF", "TNF", "SNF"),
+    semilla: int = SEMILLA) -> tuple:
+  """ Genera un ejemplar sintético junto con una solución factible
+
+  Primero se construye un calendario: los equipos se agrupan en pares que
+  descansan juntos y los pares se reparten entre las semanas en las que se
+  permite el BYE. Cada semana se emparejan los equipos que no descansan y de
+  esos enfrentamientos salen los partidos del ejemplar, así siempre existe una
+  solución factible. Acción de gracias y navidad quedan en las mismas semanas
+  relativas que en 2023, y no hay equipos DET ni DAL.
+
+  Parámetros
+  ----------
+  num_equipos : int
+    Número de equipos, debe ser par
+  num_divisiones : int
+    Número de divisiones, debe dividir a NUM_EQUIPOS. Con un número par de
+    divisiones hay dos conferencias
+  num_semanas : int
+    Número de semanas, por lo menos 9. Cada semana debe tener por lo menos
+    tantos partidos como horarios estelares, con pocas semanas de BYE para
+    muchos equipos (o pocos equipos) se lanza ValueError
+  horarios : tuple of str
+    Horarios estelares de una semana normal
+  semilla : int
+    Semilla del generador de aleatorios
+
+  Devuelve
+  --------
+  TemporadaNFL : Ejemplar generado
+  np.ndarray : Solución factible del ejemplar
+  """
+  if num_equipos % 2 or num_equipos % num_divisiones:
+    raise ValueError("El número de equipos debe ser par y múltiplo del "
+                     "número de divisiones")
+  if num_semanas < 9:
+    raise ValueError("Se necesitan por lo menos 9 semanas")
+  if any(h not in ("MNF", "TNF", "SNF") for h in horarios):
+    raise ValueError(f"Horarios no válidos: {horarios}")
+  rng = np.random.default_rng(semilla)
+
+  # Indexadas desde 1, como en el archivo
+  semanas_bye = (5, num_semanas-4)
+  thanksgiving = round(num_semanas * 2 / 3)
+  navidad = (num_semanas-2, str(rng.choice(DIAS_NAVIDAD)))
+
+  ancho = len(str(num_equipos - 1))
+  conferencias = 2 if num_divisiones % 2 == 0 else 1
+  por_division = num_equipos // num_divisiones
+  equipos = tuple({
+    "acronimo" : f"T{e:0{ancho}}",
+    "conferencia" : f"C{e // (num_equipos // conferencias)}",
+    "division" : f"D{e // por_division}",
+    "bye_anterior" : int(rng.integers(semanas_bye[0], semanas_bye[1]+1)),
+    "3_consecutivos" : bool(rng.random() < 0.1),
+    "partidos" : []
+  } for e in range(num_equipos))
+  estadios = tuple({"huso" : str(rng.choice(HUSOS))}
+                   for _ in range(num_equipos))
+
+  # Pares de equipos que descansan juntos, repartidos en las semanas válidas
+  parejas = rng.permutation(num_equipos).reshape(-1, 2)
+  semanas_validas = np.arange(semanas_bye[0]-1, semanas_bye[1])
+  verifica_semanas(num_equipos, num_semanas, semanas_validas, horarios,
+                   thanksgiving, navidad)
+  semana_bye = np.empty(num_equipos, dtype=int)
+  semana_bye[parejas] = rng.permutation(
+    np.resize(semanas_validas, len(parejas)))[:,None]
+
+  bye = num_equipos * (num_semanas - 1) // 2
+  enfrentamientos = np.zeros((num_equipos, num_equipos), dtype=int)
+  locales = np.zeros(num_equipos, dtype=int)
+  partidos = []
+  calendario = np.full((num_equipos, num_semanas), bye)
+  for semana in range(num_semanas):
+    activos = np.flatnonzero(semana_bye != semana)
+    for e1, e2 in empareja(activos, enfrentamientos, rng):
+      # Es local el que lo ha sido menos veces
+      local, visitante = (e1, e2) if locales[e1] <= locales[e2] else (e2, e1)
+      locales[local] += 1
+      id_partido = len(partidos)
+      partidos.append({
+        "local" : int(local),
+        "visitante" : int(visitante),
+        "estadio" : int(local),
+        "calificacion" : int(rng.choice(len(CALIFICACIONES),
+                                        p=CALIFICACIONES))
+      })
+      equipos[local]["partidos"].append(id_partido)
+      equipos[visitante]["partidos"].append(id_partido)
+      calendario[[local, visitante], semana] = id_partido
+
+  temporada = TemporadaNFL(num_semanas, equipos, tuple(partidos), estadios,
+                           navidad, thanksgiving, semanas_bye=semanas_bye,
+                           horarios_base=horarios)
+
+  # Los horarios estelares se dan a los primeros partidos de cada semana
+  solucion = np.zeros((num_equipos, num_semanas, 2),
+                      dtype=temporada.tipo_solucion)
+  solucion[:,:,0] = calendario
+  for semana in range(num_semanas):
+    estelares = temporada.horarios_semana(semana)
+    ids = np.setdiff1d(calendario[:,semana], bye)
+    for partido, horario in zip(ids, estelares):
+      solucion[calendario[:,semana] == partido, semana, 1] = horario
+  return temporada, solucion
+
+def texto_temporada(temporada: TemporadaNFL) -> str:
+  """ Escribe un ejemplar en el formato que lee TemporadaNFL.leer_archivo
+
+  Parámetros
+  ----------
+  temporada : TemporadaNFL
+    Ejemplar a escribir
+
+  Devuelve
+  --------
+  str : Contenido del archivo
+  """
+  lineas = [
+    f"{i} {e['acronimo']} {e['conferencia']} {e['division']} "
+    f"{e['bye_anterior']} {int(e['3_consecutivos'])}"
+    for i, e in enumerate(temporada.equipos)]
+  lineas.append("")
+  lineas += [f"{i} {e['huso']}" for i, e in enumerate(temporada.estadios)]
+  lineas.append("")
+  lineas += [
+    f"{i} {p['local']} {p['visitante']} {p['estadio']} {p['calificacion']}"
+    for i, p in enumerate(temporada.partidos)]
+  lineas.append("")
+  # Las semanas se guardan indexadas desde 1
+  lineas.append(str(temporada.thanksgiving + 1))
+  lineas.append(f"{temporada.navidad[0] + 1} {temporada.navidad[1]}")
+  lineas.append(f"semanas {temporada.num_semanas}")
+  lineas.append("sin_horario " +
+                " ".join(str(s + 1) for s in temporada.semanas_sin_horario))
+  lineas.append("horarios " + " ".join(temporada.horarios_base))
+  lineas.append("byes " + " ".join(str(s + 1) for s in temporada.semanas_bye))
+  return "\n".join(lineas) + "\n"
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(
+    description="Genera un ejemplar sintético de temporada")
+  parser.add_argument("archivo", help="archivo .txt del ejemplar")
+  parser.add_argument("--equipos", type=int, default=32,
+                      help="número de equipos (por defecto 32)")
+  parser.add_argument("--divisiones", type=int, default=8,
+                      help="número de divisiones (por defecto 8)")
+  parser.add_argument("--semanas", type=int, default=18,
+                      help="número de semanas (por defecto 18)")
+  parser.add_argument("--horarios", nargs="+", default=["MNF", "TNF", "SNF"],
+                      help="horarios estelares de una semana normal")
+  parser.add_argument("--semilla", type=int, default=SEMILLA,
+                      help="semilla del generador de aleatorios")
+  parser.add_argument("--solucion", metavar="ARCHIVO",
+                      help="guarda también una solución factible")
+  args = parser.parse_args()
+
+  temporada, solucion = genera_temporada(
+    args.equipos, args.divisiones, args.semanas, tuple(args.horarios),
+    args.semilla)
+  with open(args.archivo, "w") as f:
+    f.write(texto_temporada(temporada))
+  if args.solucion:
+    with open(args.solucion, "w") as f:
+      f.write(temporada.guardar_solucion(solucion))
+  print(f"{temporada.num_equipos} equipos, {temporada.num_semanas} semanas,",
+        f"{len(temporada.partidos)} partidos")
@@ -1,18 +1,37 @@
 """ Implementación del algoritmo genético """
 
 import numpy as np
+import os
+import json
 import time
-from tqdm.auto import tqdm
 from temporada import TemporadaNFL
 from evaluacion.evaluacion import EvaluacionNFL
+from evaluacion.cache import CacheEvaluacion
+from seleccion import Seleccion, SELECCIONES, SELECCIONES_ESTACIONARIO
+from busqueda_local import BusquedaLocal
+from estancamiento import Estancamiento, ACCIONES
+from instrumentacion import Instrumentacion
+from telemetria import Telemetria
+
+MODOS = ("generacional", "estacionario")
+REEMPLAZOS = ("peor", "padre")
+# Operadores que se miden al instrumentar la ejecución
+OPERADORES = ("solucion_aleatoria", "repara_filas", "repara_columnas",
+              "cruza_filas", "muta_filas", "selecciona_parejas", "evalua_hijos",
+              "actualzia_datos_generacion", "poblacion_generacional",
+              "poblacion_estacionaria", "busqueda_local")
 
 class AlgoritmoGenetico:
   """ Algoritmo Genético para las N-Reinas """
 
   # Optimizar accesos
   __slots__ = ("ejemplar", "evalua_solucion", "p_cruza", "p_mutacion",
-               "poblacion", "tam_poblacion", "mejor", "total_eval", "cdf",
-               "semilla", "rng", "max_eval")
+               "poblacion", "tam_poblacion", "mejor", "total_eval",
+               "evaluaciones", "reserva", "evaluaciones_reserva", "hijos",
+               "contribuciones", "hashes", "reparacion", "seleccion",
+               "semilla", "rng", "max_eval", "incremental", "cache", "modo",
+               "reemplazo", "busqueda", "estancamiento", "acotada",
+               "instrumentacion")
 
   def __init__(self, ejemplar: TemporadaNFL,
       fun_evaluacion: EvaluacionNFL) -> None:
@@ -31,17 +50,76 @@ class AlgoritmoGenetico:
     # Probabilidades
     self.p_cruza = 0
     self.p_mutacion = 0
-    # Datos población
+    # Datos población, las soluciones están juntas en un arreglo de
+    # (tam_poblacion, equipos, semanas, 2) y MEJOR es el índice del mejor
     self.poblacion = None
     self.tam_poblacion = 0
-    self.mejor = None
+    self.mejor = 0
     self.total_eval = 0
     self.max_eval = fun_evaluacion.max_eval
-    self.cdf = None
+    self.evaluaciones = None
+    # Arreglos donde se escribe la siguiente generación, se intercambian con
+    # los de la población en cada generación
+    self.reserva = None
+    self.evaluaciones_reserva = None
+    self.hijos = None
+    # Contribuciones (evaluación incremental) o hashes (cache) por individuo
+    self.contribuciones = None
+    self.hashes = None
+    # Arreglos de trabajo de REPARA_FILAS, con una fila extra para el BYE
+    num_equipos, num_semanas = ejemplar.num_equipos, ejemplar.num_semanas
+    self.reparacion = (np.empty((num_equipos+1, num_semanas),
+                                dtype=ejemplar.tipo_solucion),
+                       np.empty_like(ejemplar.contrarios))
+    self.reparacion[0][-1] = ejemplar.bye
+    self.seleccion = SELECCIONES["ruleta"]()
+    self.incremental = False
+    self.cache = None
+    self.acotada = False
+    # Modo de reemplazo de la población
+    self.modo = "generacional"
+    self.reemplazo = "peor"
+    self.busqueda = None
+    self.estancamiento = None
+    self.instrumentacion = None
     # Generador de aleatorios
     self.semilla = None
     self.rng = None
 
+  def reserva_poblacion(self) -> None:
+    """ Reserva los arreglos de la población para TAM_POBLACION individuos
+
+    La población y la siguiente generación ocupan cada una un solo arreglo
+    contiguo, los hijos se escriben directamente en RESERVA y al final de la
+    generación se intercambian. Así una generación no crea un arreglo por
+    individuo y la memoria no crece durante la ejecución. Las soluciones usan
+    el tipo compacto del ejemplar (TemporadaNFL.tipo_solucion).
+
+    Si la función de evaluación reparte los lotes en procesos
+    (EvaluacionParalela) los arreglos se reservan con su ARREGLO_COMPARTIDO,
+    así los hijos quedan escritos en memoria compartida y no se copian para
+    evaluarlos.
+    """
+    forma = (self.tam_poblacion, self.ejemplar.num_equipos,
+             self.ejemplar.num_semanas, 2)
+    tipo = self.ejemplar.tipo_solucion
+    if self.poblacion is None or self.poblacion.shape != forma:
+      compartido = getattr(self.evalua_solucion, "arreglo_compartido", None)
+      if compartido is not None:
+        self.poblacion = compartido(self.tam_poblacion)
+        self.reserva = compartido(self.tam_poblacion)
+        self.hijos = compartido(2)
+      else:
+        self.poblacion = np.zeros(forma, dtype=tipo)
+        self.reserva = np.zeros(forma, dtype=tipo)
+        self.hijos = np.zeros((2,) + forma[1:], dtype=tipo)
+      self.evaluaciones = np.zeros(self.tam_poblacion, dtype=int)
+      self.evaluaciones_reserva = np.zeros(self.tam_poblacion, dtype=int)
+    self.contribuciones = [None] * self.tam_poblacion \
+      if self.incremental else None
+    self.hashes = [0] * self.tam_poblacion if self.cache is not None else None
+    self.mejor = 0
+
   def inicializa_poblacion(self) -> None:
     """ Inicializa la poblacion inicial con TAM_POBLACION individuos
 
@@ -49,26 +127,33 @@ class AlgoritmoGenetico:
     por lo casos en los que la cantidad posible de individuos es menor al tamaño
     de la población.
 
-    Se almacena el individuo óptimo a parte para la eleccióñ elitista y para
+    Se almacena el índice del individuo óptimo para la eleccióñ elitista y para
     devolver la solución óptima.
     """
-    self.poblacion = [self.solucion_aleatoria() for _ in range(self.tam_poblacion)]
+    for solucion in self.poblacion:
+      self.solucion_aleatoria(solucion)
+    self.evalua_individuos()
     self.actualzia_datos_generacion()
 
-  def solucion_aleatoria(self) -> dict:
-    """ Genera una solución aleatoria y la devuelve junto con su evaluación
+  def solucion_aleatoria(self, sol: np.ndarray = None) -> np.ndarray:
+    """ Genera una solución aleatoria
+
+    Parámetros
+    ----------
+    sol : np.ndarray
+      Arreglo donde se escribe la solución, si es None se crea uno nuevo
 
     Devuelve
     ----------
-    dict : Diccionario con las llaves 'solucion' y 'evaluacion'
+    np.ndarray : La solución generada, sin evaluar
     """
-    sol = np.zeros(
-      (self.ejemplar.num_equipos,self.ejemplar.num_semanas,2), dtype=int)
+    if sol is None:
+      sol = np.zeros((self.ejemplar.num_equipos,self.ejemplar.num_semanas,2),
+                     dtype=self.ejemplar.tipo_solucion)
 
     # Rellenamos filas aleatoriamente
     for equipo in range(self.ejemplar.num_equipos):
-      partidos = np.array(
-        self.ejemplar.equipos[equipo]["partidos"] + [self.ejemplar.bye])
+      partidos = self.ejemplar.partidos_equipos[equipo].copy()
       self.rng.shuffle(partidos)
       sol[equipo,:,0] = partidos
 
@@ -77,18 +162,55 @@ class AlgoritmoGenetico:
     # Rellenamos columnas
     for semana in range(self.ejemplar.num_semanas):
       # Horarios esterales de la semana aleatorios
-      horarios = self.ejemplar.horarios_semana(semana) * 2
-      horarios += [self.ejemplar.horarios["NONE"]] * \
-                    (self.ejemplar.num_equipos - len(horarios))
+      horarios = self.ejemplar.plantillas_horarios[semana].copy()
       self.rng.shuffle(horarios)
       sol[:,semana,1] = horarios
 
     self.repara_columnas(sol)
 
-    return {
-      "solucion" : sol,
-      "evaluacion" : self.evalua_solucion(sol)
-    }
+    return sol
+
+  def evalua_individuos(self, indices: list = None) -> None:
+    """ Evalúa desde cero a los individuos INDICES de la población
+
+    Los individuos se evalúan juntos con EVALUA_LOTE (o con la cache), si se
+    evalúa de forma incremental se calculan sus contribuciones y si se usa la
+    cache sus hashes.
+
+    Parámetros
+    ----------
+    indices : list of int
+      Índices de los individuos, si es None se evalúa toda la población
+    """
+    if indices is None:
+      indices = range(self.tam_poblacion)
+    indices = list(indices)
+    if not indices:
+      return
+
+    if self.incremental:
+      for i in indices:
+        contribuciones = self.evalua_solucion.contribuciones(self.poblacion[i])
+        self.contribuciones[i] = contribuciones
+        self.evaluaciones[i] = self.evalua_solucion.evalua_contribuciones(
+          contribuciones)
+      return
+
+    # Toda la población se evalúa en su lugar, sin copiarla
+    soluciones = self.poblacion if indices == list(range(self.tam_poblacion)) \
+      else self.poblacion[indices]
+    if self.cache is not None:
+      hashes = self.cache.hash_lote(soluciones).tolist()
+      self.evaluaciones[indices] = self.cache.evalua_lote(soluciones, hashes)
+      for i, h in zip(indices, hashes):
+        self.hashes[i] = h
+      return
+
+    self.evaluaciones[indices] = self.evalua_solucion.evalua_lote(soluciones)
+
+  def evaluacion_mejor(self) -> int:
+    """ Devuelve la evaluación del mejor individuo de la población """
+    return int(self.evaluaciones[self.mejor])
 
   def repara_filas(self, solucion: np.ndarray) -> None:
     """ Repara la solucion tanto como sea posible en los equipos
@@ -96,30 +218,49 @@ class AlgoritmoGenetico:
     Recorre todas las filas de arriba a abajo para asegurarse de la mayoría
     de los partidos estén correctamente marcado en ambos equipos que los juegan.
 
+    Los conflictos de cada fila se detectan juntos con operaciones sobre
+    arreglos y sólo se recorren las casillas con conflicto. Mientras se repara
+    una fila ésta no cambia (sólo cambian las de sus contrarios) y una casilla
+    correcta no puede romperse, así el resultado es el mismo que revisando
+    casilla por casilla. Se trabaja sobre los arreglos de REPARACION, que se
+    reservan una sola vez.
+
     Parámetros
     ----------
     solucion : np.ndarray
       Solución a reparar
     """
-    # Diccionario para tener acceso O(1)
-    orden_partidos = [{} for i in range(self.ejemplar.num_equipos)]
-
-    for equipo, juegos in enumerate(solucion):
-      for semana, (partido, _) in enumerate(juegos):
-        orden_partidos[equipo][partido] = semana
+    num_equipos, num_semanas = solucion.shape[:2]
+    contrarios = self.ejemplar.contrarios
+    semanas = np.arange(num_semanas)
+    # Hay una fila de BYE al final, el contrario del BYE es -1 así su casilla
+    # siempre coincide y nunca es conflicto
+    partidos, orden_partidos = self.reparacion
+    partidos[:-1] = solucion[:,:,0]
+    # Índices planos de la casilla del contrario de cada partido
+    planos = contrarios * num_semanas
+    partidos_planos = partidos.reshape(-1)
+    # Semana de cada partido en cada equipo para tener acceso O(1), sólo se
+    # leen las casillas de partidos de la solución, que siempre se escriben
+    orden_partidos[np.arange(num_equipos)[:,None], partidos[:-1]] = semanas
 
     for _ in range(3):
-      for equipo, partidos in enumerate(solucion):
-        for semana, (partido, _) in enumerate(partidos):
-          contra = self.ejemplar.equipo_contra(equipo, partido)
-          if contra == None: continue
-          partido_contra = solucion[contra,semana,0]
+      for equipo in range(num_equipos):
+        fila = partidos[equipo]
+        casillas_contra = planos[equipo,fila] + semanas
+        conflictos = partidos_planos[casillas_contra] != fila
+        for semana in np.flatnonzero(conflictos).tolist():
+          partido = fila[semana]
+          contra = contrarios[equipo,partido]
+          partido_contra = partidos[contra,semana]
           if partido_contra == partido: continue
-          semana_contra = orden_partidos[contra][partido]
-          solucion[contra,semana,0] = partido
-          solucion[contra,semana_contra,0] = partido_contra
-          orden_partidos[contra][partido] = semana
-          orden_partidos[contra][partido_contra] = semana_contra
+          semana_contra = orden_partidos[contra,partido]
+          partidos[contra,semana] = partido
+          partidos[contra,semana_contra] = partido_contra
+          orden_partidos[contra,partido] = semana
+          orden_partidos[contra,partido_contra] = semana_contra
+
+    solucion[:,:,0] = partidos[:-1]
 
   def repara_columnas(self, solucion: np.ndarray) -> None:
     """ Repara la solucion tanto como sea posible en los horarios
@@ -127,12 +268,26 @@ class AlgoritmoGenetico:
     Recorre todas las columnas para asegurase de que, en donde los partidos
     están bien posicionados, se compartan los horarios.
 
+    Los partidos no cambian al reparar los horarios, así las parejas bien
+    posicionadas se detectan juntas con operaciones sobre arreglos. Sólo se
+    recorren las semanas con alguna pareja con horarios distintos (en las
+    demás no hay nada que cambiar) y en ellas sólo las parejas.
+
     Parámetros
     ----------
     solucion : np.ndarray
       Solución a reparar
     """
-    for semana in range(solucion.shape[1]):
+    contrarios = self.ejemplar.contrarios
+    partidos = solucion[:,:,0]
+    horarios = solucion[:,:,1]
+    semanas = np.arange(partidos.shape[1])
+    contras = contrarios[np.arange(partidos.shape[0])[:,None], partidos]
+    # Para el BYE (contra = -1) se revisa el último equipo y se descarta
+    parejas = (contras >= 0) & (partidos[contras,semanas] == partidos)
+    conflictos = parejas & (horarios[contras,semanas] != horarios)
+
+    for semana in np.flatnonzero(conflictos.any(axis=0)).tolist():
       # Cache para los horarios de la semana
       horarios_cache = {}
       for equipo in range(solucion.shape[0]):
@@ -142,12 +297,8 @@ class AlgoritmoGenetico:
         else:
           horarios_cache[h] = {equipo}
 
-      for equipo in range(solucion.shape[0]):
-        partido = solucion[equipo,semana,0]
-        contra = self.ejemplar.equipo_contra(equipo, partido)
-        if contra == None: continue
-        partido_contra = solucion[contra,semana,0]
-        if partido != partido_contra: continue
+      for equipo in np.flatnonzero(parejas[:,semana]).tolist():
+        contra = contras[equipo,semana]
         h1 = solucion[equipo,semana,1]
         h2 = solucion[contra,semana,1]
         if h1 == h2: continue
@@ -158,7 +309,8 @@ class AlgoritmoGenetico:
         solucion[contra,semana,1] = h1
         solucion[cambio,semana,1] = h2
 
-  def cruza_filas(self, sol1: np.ndarray, sol2: np.ndarray) -> tuple:
+  def cruza_filas(self, sol1: np.ndarray, sol2: np.ndarray,
+      hijo1: np.ndarray = None, hijo2: np.ndarray = None) -> tuple:
     """ Aplica cruza por filas entre los padres
     
     Para un hijo se toma una sección de filas de uno de los padres y se copia,
@@ -171,6 +323,10 @@ class AlgoritmoGenetico:
       Primer padre para el cruce
     sol2 : np.ndarray
       Segundo padre para el cruce
+    hijo1 : np.ndarray
+      Arreglo donde se escribe el primer hijo, si es None se crea uno nuevo
+    hijo2 : np.ndarray
+      Arreglo donde se escribe el segundo hijo, si es None se crea uno nuevo
 
     Devuelve
     --------
@@ -181,8 +337,12 @@ class AlgoritmoGenetico:
     m = self.rng.integers(limite-1)
     n = self.rng.integers(m+1, limite) + 1
 
-    hijo1 = sol1.copy()
-    hijo2 = sol2.copy()
+    if hijo1 is None:
+      hijo1 = np.empty_like(sol1)
+    if hijo2 is None:
+      hijo2 = np.empty_like(sol2)
+    hijo1[...] = sol1
+    hijo2[...] = sol2
 
     # Copiamos todas esas filas
     hijo1[m:n,:,0] = sol2[m:n,:,0]
@@ -216,9 +376,9 @@ class AlgoritmoGenetico:
   def selecciona_padres(self, num_padres: int = 2) -> list:
     """ Selecciona NUM_PADRES padres para la nueva generación
 
-    Utiliza el método de selección por ruleta y obtiene dos índices de la
-    población distintos, esto no asegura que los padres sean distintos si
-    se permiten repetidos en la población
+    Utiliza la estrategia de selección de la ejecución (por defecto ruleta) y
+    obtiene índices de la población distintos, esto no asegura que los padres
+    sean distintos si se permiten repetidos en la población
 
     Parámetros
     ----------
@@ -227,75 +387,522 @@ class AlgoritmoGenetico:
 
     Devuelve
     --------
-    list of (list of int)
+    list of np.ndarray
       Lista de los padres obtenidos
     """
-    padres_ind = set()
-    
-    while len(padres_ind) < num_padres:
-      val = self.rng.random()
-      ind = np.searchsorted(self.cdf, val)
-      padres_ind.add(ind)
+    return [self.poblacion[i]
+            for i in self.seleccion.selecciona(self.rng, 1, num_padres)[0]]
 
-    return [self.poblacion[i]["solucion"] for i in padres_ind]
+  def selecciona_parejas(self, num_parejas: int) -> np.ndarray:
+    """ Selecciona NUM_PAREJAS parejas de padres distintos
+
+    Parámetros
+    ----------
+    num_parejas : int
+      Número de parejas
+
+    Devuelve
+    --------
+    np.ndarray : Matriz de NUM_PAREJAS x 2 con los índices de los padres
+    """
+    return self.seleccion.selecciona(self.rng, num_parejas)
+
+  def genera_hijos(self, num_hijos: int, destino: np.ndarray) -> list:
+    """ Genera NUM_HIJOS hijos por cruza y mutación en DESTINO
+
+    Las parejas de padres y los aleatorios de la cruza y mutación se obtienen
+    todos juntos. Cada pareja se cruza con probabilidad P_CRUZA y sus hijos se
+    mutan con probabilidad P_MUTACION. Los hijos se escriben en los renglones
+    de DESTINO, que no puede ser la población.
+
+    Parámetros
+    ----------
+    num_hijos : int
+      Número de hijos a generar
+    destino : np.ndarray
+      Arreglo de (NUM_HIJOS, equipos, semanas, 2) donde se escriben los hijos
+
+    Devuelve
+    --------
+    list of int : Índice del padre del que parte cada hijo
+    """
+    padres = []
+    num_parejas = (num_hijos + 1) // 2
+    parejas = self.selecciona_parejas(num_parejas).tolist()
+    cruzas = (self.rng.random(num_parejas) < self.p_cruza).tolist()
+    mutaciones = (self.rng.random(num_parejas) < self.p_mutacion).tolist()
+
+    for k, ((i1, i2), cruza, mutacion) in enumerate(
+        zip(parejas, cruzas, mutaciones)):
+      h1 = destino[2*k]
+      # Por si sólo hay espacio para un hijo de la última pareja, el otro se
+      # genera igual para no cambiar la secuencia de aleatorios
+      h2 = destino[2*k+1] if 2*k+1 < num_hijos else self.hijos[1]
+
+      # Cruza
+      if cruza:
+        self.cruza_filas(self.poblacion[i1], self.poblacion[i2], h1, h2)
+      else:
+        h1[...] = self.poblacion[i1]
+        h2[...] = self.poblacion[i2]
+
+      # Mutación, los padres no cambian porque los hijos ya son copias
+      if mutacion:
+        self.muta_filas(h1)
+        self.muta_filas(h2)
+
+      # Cada hijo con el padre del que parte
+      padres.append(i1)
+      padres.append(i2)
+
+    del padres[num_hijos:]
+    return padres
+
+  def evalua_hijos(self, hijos: np.ndarray, padres: list,
+      umbrales: np.ndarray = None) -> tuple:
+    """ Evalúa a los hijos generados por GENERA_HIJOS
+
+    Los hijos se evalúan todos juntos con EVALUA_LOTE (o uno por uno a partir
+    de su padre si se evalúa de forma incremental). Con UMBRALES y ACOTADA se
+    usa EVALUA_LOTE_ACOTADA: la evaluación de los hijos que no superan su
+    umbral es sólo una cota superior menor o igual a él.
+
+    Parámetros
+    ----------
+    hijos : np.ndarray
+      Arreglo con los hijos, de (num_hijos, equipos, semanas, 2)
+    padres : list of int
+      Índice del padre del que parte cada hijo
+    umbrales : np.ndarray
+      Evaluación que necesita superar cada hijo para servir, si es None se
+      obtienen las evaluaciones exactas
+
+    Devuelve
+    --------
+    np.ndarray : Vector con las evaluaciones de los hijos
+    list : Contribuciones (evaluación incremental) o hashes (cache) de cada
+      hijo, None si no se usa ninguna
+    """
+    if self.incremental:
+      evaluados = [self.evalua_hijo(h, i) for h, i in zip(hijos, padres)]
+      return (np.array([e for e, _ in evaluados]),
+              [c for _, c in evaluados])
+
+    if self.cache is not None:
+      # El hash de cada hijo se actualiza a partir del de su padre
+      hashes = [self.cache.actualiza_hash(
+                  self.hashes[i], self.poblacion[i], h)
+                for h, i in zip(hijos, padres)]
+      return self.cache.evalua_lote(hijos, hashes), hashes
+
+    # Todos los hijos se evalúan juntos
+    if umbrales is not None and self.acotada:
+      evaluaciones, _ = self.evalua_solucion.evalua_lote_acotada(
+        hijos, umbrales)
+    else:
+      evaluaciones = self.evalua_solucion.evalua_lote(hijos)
+    return evaluaciones, None
 
   def poblacion_generacional(self) -> None:
     """ Obtiene la nueva población de forma generacional
 
     Obtiene tantos hijos como sea necesario para llenar la nueva población
-    y los muta con probabilidad P_MUTACION, al final la generación anteior
-    es reemplazada por la hecha con los hijos.
+    con GENERA_HIJOS, escritos directamente en RESERVA, y los evalúa con
+    EVALUA_HIJOS. Al final la generación anteior se intercambia con la hecha
+    con los hijos, así su arreglo se reutiliza en la siguiente generación.
 
     Para el paso elitista, el mejor individuo de la población actual pasa a la
     nueva directamente.
     """
-    nueva_poblacion = []
+    # El paso elitista ocupa el primer lugar en la nueva población
+    hijos = self.reserva[1:]
+    padres = self.genera_hijos(self.tam_poblacion - 1, hijos)
+    evaluaciones, datos = self.evalua_hijos(hijos, padres)
+
     # Paso elitista, el mejor siempre pasa directamente
-    nueva_poblacion.append(self.mejor)
-    while len(nueva_poblacion) < self.tam_poblacion:
-      # Generan hijos por cruza
-      h1, h2 = self.selecciona_padres(2)
-      
-      # Cruza
-      if self.rng.random() < self.p_cruza:
-        h1, h2 = self.cruza_filas(h1,h2)
+    self.reserva[0] = self.poblacion[self.mejor]
+    self.evaluaciones_reserva[0] = self.evaluaciones[self.mejor]
+    self.evaluaciones_reserva[1:] = evaluaciones
+    if self.incremental:
+      self.contribuciones = [self.contribuciones[self.mejor]] + datos
+    elif self.cache is not None:
+      self.hashes = [self.hashes[self.mejor]] + datos
 
-      # Mutación
-      if self.rng.random() < self.p_mutacion:
-        self.muta_filas(h1)
-        self.muta_filas(h2)
+    self.poblacion, self.reserva = self.reserva, self.poblacion
+    self.evaluaciones, self.evaluaciones_reserva = \
+      self.evaluaciones_reserva, self.evaluaciones
+    self.actualzia_datos_generacion()
 
-      # Agregar
-      nueva_poblacion.append({
-        "solucion" : h1,
-        "evaluacion" : self.evalua_solucion(h1)
-      })
+  def poblacion_estacionaria(self) -> None:
+    """ Realiza una iteración del modo estacionario
 
-      if len(nueva_poblacion) == self.tam_poblacion:
-        break # Por si sólo había espacio para un hijo
+    Se generan dos hijos que entran a la población sólo si son mejores que el
+    individuo que reemplazan: el peor de la población (REEMPLAZO 'peor') o el
+    padre del que parten (REEMPLAZO 'padre'). Así el mejor individuo nunca se
+    pierde. Los hijos se generan en HIJOS y se copian sobre el individuo que
+    reemplazan, sólo cambian sus datos y la selección se actualiza con
+    SELECCION.CAMBIA.
 
-      nueva_poblacion.append({
-        "solucion" : h2,
-        "evaluacion" : self.evalua_solucion(h2)
-      })
-    
-    self.poblacion = nueva_poblacion
+    Como sólo importa si un hijo supera al que reemplaza, los hijos se evalúan
+    de forma acotada: con el reemplazo del peor el umbral es el peor actual
+    (el que reemplaza el segundo hijo sólo puede ser mejor) y con el del padre
+    es la evaluación del padre.
+    """
+    padres = self.genera_hijos(2, self.hijos)
+    if self.reemplazo == "padre":
+      umbrales = self.evaluaciones[padres]
+    else:
+      umbrales = np.full(len(padres), self.evaluaciones.min())
+    evaluaciones, datos = self.evalua_hijos(self.hijos, padres, umbrales)
+
+    for k, (padre, e) in enumerate(zip(padres, evaluaciones.tolist())):
+      if self.reemplazo == "padre":
+        i = padre
+      else:
+        i = int(self.evaluaciones.argmin())
+      anterior = int(self.evaluaciones[i])
+      if e <= anterior:
+        continue
+      mejor = self.evaluacion_mejor()
+      self.poblacion[i] = self.hijos[k]
+      if self.incremental:
+        self.contribuciones[i] = datos[k]
+      elif self.cache is not None:
+        self.hashes[i] = datos[k]
+      # La selección comparte el vector de evaluaciones, CAMBIA lo actualiza
+      self.seleccion.cambia(i, e)
+      self.evaluaciones[i] = e
+      self.total_eval += e - anterior
+      if e > mejor:
+        self.mejor = i
+
+  def evalua_hijo(self, hijo: np.ndarray, padre: int) -> tuple:
+    """ Evalúa un hijo de forma incremental a partir de uno de sus padres
+
+    Las casillas tocadas por la cruza, la mutación y las reparaciones son las
+    que difieren del padre, sólo se recalculan sus equipos y semanas.
+
+    Parámetros
+    ----------
+    hijo : np.ndarray
+      Solución del hijo
+    padre : int
+      Índice en la población del individuo del que parte el hijo
+
+    Devuelve
+    --------
+    int : Evaluación del hijo
+    list of np.ndarray : Contribuciones del hijo
+    """
+    cambios = np.any(hijo != self.poblacion[padre], axis=2)
+    if not cambios.any():
+      return int(self.evaluaciones[padre]), self.contribuciones[padre]
+    return self.evalua_solucion.evalua_incremental(
+      hijo, self.contribuciones[padre], cambios)
+
+  def actualzia_datos_generacion(self) -> None:
+    """ Actualiza los datos del mejor indivuo y la suma de evaluacion
+
+    Se usan las evaluaciones de EVALUACIONES, que deben estar al día con la
+    población.
+    """
+    self.mejor = int(self.evaluaciones.argmax())
+    self.total_eval = int(self.evaluaciones.sum())
+    self.seleccion.actualiza(self.evaluaciones)
+
+  def mejores(self, k: int) -> np.ndarray:
+    """ Devuelve las soluciones de los K mejores individuos de la población
+
+    Parámetros
+    ----------
+    k : int
+      Número de individuos a devolver
+
+    Devuelve
+    --------
+    np.ndarray : Copia de las soluciones ordenadas del mejor al peor, de
+      (K, equipos, semanas, 2)
+    """
+    orden = np.argsort(-self.evaluaciones, kind="stable")[:k]
+    return self.poblacion[orden]
+
+  def inserta(self, soluciones: list) -> None:
+    """ Reemplaza a los peores individuos de la población por SOLUCIONES
+
+    Sirve para recibir migrantes de otras poblaciones, las soluciones se
+    copian a la población y se evalúan al insertarse. El mejor individuo
+    nunca se reemplaza.
+
+    Parámetros
+    ----------
+    soluciones : list of np.ndarray
+      Soluciones a insertar
+    """
+    peores = [i for i in np.argsort(self.evaluaciones).tolist()
+              if i != self.mejor]
+    reemplazados = []
+    for i, sol in zip(peores, soluciones):
+      self.poblacion[i] = sol
+      reemplazados.append(i)
+    self.evalua_individuos(reemplazados)
     self.actualzia_datos_generacion()
 
-  def actualzia_datos_generacion(self):
-    """ Actualiza los datos del mejor indivuo y la suma de evaluacion """
-    self.mejor = self.poblacion[0]
-    self.total_eval = 0
-    for v in self.poblacion:
-      self.total_eval += v["evaluacion"]
-      if v["evaluacion"] > self.mejor["evaluacion"]:
-        self.mejor = v
-    probs = [v["evaluacion"] / self.total_eval for v in self.poblacion]
-    self.cdf = np.cumsum(probs)
+  def registra_telemetria(self, telemetria: Telemetria, generacion: int,
+      tiempo: float, evaluaciones_por_segundo: float) -> None:
+    """ Escribe el registro de la generación actual en TELEMETRIA
+
+    Parámetros
+    ----------
+    telemetria : Telemetria
+      Donde se escribe el registro
+    generacion : int
+      Generación actual
+    tiempo : float
+      Segundos que lleva la ejecución
+    evaluaciones_por_segundo : float
+      Evaluaciones de hijos por segundo desde el registro anterior
+    """
+    telemetria.registra(
+      generacion, tiempo, self.evaluacion_mejor(),
+      self.total_eval / self.tam_poblacion, float(self.evaluaciones.std()),
+      self.diversidad(), evaluaciones_por_segundo)
+
+  def diversidad(self, tam_muestra: int = 10) -> float:
+    """ Estima la diversidad de la población
+
+    Es la fracción promedio de partidos en los que los individuos de una
+    muestra difieren del mejor (distancia de Hamming normalizada). La muestra
+    son individuos espaciados de forma regular, así no se usa el generador de
+    aleatorios y medir la diversidad no cambia la ejecución.
+
+    Parámetros
+    ----------
+    tam_muestra : int
+      Número de individuos de la muestra, por defecto es 10
+
+    Devuelve
+    --------
+    float : Diversidad entre 0 (todos iguales al mejor) y 1
+    """
+    indices = np.linspace(0, self.tam_poblacion - 1,
+                          min(tam_muestra, self.tam_poblacion), dtype=int)
+    muestra = self.poblacion[indices,:,:,0]
+    return float(np.mean(muestra != self.poblacion[self.mejor,:,:,0]))
+
+  def busqueda_local(self, k: int, t_limite: float) -> int:
+    """ Aplica la búsqueda local a los K mejores individuos
+
+    El tiempo se reparte en partes iguales entre los individuos, los que
+    mejoran se reemplazan en la población.
+
+    Parámetros
+    ----------
+    k : int
+      Número de individuos a mejorar
+    t_limite : float
+      Segundos que puede durar la búsqueda en total
+
+    Devuelve
+    --------
+    int : Lo que mejoró la evaluación del mejor individuo
+    """
+    anterior = self.evaluacion_mejor()
+    mejores = np.argsort(-self.evaluaciones, kind="stable")[:k].tolist()
+    for i in mejores:
+      evaluacion = int(self.evaluaciones[i])
+      if self.incremental:
+        contribuciones = self.contribuciones[i]
+      else:
+        contribuciones = self.evalua_solucion.contribuciones(self.poblacion[i])
+      sol, nueva, contribuciones = self.busqueda.mejora_solucion(
+        self.poblacion[i], evaluacion, contribuciones,
+        t_limite / len(mejores))
+      if nueva == evaluacion:
+        continue
+      self.poblacion[i] = sol
+      self.evaluaciones[i] = nueva
+      if self.incremental:
+        self.contribuciones[i] = contribuciones
+      elif self.cache is not None:
+        self.hashes[i] = self.cache.hash(sol)
+        self.cache.guarda(self.hashes[i], nueva)
+    self.actualzia_datos_generacion()
+    return self.evaluacion_mejor() - anterior
+
+  def instrumenta(self) -> None:
+    """ Empieza a medir el tiempo de los operadores y de las reglas
+
+    La instancia cambia a la clase AlgoritmoGeneticoInstrumentado, que mide
+    los OPERADORES, y las reglas de la evaluación se envuelven. Sin
+    instrumentar no hay ningún costo extra.
+    """
+    self.instrumentacion = (Instrumentacion(), Instrumentacion())
+    self.__class__ = AlgoritmoGeneticoInstrumentado
+    if hasattr(self.evalua_solucion, "instrumenta"):
+      self.evalua_solucion.instrumenta(self.instrumentacion[1])
+
+  def desinstrumenta(self) -> dict:
+    """ Deja de medir los tiempos y devuelve lo medido
+
+    Devuelve
+    --------
+    dict : Diccionario con las llaves 'operadores' y 'reglas', cada una con
+      el resumen de Instrumentacion de sus tiempos
+    """
+    self.__class__ = AlgoritmoGenetico
+    if hasattr(self.evalua_solucion, "desinstrumenta"):
+      self.evalua_solucion.desinstrumenta()
+    operadores, reglas = self.instrumentacion
+    self.instrumentacion = None
+    return {"operadores" : operadores.resumen(), "reglas" : reglas.resumen()}
+
+  def prepara(self, tam_poblacion: int, p_cruza: float, p_mutacion: float,
+      semilla: "int | np.random.SeedSequence" = None,
+      incremental: bool = False, tam_cache: int = 0,
+      seleccion: "str | Seleccion" = "ruleta", modo: str = "generacional",
+      reemplazo: str = "peor") -> None:
+    """ Fija los parámetros de una ejecución sin generar la población
+
+    Los parámetros son los de EJECUTAR, además la semilla puede ser un
+    np.random.SeedSequence (por ejemplo una de las generadas con spawn).
+    """
+    if tam_poblacion < 2:
+      raise ValueError("La población debe tener por lo menos 2 individuos")
+    self.semilla = semilla if semilla is not None else int(time.time())
+    self.rng = np.random.default_rng(self.semilla)
+
+    self.p_cruza = p_cruza
+    self.p_mutacion = p_mutacion
+    self.tam_poblacion = tam_poblacion
+    self.incremental = incremental
+    if modo not in MODOS:
+      raise ValueError(f"Modo desconocido: {modo}")
+    if reemplazo not in REEMPLAZOS:
+      raise ValueError(f"Reemplazo desconocido: {reemplazo}")
+    self.modo = modo
+    self.reemplazo = reemplazo
+    selecciones = SELECCIONES_ESTACIONARIO if modo == "estacionario" \
+      else SELECCIONES
+    self.seleccion = selecciones[seleccion]() if isinstance(seleccion, str) \
+      else seleccion
+    self.cache = None
+    if tam_cache > 0 and not incremental:
+      self.cache = CacheEvaluacion(self.evalua_solucion, tam_cache)
+    # La evaluación acotada sólo se usa donde no hace falta la exacta (los
+    # hijos del modo estacionario) y sin cache, que guarda evaluaciones exactas
+    self.acotada = modo == "estacionario" and not incremental and \
+      self.cache is None and \
+      hasattr(self.evalua_solucion, "evalua_lote_acotada")
+    self.busqueda = BusquedaLocal(self)
+    self.estancamiento = None
+    self.reserva_poblacion()
+
+  def guarda_estado(self, ruta: str, generacion: int, optimos: list,
+      promedios: list, tiempo: float) -> None:
+    """ Guarda el estado completo de la ejecución en un archivo .npz
+
+    Las soluciones de la población se guardan juntas en un arreglo y el resto
+    del estado (parámetros, estadísticas y el estado del generador de
+    aleatorios) como JSON dentro del mismo archivo. El archivo se escribe
+    primero con otro nombre y luego se renombra, así un proceso terminado a
+    la mitad no deja un archivo corrupto.
+
+    Parámetros
+    ----------
+    ruta : str
+      Archivo donde se guarda el estado
+    generacion : int
+      Generación actual
+    optimos : list of int
+      Mejores evaluaciones registradas hasta ahora
+    promedios : list of float
+      Promedios registrados hasta ahora
+    tiempo : float
+      Segundos que lleva la ejecución
+    """
+    datos = {
+      "semilla" : int(self.semilla),
+      "tam_poblacion" : self.tam_poblacion,
+      "p_cruza" : self.p_cruza,
+      "p_mutacion" : self.p_mutacion,
+      "incremental" : self.incremental,
+      "tam_cache" : self.cache.tam_maximo if self.cache is not None else 0,
+      "seleccion" : next(
+        nombre for nombre, clase in (SELECCIONES_ESTACIONARIO.items()
+                                     if self.modo == "estacionario"
+                                     else SELECCIONES.items())
+        if type(self.seleccion) is clase),
+      "modo" : self.modo,
+      "reemplazo" : self.reemplazo,
+      "mejor" : self.mejor,
+      "generacion" : generacion,
+      "optimos" : optimos,
+      "promedios" : promedios,
+      "tiempo" : tiempo,
+      "rng" : self.rng.bit_generator.state,
+      "estancamiento" : self.estancamiento.estado()
+        if self.estancamiento is not None else None
+    }
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "wb") as f:
+      np.savez_compressed(
+        f,
+        soluciones=self.poblacion,
+        evaluaciones=self.evaluaciones,
+        datos=np.frombuffer(json.dumps(datos).encode(), dtype=np.uint8))
+    os.replace(temporal, ruta)
+
+  def carga_estado(self, ruta: str) -> dict:
+    """ Restaura una ejecución guardada con GUARDA_ESTADO
+
+    Se restauran los parámetros, la población y el generador de aleatorios,
+    las contribuciones y hashes de los individuos se recalculan.
+
+    Parámetros
+    ----------
+    ruta : str
+      Archivo con el estado
+
+    Devuelve
+    --------
+    dict : Diccionario con las llaves 'generacion', 'optimos', 'promedios',
+      'tiempo' y 'estancamiento' (estado de Estancamiento o None) del estado
+      guardado
+    """
+    with np.load(ruta) as archivo:
+      soluciones = archivo["soluciones"]
+      evaluaciones = archivo["evaluaciones"].tolist()
+      datos = json.loads(archivo["datos"].tobytes())
+
+    self.prepara(datos["tam_poblacion"], datos["p_cruza"], datos["p_mutacion"],
+                 datos["semilla"], datos["incremental"], datos["tam_cache"],
+                 datos["seleccion"], datos["modo"], datos["reemplazo"])
+    self.rng.bit_generator.state = datos["rng"]
+
+    self.poblacion[...] = soluciones
+    self.evalua_individuos()
+    if self.evaluaciones.tolist() != evaluaciones:
+      raise ValueError("El estado no corresponde a la función de evaluación")
+    self.actualzia_datos_generacion()
+    self.mejor = datos["mejor"]
+    estado = {llave : datos[llave]
+              for llave in ("generacion", "optimos", "promedios", "tiempo")}
+    estado["estancamiento"] = datos.get("estancamiento")
+    return estado
 
   def ejecutar(self, tam_poblacion: int = 50, t_limite: int = 60,
       p_cruza: float = 0.8, p_mutacion: float = 0.01, semilla: int = None,
-      muestra_cada: int = 100, grafica_cada: int = 100) -> dict:
+      muestra_cada: int = 100, grafica_cada: int = 100,
+      incremental: bool = False, tam_cache: int = 0, checkpoint: str = None,
+      checkpoint_cada: int = 0, checkpoint_segundos: float = 0,
+      reanudar: str = None, seleccion: "str | Seleccion" = "ruleta",
+      modo: str = "generacional", reemplazo: str = "peor",
+      busqueda_cada: int = 0, busqueda_k: int = 1,
+      busqueda_fraccion: float = 0.1, instrumentar: bool = False,
+      telemetria: "str | Telemetria" = None,
+      telemetria_cada: int = 1, estancamiento: int = 0,
+      diversidad_minima: float = 0.0, desviacion_minima: float = 0.0,
+      acciones: tuple = ACCIONES) -> dict:
     """ Ejecuta el algoritmo genético con los parámetros dados
 
     El algoritmo termina cuando termina el tiempo limite o cuando se alcanza
@@ -304,7 +911,8 @@ class AlgoritmoGenetico:
     Parámetros
     ----------
     tam_poblacion : int
-      Tamaño de la población, por defecto es 50
+      Tamaño de la población, por lo menos 2 (cada hijo necesita dos padres
+      distintos). Por defecto es 50
     t_limite : int
       Tiempo en segundo que el algoritmo se ejecutará como máximo.
       Por defecto es 60
@@ -321,6 +929,76 @@ class AlgoritmoGenetico:
     grafica_cada : int
       Determinada cada cuántas generaciones se almacenan los datos para graficar,
       lo hacemos asi para evitar sobrecargar de información.
+    incremental : bool
+      Si es True los hijos se evalúan de forma incremental a partir de las
+      contribuciones de su padre en lugar de evaluar a toda la generación.
+      Por defecto es False
+    tam_cache : int
+      Número máximo de evaluaciones que se memorizan para no reevaluar
+      soluciones repetidas, con 0 no se usa la cache. No se usa si la
+      evaluación es incremental. Por defecto es 0
+    checkpoint : str
+      Archivo donde se guarda periódicamente el estado de la ejecución para
+      poder reanudarla, si es None no se guarda. Por defecto es None
+    checkpoint_cada : int
+      Cada cuántas generaciones se guarda el estado, con 0 no se usa.
+      Por defecto es 0
+    checkpoint_segundos : float
+      Cada cuántos segundos se guarda el estado, con 0 no se usa.
+      Por defecto es 0
+    reanudar : str
+      Archivo de un estado guardado desde el que se continúa la ejecución, los
+      parámetros del algoritmo se toman del archivo (salvo el tiempo límite,
+      que incluye el tiempo ya ejecutado) y el resultado es el mismo que sin
+      interrumpir la ejecución. Por defecto es None
+    seleccion : str or Seleccion
+      Estrategia de selección de padres: 'ruleta', 'torneo', 'rango' o una
+      instancia de Seleccion. Por defecto es 'ruleta'
+    modo : str
+      'generacional' para reemplazar a toda la población en cada generación o
+      'estacionario' para que en cada iteración (que cuenta como generación)
+      sólo entren dos hijos, en este modo la ruleta usa un árbol de Fenwick.
+      Por defecto es 'generacional'
+    reemplazo : str
+      En el modo estacionario, a quién reemplaza cada hijo si es mejor: 'peor'
+      (el peor de la población) o 'padre'. Por defecto es 'peor'
+    busqueda_cada : int
+      Cada cuántas generaciones se aplica la búsqueda local a los mejores
+      individuos, con 0 no se usa. Por defecto es 0
+    busqueda_k : int
+      A cuántos de los mejores individuos se aplica la búsqueda local.
+      Por defecto es 1
+    busqueda_fraccion : float
+      Fracción del tiempo de la ejecución que puede usar la búsqueda local,
+      cada vez puede usar lo que le corresponde del tiempo del algoritmo
+      genético desde la anterior. Como depende del tiempo, con búsqueda local
+      la ejecución no se repite con la misma semilla. Por defecto es 0.1
+    instrumentar : bool
+      Si es True se mide el tiempo y las llamadas de cada operador y de cada
+      regla de la evaluación. Por defecto es False
+    telemetria : str or Telemetria
+      Archivo (.jsonl o .bin) o Telemetria donde se escribe un registro por
+      generación con el mejor, el promedio, la desviación estándar, la
+      diversidad (ver DIVERSIDAD) y las evaluaciones por segundo. Los
+      registros se escriben mientras avanza la ejecución y al reanudar se
+      agregan al mismo archivo, después de borrar los de las generaciones
+      posteriores al checkpoint. Si es None no se escribe nada. Por defecto
+      es None
+    telemetria_cada : int
+      Cada cuántas generaciones se escribe un registro. Por defecto es 1
+    estancamiento : int
+      Generaciones sin mejora del mejor individuo tras las que se considera
+      estancada la ejecución y se aplica la siguiente de ACCIONES (ver
+      Estancamiento), con 0 no se usa el criterio. Por defecto es 0
+    diversidad_minima : float
+      Diversidad de la población (entre 0 y 1) por debajo de la que la
+      ejecución está estancada, con 0 no se usa. Por defecto es 0
+    desviacion_minima : float
+      Desviación estándar de las evaluaciones entre su promedio por debajo de
+      la que la ejecución está estancada, con 0 no se usa. Por defecto es 0
+    acciones : tuple of str
+      Acciones contra el estancamiento en el orden en que escalan: 'mutacion',
+      'inyeccion' y 'reinicio'. Por defecto son las tres
 
     Devuelve
     --------
@@ -334,53 +1012,174 @@ class AlgoritmoGenetico:
     - es_optimo: Booleano que dice si la solución es óptima o no
     - optimos: Lista con las mejores evaluaciones por generación
     - promedios: Lista con el promedio de evaluación por generación
+    - cache: Diccionario con los aciertos y fallos de la cache o None si no
+      se usó
+    - busqueda: Estadísticas de la búsqueda local (ver
+      BusquedaLocal.estadisticas) o None si no se usó, además tiene el
+      tiempo del algoritmo genético ('tiempo_ga') y lo que mejoró el mejor
+      individuo en la búsqueda local y en el algoritmo genético
+      ('mejora_mejor' y 'mejora_mejor_ga') con sus mejoras por segundo
+    - tiempos: Tiempos de los operadores y las reglas (ver DESINSTRUMENTA) o
+      None si no se instrumentó
+    - estancamiento: Eventos de estancamiento y acciones aplicadas (ver
+      Estancamiento.estadisticas) o None si no se usó
     """ 
-    self.semilla = semilla if semilla is not None else int(time.time())
-    self.rng = np.random.default_rng(semilla)
-
-    self.p_cruza = p_cruza
-    self.p_mutacion = p_mutacion
-    self.tam_poblacion = tam_poblacion
-
-    optimos = []
-    promedios = []
+    if isinstance(telemetria, (str, os.PathLike)):
+      with Telemetria(telemetria) as sumidero:
+        return self.ejecutar(
+          tam_poblacion, t_limite, p_cruza, p_mutacion, semilla, muestra_cada,
+          grafica_cada, incremental, tam_cache, checkpoint, checkpoint_cada,
+          checkpoint_segundos, reanudar, seleccion, modo, reemplazo,
+          busqueda_cada, busqueda_k, busqueda_fraccion, instrumentar,
+          sumidero, telemetria_cada, estancamiento, diversidad_minima,
+          desviacion_minima, acciones)
+    if instrumentar:
+      self.instrumenta()
 
-    t_inicio = time.time()
-    timeout = t_inicio + t_limite
-    generacion = 0
+    # Si la ejecución falla la clase vuelve a ser la normal
+    tiempos = None
+    try:
+      if reanudar is not None:
+        estado = self.carga_estado(reanudar)
+        optimos = estado["optimos"]
+        promedios = estado["promedios"]
+        generacion = estado["generacion"]
+        t_inicio = time.time() - estado["tiempo"]
+        if telemetria is not None:
+          telemetria.descarta_posteriores(generacion)
+      else:
+        self.prepara(tam_poblacion, p_cruza, p_mutacion, semilla, incremental,
+                     tam_cache, seleccion, modo, reemplazo)
+        t_inicio = time.time()
+        generacion = 0
+        self.inicializa_poblacion()
+        optimos = [self.evaluacion_mejor()]
+        promedios = [self.total_eval / self.tam_poblacion]
+      if self.acotada:
+        self.evalua_solucion.ordena_reglas(self.poblacion)
+      if estancamiento or diversidad_minima or desviacion_minima:
+        self.estancamiento = Estancamiento(
+          self, estancamiento, diversidad_minima, desviacion_minima,
+          acciones=acciones)
+        if reanudar is not None and estado["estancamiento"] is not None:
+          self.estancamiento.restaura(estado["estancamiento"])
 
-    self.inicializa_poblacion()
+      timeout = t_inicio + t_limite
+      t_actual = time.time()
+      t_checkpoint = t_actual
 
-    optimos.append(self.mejor["evaluacion"])
-    promedios.append(self.total_eval / self.tam_poblacion)
+      paso = self.poblacion_estacionaria if self.modo == "estacionario" \
+        else self.poblacion_generacional
+      # Tiempos y mejoras del mejor individuo en la búsqueda local y en el resto
+      t_busqueda = 0.0
+      mejora_busqueda = 0
+      t_ultima_busqueda = t_actual
+      inicial = self.evaluacion_mejor()
+      # Evaluaciones de hijos por generación para la telemetría
+      hijos_paso = 2 if self.modo == "estacionario" else self.tam_poblacion - 1
+      t_registro = t_actual
+      if telemetria is not None and reanudar is None:
+        self.registra_telemetria(telemetria, generacion, 0.0, 0.0)
 
-    t_actual = time.time()
+      # tqdm tarda en importarse, sólo se necesita al ejecutar
+      from tqdm.auto import tqdm
+      with tqdm(desc="Generación", unit="", initial=generacion) as bar:
+        while t_actual < timeout and self.evaluacion_mejor() != self.max_eval:
+          paso()
+          generacion += 1
+          if busqueda_cada and generacion % busqueda_cada == 0:
+            # El tiempo de la búsqueda guarda la proporción con el del resto
+            t_inicio_busqueda = time.time()
+            presupuesto = busqueda_fraccion / (1 - busqueda_fraccion) * \
+              (t_inicio_busqueda - t_ultima_busqueda)
+            mejora_busqueda += self.busqueda_local(busqueda_k, presupuesto)
+            t_ultima_busqueda = time.time()
+            t_busqueda += t_ultima_busqueda - t_inicio_busqueda
+          # Datos estadisticos
+          if generacion % grafica_cada == 0:
+            optimos.append(self.evaluacion_mejor())
+            promedios.append(self.total_eval / self.tam_poblacion)
+          if generacion % muestra_cada == 0:
+              print(f" Generacion: {generacion}",
+                    f"Evaluacion: {self.evaluacion_mejor()}",
+                    f"Objetivo: {self.max_eval}")
+          t_actual = time.time()
+          if self.estancamiento is not None:
+            self.estancamiento.revisa(generacion, t_actual - t_inicio)
+          if telemetria is not None and generacion % telemetria_cada == 0:
+            self.registra_telemetria(
+              telemetria, generacion, t_actual - t_inicio,
+              hijos_paso * telemetria_cada / max(t_actual - t_registro, 1e-9))
+            t_registro = t_actual
+          if checkpoint is not None and (
+              (checkpoint_cada and generacion % checkpoint_cada == 0) or
+              (checkpoint_segundos and
+               t_actual - t_checkpoint >= checkpoint_segundos)):
+            # Los registros hasta el checkpoint quedan escritos, al reanudar
+            # se continúa desde ellos
+            if telemetria is not None:
+              telemetria.vacia()
+            self.guarda_estado(checkpoint, generacion, optimos, promedios,
+                               t_actual - t_inicio)
+            t_checkpoint = t_actual
+          bar.update(1)
 
-    with tqdm(desc="Generación", unit="") as bar:
-      while t_actual < timeout and self.mejor["evaluacion"] != self.max_eval:
-        self.poblacion_generacional()
-        generacion += 1
-        # Datos estadisticos
-        if generacion % grafica_cada == 0:
-          optimos.append(self.mejor["evaluacion"])
-          promedios.append(self.total_eval / self.tam_poblacion)
-        if generacion % muestra_cada == 0:
-            print(f" Generacion: {generacion}",
-                  f"Evaluacion: {self.mejor['evaluacion']}",
-                  f"Objetivo: {self.max_eval}")
-        t_actual = time.time()
-        bar.update(1)
+      t_total = t_actual - t_inicio
 
-    t_total = t_actual - t_inicio
+      busqueda = None
+      if busqueda_cada:
+        t_ga = t_total - t_busqueda
+        mejora_ga = self.evaluacion_mejor() - inicial - mejora_busqueda
+        busqueda = self.busqueda.estadisticas()
+        busqueda.update({
+          "mejora_mejor" : mejora_busqueda,
+          "mejora_mejor_por_segundo" :
+            mejora_busqueda / t_busqueda if t_busqueda else 0.0,
+          "tiempo_ga" : t_ga,
+          "mejora_mejor_ga" : mejora_ga,
+          "mejora_mejor_por_segundo_ga" : mejora_ga / t_ga if t_ga else 0.0
+        })
+    finally:
+      if instrumentar:
+        tiempos = self.desinstrumenta()
 
     return {
       "tiempo" : t_total,
-      "es_optimo" : self.mejor["evaluacion"] == self.max_eval,
+      "es_optimo" : self.evaluacion_mejor() == self.max_eval,
       "generacion" : generacion,
-      "solucion" : self.mejor["solucion"],
-      "evaluacion" : self.mejor["evaluacion"],
+      "solucion" : self.poblacion[self.mejor].copy(),
+      "evaluacion" : self.evaluacion_mejor(),
       "optimos" : optimos,
-      "promedios" : promedios 
+      "promedios" : promedios,
+      "cache" : self.cache.estadisticas() if self.cache is not None else None,
+      "busqueda" : busqueda,
+      "tiempos" : tiempos,
+      "estancamiento" : self.estancamiento.estadisticas()
+        if self.estancamiento is not None else None
     }
 
+class AlgoritmoGeneticoInstrumentado(AlgoritmoGenetico):
+  """ Algoritmo genético que mide el tiempo de sus OPERADORES
+
+  No se construye directamente, AlgoritmoGenetico.instrumenta cambia la clase
+  de una instancia a ésta mientras se mide. Los tiempos de un operador
+  incluyen los de los operadores que llama.
+  """
+
+  __slots__ = ()
+
+def operador_medido(nombre: str) -> "Callable":
+  """ Devuelve el operador NOMBRE de AlgoritmoGenetico midiendo su tiempo """
+  operador = getattr(AlgoritmoGenetico, nombre)
+  def medido(self, *args, **kwargs):
+    t_inicio = time.perf_counter()
+    try:
+      return operador(self, *args, **kwargs)
+    finally:
+      self.instrumentacion[0].registra(nombre, time.perf_counter() - t_inicio)
+  medido.__name__ = nombre
+  medido.__doc__ = operador.__doc__
+  return medido
 
+for nombre in OPERADORES:
+  setattr(AlgoritmoGeneticoInstrumentado, nombre, operador_medido(nombre))
@@ -0,0 +1,108 @@
+""" Implementa la medición de tiempos de los operadores y las reglas """
+
+import time
+import numpy as np
+
+class Instrumentacion:
+  """ Acumula el tiempo y el número de llamadas de cada operación
+
+  Los tiempos se miden con time.perf_counter (reloj monótono). Los tiempos de
+  una operación incluyen los de las operaciones que llama, por ejemplo el de
+  CRUZA_FILAS incluye sus reparaciones.
+  """
+
+  __slots__ = ("tiempos", "llamadas")
+
+  def __init__(self) -> None:
+    self.tiempos = {}
+    self.llamadas = {}
+
+  def registra(self, nombre: str, tiempo: float) -> None:
+    """ Registra una llamada de NOMBRE que tardó TIEMPO segundos """
+    if nombre in self.tiempos:
+      self.tiempos[nombre] += tiempo
+      self.llamadas[nombre] += 1
+    else:
+      self.tiempos[nombre] = tiempo
+      self.llamadas[nombre] = 1
+
+  def resumen(self) -> dict:
+    """ Devuelve los datos de cada operación
+
+    Devuelve
+    --------
+    dict : Diccionario con una llave por operación, cada una con un
+      diccionario con las llaves 'llamadas', 'tiempo' (total en segundos) y
+      'promedio' (segundos por llamada)
+    """
+    return {
+      nombre : {
+        "llamadas" : self.llamadas[nombre],
+        "tiempo" : tiempo,
+        "promedio" : tiempo / self.llamadas[nombre]
+      } for nombre, tiempo in self.tiempos.items()
+    }
+
+def medida(nombre: str, funcion: "Callable",
+    instrumentacion: Instrumentacion) -> "Callable":
+  """ Envuelve FUNCION para registrar el tiempo de cada llamada como NOMBRE
+
+  Parámetros
+  ----------
+  nombre : str
+    Nombre con el que se registra la operación
+  funcion : Callable
+    Función a medir
+  instrumentacion : Instrumentacion
+    Donde se registran los tiempos
+
+  Devuelve
+  --------
+  Callable : Función con los mismos parámetros y resultado que FUNCION
+  """
+  def envoltura(*args, **kwargs):
+    t_inicio = time.perf_counter()
+    try:
+      return funcion(*args, **kwargs)
+    finally:
+      instrumentacion.registra(nombre, time.perf_counter() - t_inicio)
+  return envoltura
+
+class ReglaMedida:
+  """ Envuelve una regla para medir el tiempo de sus evaluaciones
+
+  Se mide cada forma de evaluar que usa EvaluacionNFL (una solución, lotes,
+  contribuciones y actualizaciones incrementales), todas se registran con el
+  nombre de la regla. El resto de los atributos son los de la regla.
+  """
+
+  __slots__ = ("regla", "instrumentacion", "lote", "contribuciones",
+               "actualiza")
+
+  def __init__(self, regla: "Regla",
+      instrumentacion: Instrumentacion) -> None:
+    """
+    Parámetros
+    ----------
+    regla : Regla
+      Regla a medir
+    instrumentacion : Instrumentacion
+      Donde se registran los tiempos
+    """
+    self.regla = regla
+    self.instrumentacion = instrumentacion
+    nombre = regla.nombre
+    self.lote = medida(nombre, regla.lote, instrumentacion)
+    self.contribuciones = medida(nombre, regla.contribuciones, instrumentacion)
+    self.actualiza = medida(nombre, regla.actualiza, instrumentacion)
+
+  def __call__(self, solucion: np.ndarray) -> int:
+    t_inicio = time.perf_counter()
+    try:
+      return self.regla(solucion)
+    finally:
+      self.instrumentacion.registra(
+        self.regla.nombre, time.perf_counter() - t_inicio)
+
+  def __getattr__(self, nombre: str):
+    return getattr(self.regla, nombre)
@@ -0,0 +1,238 @@
+""" Implementación del modelo de islas para el algoritmo genético """
+
+import time
+import queue
+import multiprocessing as mp
+import numpy as np
+from genetico import AlgoritmoGenetico
+from temporada import TemporadaNFL
+from evaluacion.evaluacion import EvaluacionNFL
+
+TOPOLOGIAS = ("anillo", "aleatoria")
+
+def ejecuta_isla(isla: int, ejemplar: TemporadaNFL,
+    fun_evaluacion: EvaluacionNFL, parametros: dict,
+    semilla: np.random.SeedSequence, buzones: list, resultados: mp.Queue,
+    parar: mp.Event, timeout: float) -> None:
+  """ Ejecuta el algoritmo genético de una isla, se corre en su propio proceso
+
+  Cada MIGRA_CADA generaciones manda a sus NUM_MIGRANTES mejores individuos al
+  buzón de otra isla y recibe los migrantes que haya en su buzón. La migración
+  es asíncrona, una isla no espera a las demás.
+
+  Parámetros
+  ----------
+  isla : int
+    Número de la isla
+  ejemplar : TemporadaNFL
+    Ejemplar para generar las soluciones
+  fun_evaluacion : EvaluacionNFL
+    Función de evaluación de las soluciones
+  parametros : dict
+    Parámetros de EJECUTAR_ISLAS que usa la isla
+  semilla : np.random.SeedSequence
+    Semilla de la isla
+  buzones : list of mp.Queue
+    Buzón de cada isla para recibir migrantes
+  resultados : mp.Queue
+    Cola donde se deja el resultado de la isla
+  parar : mp.Event
+    Se activa cuando alguna isla encuentra el óptimo
+  timeout : float
+    Tiempo (según time.time()) en que terminan todas las islas
+  """
+  # Los buzones de islas que ya terminaron no se vacían, así el proceso no
+  # espera a que se lean sus migrantes para terminar
+  for buzon in buzones:
+    buzon.cancel_join_thread()
+
+  num_islas = len(buzones)
+  migra_cada = parametros["migra_cada"]
+  num_migrantes = parametros["num_migrantes"]
+  grafica_cada = parametros["grafica_cada"]
+
+  alg = AlgoritmoGenetico(ejemplar, fun_evaluacion)
+  alg.prepara(parametros["tam_poblacion"], parametros["p_cruza"],
+              parametros["p_mutacion"], semilla, parametros["incremental"],
+              parametros["tam_cache"], parametros["seleccion"])
+  # Generador aparte para los destinos, no altera la secuencia del algoritmo
+  rng_destinos = np.random.default_rng(semilla.spawn(1)[0])
+  vecinos = [i for i in range(num_islas) if i != isla]
+
+  t_inicio = time.time()
+  generacion = 0
+  enviados = 0
+  recibidos = 0
+
+  alg.inicializa_poblacion()
+  optimos = [alg.evaluacion_mejor()]
+  promedios = [alg.total_eval / alg.tam_poblacion]
+
+  while not parar.is_set() and time.time() < timeout and \
+      alg.evaluacion_mejor() != alg.max_eval:
+    alg.poblacion_generacional()
+    generacion += 1
+
+    if num_islas > 1 and generacion % migra_cada == 0:
+      if parametros["topologia"] == "anillo":
+        destino = (isla + 1) % num_islas
+      else:
+        destino = vecinos[rng_destinos.integers(len(vecinos))]
+      migrantes = alg.mejores(num_migrantes)
+      buzones[destino].put(migrantes)
+      enviados += len(migrantes)
+
+      llegados = []
+      while True:
+        try:
+          llegados.extend(buzones[isla].get_nowait())
+        except queue.Empty:
+          break
+      if llegados:
+        alg.inserta(llegados)
+        recibidos += len(llegados)
+
+    if generacion % grafica_cada == 0:
+      optimos.append(alg.evaluacion_mejor())
+      promedios.append(alg.total_eval / alg.tam_poblacion)
+
+  if alg.evaluacion_mejor() == alg.max_eval:
+    parar.set()
+
+  resultados.put({
+    "isla" : isla,
+    "tiempo" : time.time() - t_inicio,
+    "generacion" : generacion,
+    "solucion" : alg.poblacion[alg.mejor].copy(),
+    "evaluacion" : alg.evaluacion_mejor(),
+    "optimos" : optimos,
+    "promedios" : promedios,
+    "enviados" : enviados,
+    "recibidos" : recibidos,
+    "cache" : alg.cache.estadisticas() if alg.cache is not None else None
+  })
+
+def ejecutar_islas(ejemplar: TemporadaNFL, fun_evaluacion: EvaluacionNFL,
+    num_islas: int = 4, tam_poblacion: int = 50, t_limite: int = 60,
+    p_cruza: float = 0.8, p_mutacion: float = 0.01, semilla: int = None,
+    migra_cada: int = 50, num_migrantes: int = 2, topologia: str = "anillo",
+    grafica_cada: int = 100, incremental: bool = False,
+    tam_cache: int = 0, seleccion: str = "ruleta") -> dict:
+  """ Ejecuta el algoritmo genético con el modelo de islas
+
+  Cada isla es una población independiente que evoluciona en su propio
+  proceso con un generador de aleatorios obtenido con SeedSequence.spawn a
+  partir de SEMILLA. Todas las islas terminan cuando se acaba el tiempo
+  límite o cuando alguna encuentra una solución óptima.
+
+  Como la migración es asíncrona los resultados dependen de la velocidad de
+  cada proceso, con la misma semilla sólo se repiten las poblaciones iniciales.
+
+  Parámetros
+  ----------
+  ejemplar : TemporadaNFL
+    Ejemplar para generar las soluciones, representa una temporada
+  fun_evaluacion : EvaluacionNFL
+    Función de evaluación de las soluciones
+  num_islas : int
+    Número de islas (procesos), por defecto es 4
+  tam_poblacion, t_limite, p_cruza, p_mutacion, grafica_cada, incremental,
+  tam_cache, seleccion :
+    Igual que en AlgoritmoGenetico.ejecutar, el tamaño de población es el de
+    cada isla
+  semilla : int
+    Semilla de la que se obtienen las de las islas, si es None se usa
+    time.time(). Por defecto es None
+  migra_cada : int
+    Cada cuántas generaciones migran los individuos, por defecto es 50
+  num_migrantes : int
+    Número de mejores individuos que manda cada isla, por defecto es 2
+  topologia : str
+    'anillo' para mandar siempre a la isla siguiente o 'aleatoria' para
+    mandar a una isla al azar en cada migración. Por defecto es 'anillo'
+
+  Devuelve
+  --------
+  dict : Diccionario con los datos de la ejecución
+
+  El diccionario contiene las llaves:
+  - solucion: la mejor solución de todas las islas
+  - evaluacion: evaluación de la solución
+  - isla: isla en la que se encontró la solución
+  - tiempo: Tiempo total que tomó el algoritmo
+  - es_optimo: Booleano que dice si la solución es óptima o no
+  - semilla: Semilla usada
+  - islas: Lista con el resultado de cada isla (tiempo, generacion,
+    evaluacion, optimos, promedios, enviados, recibidos y cache)
+  """
+  if topologia not in TOPOLOGIAS:
+    raise ValueError(f"Topología desconocida: {topologia}")
+  if num_migrantes >= tam_poblacion:
+    raise ValueError("Debe haber menos migrantes que individuos por isla")
+
+  semilla = semilla if semilla is not None else int(time.time())
+  semillas = np.random.SeedSequence(semilla).spawn(num_islas)
+  parametros = {
+    "tam_poblacion" : tam_poblacion,
+    "p_cruza" : p_cruza,
+    "p_mutacion" : p_mutacion,
+    "migra_cada" : migra_cada,
+    "num_migrantes" : num_migrantes,
+    "topologia" : topologia,
+    "grafica_cada" : grafica_cada,
+    "incremental" : incremental,
+    "tam_cache" : tam_cache,
+    "seleccion" : seleccion
+  }
+
+  buzones = [mp.Queue() for _ in range(num_islas)]
+  resultados = mp.Queue()
+  parar = mp.Event()
+
+  t_inicio = time.time()
+  timeout = t_inicio + t_limite
+  procesos = [
+    mp.Process(target=ejecuta_isla, daemon=True, args=(
+      i, ejemplar, fun_evaluacion, parametros, semillas[i], buzones,
+      resultados, parar, timeout))
+    for i in range(num_islas)]
+  for p in procesos:
+    p.start()
+
+  islas = [None] * num_islas
+  pendientes = num_islas
+  while pendientes:
+    try:
+      res = resultados.get(timeout=1)
+    except queue.Empty:
+      # Si alguna isla murió sin dejar resultado se detienen las demás
+      if any(not p.is_alive() and islas[i] is None
+             for i, p in enumerate(procesos)) and resultados.empty():
+        parar.set()
+        if not any(p.is_alive() for p in procesos):
+          break
+      continue
+    islas[res["isla"]] = res
+    pendientes -= 1
+
+  for p in procesos:
+    p.join()
+
+  fallidas = [i for i, res in enumerate(islas) if res is None]
+  if fallidas:
+    raise RuntimeError(f"Las islas {fallidas} terminaron con error")
+
+  mejor = max(islas, key=lambda res: res["evaluacion"])
+  solucion = mejor["solucion"]
+  for res in islas:
+    del res["solucion"]
+
+  return {
+    "tiempo" : time.time() - t_inicio,
+    "es_optimo" : mejor["evaluacion"] == fun_evaluacion.max_eval,
+    "solucion" : solucion,
+    "evaluacion" : mejor["evaluacion"],
+    "isla" : mejor["isla"],
+    "semilla" : semilla,
+    "islas" : islas
+  }
@@ -1,10 +1,12 @@
 """ Modulo que leer los archivos de datos y genera graficas y tablas """
 
 import json
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 from pathlib import Path
+from telemetria import lee_telemetria, sigue_telemetria
 
 ITERACIONES = 5
 EJEMPLAR = "../data/temporada2023.txt"
@@ -28,6 +30,16 @@ def graficas(promedios: list, mejor: list) -> None:
   ax.legend()
   fig.savefig(RUTA_GRAF / f"graf_promedios.png", bbox_inches="tight")
 
+def historial(j: int, datos: dict) -> list:
+  """ Devuelve las mejores evaluaciones de la ejecución J
+
+  Se leen de su telemetría si existe, si no de la lista OPTIMOS del .json
+  """
+  telemetria = RUTA / f"telemetria_{j+1}.jsonl"
+  if telemetria.exists():
+    return lee_telemetria(telemetria)[0]["mejor"].tolist()
+  return datos["optimos"]
+
 def resultados() -> None:
   resultado = []
   generaciones = 0
@@ -48,11 +60,12 @@ def resultados() -> None:
       evaluaciones.append(aux["evaluacion"])
       if(aux["es_optimo"]): exitos += 1
       aux_eval = aux["evaluacion"] - aux["generacion"]
+      optimos = historial(j, aux)
       if aux_eval > mejor_eval:
         mejor_eval = aux_eval
-        mejor = aux["optimos"]
-      promedio.append(aux["optimos"])
-      l = max(l, len(aux["optimos"]))
+        mejor = optimos
+      promedio.append(optimos)
+      l = max(l, len(optimos))
 
   aux_prom = np.array([v + v[-1:]*(l-len(v)) for v in promedio]).sum(axis=0) / len(promedio)
   mejor = mejor + mejor[-1:]*(l-len(mejor))
@@ -75,5 +88,20 @@ def resultados() -> None:
   pd.DataFrame(resultado, columns = COLUMNAS).to_csv(Path.cwd().parent / 'ejecuciones.csv')
 
 if __name__ == "__main__":
-  resultados()
+  parser = argparse.ArgumentParser(
+    description="Genera las gráficas y la tabla de las ejecuciones")
+  parser.add_argument("--sigue", metavar="ARCHIVO",
+                      help="muestra el avance de la telemetría de una "
+                      "ejecución en curso")
+  args = parser.parse_args()
+
+  if args.sigue is None:
+    resultados()
+  else:
+    for registros in sigue_telemetria(args.sigue):
+      print(f"Generación: {registros['generacion'][-1]}",
+            f"Mejor: {registros['mejor'][-1]}",
+            f"Promedio: {registros['promedio'][-1]:.1f}",
+            f"Diversidad: {registros['diversidad'][-1]:.3f}",
+            f"Evaluaciones/s: {registros['evaluaciones_por_segundo'][-1]:.0f}")
 
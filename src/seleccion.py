@@ -0,0 +1,264 @@
+""" Implementa las estrategias de selección de padres del algoritmo genético """
+
+import numpy as np
+from abc import ABC, abstractmethod
+
+class Seleccion(ABC):
+  """ Define la estructura de las estrategias de selección
+
+  En cada generación se llama a ACTUALIZA con el vector de evaluaciones de la
+  población y luego SELECCIONA obtiene los índices de todos los padres de la
+  generación en una sola llamada.
+  """
+
+  __slots__ = ("evaluaciones",)
+
+  def __init__(self) -> None:
+    self.evaluaciones = None
+
+  def actualiza(self, evaluaciones: np.ndarray) -> None:
+    """ Prepara la selección para la población actual
+
+    Parámetros
+    ----------
+    evaluaciones : np.ndarray
+      Vector con la evaluación de cada individuo de la población
+    """
+    self.evaluaciones = evaluaciones
+
+  def cambia(self, i: int, evaluacion: int) -> None:
+    """ Actualiza la selección cuando cambia un solo individuo
+
+    Por defecto se vuelve a preparar toda la selección, las estrategias que
+    pueden actualizarse por partes la sobreescriben.
+
+    Parámetros
+    ----------
+    i : int
+      Índice del individuo en la población
+    evaluacion : int
+      Nueva evaluación del individuo
+    """
+    self.evaluaciones[i] = evaluacion
+    self.actualiza(self.evaluaciones)
+
+  @abstractmethod
+  def muestrea(self, rng: np.random.Generator, forma: tuple) -> np.ndarray:
+    """ Obtiene índices de individuos de forma independiente
+
+    Parámetros
+    ----------
+    rng : np.random.Generator
+      Generador de aleatorios
+    forma : tuple
+      Forma del arreglo de índices
+
+    Devuelve
+    --------
+    np.ndarray : Arreglo de índices de la forma FORMA
+    """
+    raise NotImplementedError
+
+  def selecciona(self, rng: np.random.Generator, num_grupos: int,
+      num_padres: int = 2) -> np.ndarray:
+    """ Selecciona NUM_GRUPOS grupos de NUM_PADRES padres distintos
+
+    Se muestrean todos los índices juntos y sólo se vuelven a muestrear los
+    grupos con algún índice repetido. Esto no asegura que los padres sean
+    distintos si se permiten repetidos en la población.
+
+    Parámetros
+    ----------
+    rng : np.random.Generator
+      Generador de aleatorios
+    num_grupos : int
+      Número de grupos de padres
+    num_padres : int
+      Número de padres en cada grupo, por defecto es 2
+
+    Devuelve
+    --------
+    np.ndarray : Matriz de NUM_GRUPOS x NUM_PADRES con los índices de los
+      padres en la población
+    """
+    padres = self.muestrea(rng, (num_grupos, num_padres))
+    repetidos = self.repetidos(padres)
+    while repetidos.size:
+      padres[repetidos] = self.muestrea(rng, (repetidos.size, num_padres))
+      repetidos = repetidos[self.repetidos(padres[repetidos])]
+    return padres
+
+  @staticmethod
+  def repetidos(padres: np.ndarray) -> np.ndarray:
+    """ Devuelve los renglones de PADRES con algún índice repetido """
+    ordenados = np.sort(padres, axis=1)
+    return np.flatnonzero((ordenados[:,1:] == ordenados[:,:-1]).any(axis=1))
+
+class SeleccionRuleta(Seleccion):
+  """ Selección por ruleta, proporcional a la evaluación """
+
+  __slots__ = ("cdf",)
+
+  def __init__(self) -> None:
+    super().__init__()
+    self.cdf = None
+
+  def actualiza(self, evaluaciones: np.ndarray) -> None:
+    super().actualiza(evaluaciones)
+    self.cdf = np.cumsum(evaluaciones / evaluaciones.sum())
+
+  def muestrea(self, rng: np.random.Generator, forma: tuple) -> np.ndarray:
+    # Por redondeo el último valor de la CDF puede ser menor a 1
+    return np.minimum(np.searchsorted(self.cdf, rng.random(forma)),
+                      len(self.cdf) - 1)
+
+class ArbolFenwick:
+  """ Árbol de Fenwick (binary indexed tree) sobre un vector de pesos
+
+  Permite cambiar un peso y obtener el índice en el que cae un valor de la
+  suma acumulada en tiempo O(log n).
+  """
+
+  __slots__ = ("arbol", "n", "paso")
+
+  def __init__(self, pesos: np.ndarray) -> None:
+    """
+    Parámetros
+    ----------
+    pesos : np.ndarray
+      Vector de pesos no negativos
+    """
+    self.n = len(pesos)
+    # Posición 0 sin usar, el nodo i guarda la suma de (i - lowbit(i), i]
+    acumulada = np.zeros(self.n + 1, dtype=pesos.dtype)
+    np.cumsum(pesos, out=acumulada[1:])
+    nodos = np.arange(self.n + 1)
+    self.arbol = acumulada - acumulada[nodos - (nodos & -nodos)]
+    self.paso = 1 << (self.n.bit_length() - 1) if self.n else 0
+
+  def total(self) -> int:
+    """ Devuelve la suma de todos los pesos """
+    i = self.n
+    suma = 0
+    while i > 0:
+      suma += self.arbol[i]
+      i -= i & -i
+    return suma
+
+  def suma(self, i: int, delta: int) -> None:
+    """ Suma DELTA al peso I """
+    i += 1
+    while i <= self.n:
+      self.arbol[i] += delta
+      i += i & -i
+
+  def busca(self, valores: np.ndarray) -> np.ndarray:
+    """ Busca el primer índice cuya suma acumulada es mayor a cada valor
+
+    Todos los valores se buscan juntos bajando por el árbol.
+
+    Parámetros
+    ----------
+    valores : np.ndarray
+      Valores entre 0 y el total de los pesos
+
+    Devuelve
+    --------
+    np.ndarray : Índices encontrados, de la misma forma que VALORES
+    """
+    restos = np.array(valores, dtype=float)
+    posiciones = np.zeros(restos.shape, dtype=int)
+    paso = self.paso
+    while paso:
+      siguientes = posiciones + paso
+      validas = siguientes <= self.n
+      avanza = validas & (
+        self.arbol[np.where(validas, siguientes, 0)] <= restos)
+      restos -= np.where(avanza, self.arbol[np.where(avanza, siguientes, 0)], 0)
+      posiciones[avanza] = siguientes[avanza]
+      paso >>= 1
+    # Por redondeo un valor igual al total puede pasarse del último índice
+    return np.minimum(posiciones, self.n - 1)
+
+class SeleccionRuletaFenwick(Seleccion):
+  """ Selección por ruleta sobre un árbol de Fenwick
+
+  Da la misma distribución que SeleccionRuleta, pero cambiar la evaluación de
+  un individuo cuesta O(log n) en lugar de reconstruir la CDF, así conviene
+  cuando la población cambia de uno en uno (modo estacionario).
+  """
+
+  __slots__ = ("arbol",)
+
+  def __init__(self) -> None:
+    super().__init__()
+    self.arbol = None
+
+  def actualiza(self, evaluaciones: np.ndarray) -> None:
+    super().actualiza(evaluaciones)
+    self.arbol = ArbolFenwick(evaluaciones)
+
+  def cambia(self, i: int, evaluacion: int) -> None:
+    self.arbol.suma(i, evaluacion - self.evaluaciones[i])
+    self.evaluaciones[i] = evaluacion
+
+  def muestrea(self, rng: np.random.Generator, forma: tuple) -> np.ndarray:
+    return self.arbol.busca(rng.random(forma) * self.arbol.total())
+
+class SeleccionTorneo(Seleccion):
+  """ Selección por torneo, gana el mejor de TAM_TORNEO individuos al azar """
+
+  __slots__ = ("tam_torneo",)
+
+  def __init__(self, tam_torneo: int = 2) -> None:
+    """
+    Parámetros
+    ----------
+    tam_torneo : int
+      Número de individuos que compiten en cada torneo, por defecto es 2
+    """
+    super().__init__()
+    self.tam_torneo = tam_torneo
+
+  def cambia(self, i: int, evaluacion: int) -> None:
+    self.evaluaciones[i] = evaluacion
+
+  def muestrea(self, rng: np.random.Generator, forma: tuple) -> np.ndarray:
+    competidores = rng.integers(
+      len(self.evaluaciones), size=forma + (self.tam_torneo,))
+    ganadores = self.evaluaciones[competidores].argmax(axis=-1)
+    return np.take_along_axis(
+      competidores, ganadores[...,None], axis=-1)[...,0]
+
+class SeleccionRango(Seleccion):
+  """ Selección por rango, proporcional a la posición en la población
+
+  El peor individuo tiene peso 1 y el mejor peso P, así la presión de
+  selección no depende de la escala de las evaluaciones.
+  """
+
+  __slots__ = ("orden", "cdf")
+
+  def __init__(self) -> None:
+    super().__init__()
+    self.orden = None
+    self.cdf = None
+
+  def actualiza(self, evaluaciones: np.ndarray) -> None:
+    super().actualiza(evaluaciones)
+    n = len(evaluaciones)
+    self.orden = np.argsort(evaluaciones, kind="stable")
+    self.cdf = np.cumsum(np.arange(1, n+1) / (n * (n+1) / 2))
+
+  def muestrea(self, rng: np.random.Generator, forma: tuple) -> np.ndarray:
+    return self.orden[np.minimum(np.searchsorted(self.cdf, rng.random(forma)),
+                                 len(self.cdf) - 1)]
+
+SELECCIONES = {
+  "ruleta" : SeleccionRuleta,
+  "torneo" : SeleccionTorneo,
+  "rango" : SeleccionRango
+}
+
+# En el modo estacionario la población cambia de uno en uno
+SELECCIONES_ESTACIONARIO = dict(SELECCIONES, ruleta=SeleccionRuletaFenwick)
@@ -0,0 +1,204 @@
+""" Implementa el registro por generación de los datos de una ejecución """
+
+import json
+import time
+import numpy as np
+from pathlib import Path
+
+# Campos de cada registro, en el formato binario cada registro es un renglón
+# de este tipo estructurado (little endian, así se lee en cualquier máquina)
+REGISTRO = np.dtype([
+  ("generacion", "<i8"),
+  ("tiempo", "<f8"),
+  ("mejor", "<i8"),
+  ("promedio", "<f8"),
+  ("desviacion", "<f8"),
+  ("diversidad", "<f8"),
+  ("evaluaciones_por_segundo", "<f8")
+])
+CAMPOS = REGISTRO.names
+# Extensión del formato binario, cualquier otra se escribe como JSONL
+EXTENSION_BINARIA = ".bin"
+
+class Telemetria:
+  """ Escribe los registros de una ejecución en un archivo que sólo crece
+
+  Los registros se acumulan en memoria y se escriben al final del archivo
+  cuando se juntan TAM_BUFFER o pasan MAX_ESPERA segundos desde la última
+  escritura, así si la ejecución se interrumpe sólo se pierden los últimos.
+  Con la extensión .bin cada registro se guarda con el tipo REGISTRO, con
+  cualquier otra se guarda un objeto JSON por línea (JSONL).
+
+  Al reanudar una ejecución se descartan con DESCARTA_POSTERIORES los
+  registros de las generaciones que se vuelven a ejecutar.
+  """
+
+  __slots__ = ("ruta", "binaria", "archivo", "buffer", "pendientes",
+               "tam_buffer", "max_espera", "t_escritura")
+
+  def __init__(self, ruta: "Path", tam_buffer: int = 256,
+      max_espera: float = 5.0) -> None:
+    """
+    Parámetros
+    ----------
+    ruta : str or Path
+      Archivo donde se escriben los registros, si ya existe se agregan al
+      final (por ejemplo al reanudar una ejecución)
+    tam_buffer : int
+      Registros que se acumulan antes de escribir, por defecto 256
+    max_espera : float
+      Segundos máximos entre escrituras, por defecto 5
+    """
+    self.ruta = Path(ruta)
+    self.binaria = self.ruta.suffix == EXTENSION_BINARIA
+    self.archivo = open(self.ruta, "ab")
+    self.tam_buffer = tam_buffer
+    self.max_espera = max_espera
+    if self.binaria:
+      self.buffer = np.empty(tam_buffer, dtype=REGISTRO)
+    else:
+      self.buffer = []
+    self.pendientes = 0
+    self.t_escritura = time.monotonic()
+
+  def registra(self, generacion: int, tiempo: float, mejor: int,
+      promedio: float, desviacion: float, diversidad: float,
+      evaluaciones_por_segundo: float) -> None:
+    """ Agrega un registro, los parámetros son los campos de REGISTRO """
+    valores = (generacion, tiempo, mejor, promedio, desviacion, diversidad,
+               evaluaciones_por_segundo)
+    if self.binaria:
+      self.buffer[self.pendientes] = valores
+    else:
+      self.buffer.append(json.dumps(dict(zip(CAMPOS, valores))))
+    self.pendientes += 1
+    if self.pendientes == self.tam_buffer or \
+        time.monotonic() - self.t_escritura >= self.max_espera:
+      self.vacia()
+
+  def vacia(self) -> None:
+    """ Escribe en el archivo los registros pendientes """
+    if self.pendientes:
+      if self.binaria:
+        self.archivo.write(self.buffer[:self.pendientes].tobytes())
+      else:
+        self.archivo.write(("\n".join(self.buffer) + "\n").encode())
+        self.buffer.clear()
+      self.archivo.flush()
+      self.pendientes = 0
+    self.t_escritura = time.monotonic()
+
+  def descarta_posteriores(self, generacion: int) -> None:
+    """ Borra del archivo los registros posteriores a GENERACION
+
+    Al reanudar desde un checkpoint de GENERACION las siguientes se vuelven a
+    ejecutar, así sus registros de la ejecución interrumpida no quedan dos
+    veces. También se borra un registro incompleto al final del archivo.
+
+    Parámetros
+    ----------
+    generacion : int
+      Última generación cuyos registros se mantienen
+    """
+    self.vacia()
+    with open(self.ruta, "rb") as f:
+      datos = f.read()
+
+    if self.binaria:
+      completos = len(datos) // REGISTRO.itemsize
+      registros = np.frombuffer(datos[:completos * REGISTRO.itemsize],
+                                dtype=REGISTRO)
+      posteriores = np.flatnonzero(registros["generacion"] > generacion)
+      n = int(posteriores[0]) if len(posteriores) else completos
+      posicion = n * REGISTRO.itemsize
+    else:
+      posicion = 0
+      for linea in datos.splitlines(keepends=True):
+        if not linea.endswith(b"\n") or \
+            json.loads(linea)["generacion"] > generacion:
+          break
+        posicion += len(linea)
+    self.archivo.truncate(posicion)
+
+  def cierra(self) -> None:
+    """ Escribe los registros pendientes y cierra el archivo """
+    if not self.archivo.closed:
+      self.vacia()
+      self.archivo.close()
+
+  def __enter__(self) -> "Telemetria":
+    return self
+
+  def __exit__(self, *args) -> None:
+    self.cierra()
+
+def lee_telemetria(ruta: "Path", posicion: int = 0) -> tuple:
+  """ Lee los registros de un archivo de telemetría a partir de POSICION
+
+  Sólo se leen registros completos, así se puede leer un archivo que sigue
+  escribiendo otra ejecución: se llama de nuevo con la posición devuelta para
+  obtener sólo los registros nuevos.
+
+  Parámetros
+  ----------
+  ruta : str or Path
+    Archivo .jsonl o .bin escrito por Telemetria
+  posicion : int
+    Byte desde el que se lee, por defecto desde el inicio
+
+  Devuelve
+  --------
+  dict of np.ndarray : Arreglo con los valores de cada campo de REGISTRO
+  int : Posición después del último registro completo
+  """
+  ruta = Path(ruta)
+  with open(ruta, "rb") as f:
+    f.seek(posicion)
+    datos = f.read()
+
+  if ruta.suffix == EXTENSION_BINARIA:
+    completos = len(datos) // REGISTRO.itemsize * REGISTRO.itemsize
+    registros = np.frombuffer(datos[:completos], dtype=REGISTRO)
+    return ({campo : registros[campo].copy() for campo in CAMPOS},
+            posicion + completos)
+
+  completos = datos.rfind(b"\n") + 1
+  registros = np.zeros(0, dtype=REGISTRO)
+  lineas = datos[:completos].splitlines()
+  if lineas:
+    registros = np.array(
+      [tuple(json.loads(l)[campo] for campo in CAMPOS) for l in lineas if l],
+      dtype=REGISTRO)
+  return ({campo : registros[campo] for campo in CAMPOS},
+          posicion + completos)
+
+def sigue_telemetria(ruta: Path, intervalo: float = 1.0,
+    hasta: float = None) -> "Iterator[dict]":
+  """ Lee la telemetría de una ejecución mientras se escribe
+
+  Cada INTERVALO segundos se leen sólo los registros nuevos del archivo.
+
+  Parámetros
+  ----------
+  ruta : str or Path
+    Archivo de telemetría (.jsonl o .bin)
+  intervalo : float
+    Segundos entre lecturas, por defecto 1
+  hasta : float
+    Segundos sin registros nuevos tras los que se termina, si es None se
+    sigue indefinidamente
+
+  Devuelve
+  --------
+  Iterator of dict : Bloques de registros nuevos, como los devuelve
+    lee_telemetria
+  """
+  posicion = 0
+  t_ultimo = time.monotonic()
+  while hasta is None or time.monotonic() - t_ultimo < hasta:
+    if Path(ruta).exists():
+      registros, posicion = lee_telemetria(ruta, posicion)
+      if len(registros["generacion"]):
+        t_ultimo = time.monotonic()
+        yield registros
+    time.sleep(intervalo)
@@ -1,6 +1,72 @@
 """ Representa ejemplares para el algoritmo de optimización """
 
+import os
+import json
+import hashlib
 import numpy as np
+from pathlib import Path
+
+# Extensiones de los archivos de soluciones binarios
+FORMATOS_BINARIOS = (".npy", ".npz")
+# Versión del formato compilado, se cambia al cambiar los atributos para no
+# leer archivos compilados viejos
+VERSION_COMPILADO = 1
+# Alineación en bytes del encabezado y de cada arreglo del ejemplar compilado
+ALINEACION = 64
+# Carpeta junto al ejemplar donde se guardan los ejemplares compilados
+CARPETA_COMPILADOS = "__cache__"
+# Atributos del ejemplar compilado: arreglos de COMPILA y atributos que se
+# guardan en el encabezado (los diccionarios se reconstruyen de los arreglos)
+ARREGLOS = ("locales", "visitantes", "estadios_partidos", "calificaciones",
+            "divisionales", "contrarios", "husos_estadios", "byes_anteriores",
+            "partidos_equipos", "plantillas_horarios")
+ATRIBUTOS = ("num_equipos", "num_semanas", "navidad", "thanksgiving",
+             "horarios", "semanas_sin_horario", "bye", "max_calif_partido",
+             "orden_husos", "horarios_base", "semanas_bye", "mitad_temporada",
+             "max_estelares")
+
+def nombres_horarios_semana(semana: int, horarios_base: tuple,
+    semanas_sin_horario: tuple, thanksgiving: int, navidad: tuple) -> list:
+  """ Devuelve los nombres de los horarios estelares de una semana
+
+  Es la regla de TemporadaNFL.horarios_semana, se usa también antes de
+  construir un ejemplar (en el generador).
+
+  Parámetros
+  ----------
+  semana : int
+    Semana de la temporada indexada desde 0
+  horarios_base, semanas_sin_horario, thanksgiving, navidad :
+    Igual que los atributos de TemporadaNFL, las semanas indexadas desde 0
+
+  Devuelve
+  --------
+  list of str : Nombres de los horarios estelares de la semana
+  """
+  horarios = list(horarios_base)
+
+  # Semanas con horarios no predefinidos
+  if semana in semanas_sin_horario:
+    return []
+
+  # No hay TNF, pero hay 3 de TDAY
+  if semana == thanksgiving:
+    horarios = [h for h in horarios if h != "TNF"] + ["TDAY"]*3
+
+  # Hay 3 horarios de XMAS
+  if semana == navidad[0]:
+    # Se agregan partidos al sabado
+    if navidad[1] == "S":
+      horarios += ["XMAS"]*3
+    # No hay SNF
+    if navidad[1] == "D":
+      horarios = [h for h in horarios_base if h != "SNF"] + ["XMAS"]*3
+    # No hay ni SNF ni MDF
+    if navidad[1] == "L":
+      horarios = [h for h in horarios_base if h not in ("SNF", "MNF")] \
+        + ["XMAS"]*3
+
+  return horarios
 
 class TemporadaNFL:
   """ Describe los datos de una temporada de la NFL """
@@ -8,10 +74,17 @@ class TemporadaNFL:
   # Para optimizar la velocidad de acceso a los atributos
   __slots__ = ("num_equipos", "num_semanas", "equipos", "partidos",
                "estadios", "navidad", "thanksgiving", "horarios",
-               "semanas_sin_horario", "bye", "max_calif_partido")
+               "semanas_sin_horario", "bye", "max_calif_partido",
+               "orden_husos", "locales", "visitantes", "estadios_partidos",
+               "calificaciones", "contrarios", "divisionales",
+               "husos_estadios", "byes_anteriores", "partidos_equipos",
+               "plantillas_horarios", "horarios_base", "semanas_bye",
+               "mitad_temporada", "max_estelares")
 
   def __init__(self, num_semanas: int, equipos: tuple, partidos: tuple,
-      estadios: tuple, navidad: tuple, thanksgiving: int) -> None:
+      estadios: tuple, navidad: tuple, thanksgiving: int,
+      semanas_sin_horario: tuple = None, horarios_base: tuple = None,
+      semanas_bye: tuple = None) -> None:
     """ Constructor a partir de los datos
 
     Parámetros
@@ -31,6 +104,15 @@ class TemporadaNFL:
     thanksgiving : int
       Semana de la temporada correspondiente al día de acción de gracias
       indexada desde 0
+    semanas_sin_horario : tuple
+      Semanas sin horarios estelares predefinidos indexadas desde 1, por
+      defecto son la cuarta y la primera semanas contando desde el final
+    horarios_base : tuple
+      Horarios estelares de una semana normal (nombres de HORARIOS), por
+      defecto son ("MNF", "TNF", "SNF")
+    semanas_bye : tuple
+      Primera y última semanas en las que se permite el BYE indexadas desde 1,
+      por defecto se excluyen las primeras cuatro y las últimas cuatro
 
     IMPORTANTE: El índice en la tupla equivale a su ID
     """
@@ -47,26 +129,262 @@ class TemporadaNFL:
     # TDAY - Thanksgiving
     nombres_horarios = ("NONE", "MNF", "TNF", "SNF", "XMAS", "TDAY")
     self.horarios = {k:v for v,k in enumerate(nombres_horarios)}
-    self.semanas_sin_horario = (14,17) # Indexada desde 0
+    # Indexadas desde 0
+    if semanas_sin_horario is None:
+      semanas_sin_horario = (num_semanas-3, num_semanas)
+    self.semanas_sin_horario = tuple(s-1 for s in semanas_sin_horario)
+    if horarios_base is None:
+      horarios_base = ("MNF", "TNF", "SNF")
+    self.horarios_base = tuple(horarios_base)
+    if semanas_bye is None:
+      semanas_bye = (5, num_semanas-4)
+    self.semanas_bye = (semanas_bye[0]-1, semanas_bye[1]-1)
+    # Corte entre semanas tempranas y tardías
+    self.mitad_temporada = num_semanas // 2
+    # Cota de los horarios estelares de un equipo, deja lugar a cuatro semanas
+    # extra por los horarios de TDAY y XMAS
+    self.max_estelares = len(self.horarios_base) * \
+      (num_semanas - len(self.semanas_sin_horario) + 4)
     self.bye = len(partidos)
     self.max_calif_partido = max(
       partidos, key=lambda x: x["calificacion"])["calificacion"]
+    # Husos horarios de oeste a este
+    self.orden_husos = ("PST", "MST", "CST", "EST")
+    self.compila()
+
+  def compila(self) -> None:
+    """ Construye la representación en arreglos de NumPy del ejemplar
+
+    Los arreglos son de sólo lectura y permiten indexar directamente en lugar
+    de pasar por los diccionarios. Los arreglos por partido tienen una entrada
+    extra al final para el BYE (su índice es BYE):
+
+    * locales, visitantes, estadios_partidos : Equipo local, visitante y
+      estadio de cada partido, -1 para el BYE
+    * calificaciones : Calificación de cada partido, 0 para el BYE
+    * divisionales : True si el partido es entre equipos de la misma división
+    * contrarios : Matriz (equipos, partidos) con el contrario de cada equipo
+      en cada partido, -1 si el equipo no juega el partido o es el BYE
+    * husos_estadios : Índice en ORDEN_HUSOS del huso horario de cada estadio
+    * byes_anteriores : Semana del bye del año anterior de cada equipo
+    * partidos_equipos : Matriz (equipos, semanas) con los partidos de cada
+      equipo y su BYE al final
+    * plantillas_horarios : Matriz (semanas, equipos) con los horarios de cada
+      semana en pares seguidos de los horarios normales, como los usa
+      VERIFICA_SOLUCION
+    """
+    sin_partido = [-1]
+    self.locales = np.array(
+      [p["local"] for p in self.partidos] + sin_partido)
+    self.visitantes = np.array(
+      [p["visitante"] for p in self.partidos] + sin_partido)
+    self.estadios_partidos = np.array(
+      [p["estadio"] for p in self.partidos] + sin_partido)
+    self.calificaciones = np.array(
+      [p["calificacion"] for p in self.partidos] + [0])
+    self.divisionales = np.array([
+      self.equipos[p["local"]]["division"] == \
+        self.equipos[p["visitante"]]["division"]
+      for p in self.partidos] + [False])
+
+    self.contrarios = np.full((self.num_equipos, self.bye + 1), -1)
+    partidos = np.arange(self.bye)
+    self.contrarios[self.locales[:-1], partidos] = self.visitantes[:-1]
+    self.contrarios[self.visitantes[:-1], partidos] = self.locales[:-1]
+
+    self.husos_estadios = np.array(
+      [self.orden_husos.index(e["huso"]) for e in self.estadios])
+    self.byes_anteriores = np.array(
+      [e["bye_anterior"] for e in self.equipos])
+    self.partidos_equipos = np.array(
+      [e["partidos"] + [self.bye] for e in self.equipos])
+
+    plantillas = []
+    for semana in range(self.num_semanas):
+      horarios = self.horarios_semana(semana) * 2
+      horarios += [self.horarios["NONE"]] * (self.num_equipos - len(horarios))
+      plantillas.append(horarios)
+    self.plantillas_horarios = np.array(plantillas)
+
+    for nombre in ARREGLOS:
+      getattr(self, nombre).setflags(write=False)
 
   @classmethod
-  def leer_archivo(cls, archivo: "Path") -> "TemporadaNFL":
+  def leer_archivo(cls, archivo: "Path",
+      compilado: bool = True) -> "TemporadaNFL":
     """ Construye una clase desde el archivo txt
 
+    Si COMPILADO es True primero se busca el ejemplar ya compilado en la
+    carpeta CARPETA_COMPILADOS junto al archivo, con el hash del contenido en
+    el nombre. Si no existe (o el texto cambió) se lee el texto y se guarda
+    compilado para la siguiente vez, si no se puede escribir la carpeta sólo
+    se lee el texto.
+
     Parámetros
     ----------
     archivo : str or Path
       Ruta al archivo que se leerá
+    compilado : bool
+      Si es True se usa el ejemplar compilado. Por defecto es True
+
+    Devuelve
+    --------
+    TemporadaNFL : Objeto con los datos de la temporada leidos
+    """
+    with open(archivo, "rb") as data:
+      contenido = data.read()
+    if not compilado:
+      return cls.leer_texto(contenido.decode())
+
+    ruta = cls.ruta_compilado(archivo, contenido)
+    if ruta.exists():
+      try:
+        return cls.carga_compilado(ruta)
+      except (OSError, ValueError, KeyError):
+        pass
+    temporada = cls.leer_texto(contenido.decode())
+    try:
+      ruta.parent.mkdir(exist_ok=True)
+      temporada.guarda_compilado(ruta)
+    except OSError:
+      pass
+    return temporada
+
+  @staticmethod
+  def ruta_compilado(archivo: "Path", contenido: bytes) -> Path:
+    """ Devuelve la ruta del ejemplar compilado de ARCHIVO
+
+    El nombre lleva el hash SHA-256 de CONTENIDO y VERSION_COMPILADO, así
+    cualquier cambio en el texto o en el formato usa otro archivo.
+    """
+    huella = hashlib.sha256(contenido)
+    huella.update(str(VERSION_COMPILADO).encode())
+    archivo = Path(archivo)
+    return archivo.parent / CARPETA_COMPILADOS / \
+      f"{archivo.stem}-{huella.hexdigest()[:16]}.temporada"
+
+  def guarda_compilado(self, ruta: "Path") -> None:
+    """ Guarda el ejemplar con todos sus arreglos ya construidos
+
+    El archivo tiene una línea de encabezado JSON con los atributos escalares,
+    los textos de equipos y estadios y la forma, tipo y posición de cada
+    arreglo, seguida de los bytes de los arreglos. Los diccionarios de
+    equipos, partidos y estadios no se guardan, se reconstruyen de los
+    arreglos. Se escribe con otro nombre y luego se renombra, así varios
+    procesos pueden compilar el mismo ejemplar a la vez.
+
+    Parámetros
+    ----------
+    ruta : str or Path
+      Archivo donde se guarda
+    """
+    encabezado = {nombre : getattr(self, nombre) for nombre in ATRIBUTOS}
+    encabezado["version"] = VERSION_COMPILADO
+    for llave in ("acronimo", "conferencia", "division", "3_consecutivos"):
+      encabezado[llave] = [e[llave] for e in self.equipos]
+    arreglos, posicion = {}, 0
+    for nombre in ARREGLOS:
+      arreglo = getattr(self, nombre)
+      arreglos[nombre] = (arreglo.dtype.str, arreglo.shape, posicion)
+      posicion += -(-arreglo.nbytes // ALINEACION) * ALINEACION
+    encabezado["arreglos"] = arreglos
+
+    # Se rellena con espacios para que los arreglos queden alineados
+    texto = json.dumps(encabezado).encode()
+    texto += b" " * (-(len(texto) + 1) % ALINEACION) + b"\n"
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "wb") as f:
+      f.write(texto)
+      for nombre in ARREGLOS:
+        datos = np.ascontiguousarray(getattr(self, nombre)).tobytes()
+        f.write(datos + bytes(-len(datos) % ALINEACION))
+    os.replace(temporal, ruta)
+
+  @classmethod
+  def carga_compilado(cls, ruta: "Path") -> "TemporadaNFL":
+    """ Construye el ejemplar desde un archivo de GUARDA_COMPILADO
+
+    No se vuelve a llamar a COMPILA, los arreglos son vistas de sólo lectura
+    sobre los bytes del archivo.
+
+    Parámetros
+    ----------
+    ruta : str or Path
+      Archivo con el ejemplar compilado
+
+    Devuelve
+    --------
+    TemporadaNFL : Ejemplar leído
+    """
+    with open(ruta, "rb") as f:
+      contenido = f.read()
+    fin = contenido.index(b"\n")
+    encabezado = json.loads(contenido[:fin])
+    if encabezado.get("version") != VERSION_COMPILADO:
+      raise ValueError(f"{ruta} es de otra versión")
+    datos = memoryview(contenido)[fin+1:]
+
+    temporada = cls.__new__(cls)
+    for nombre, (tipo, forma, posicion) in encabezado["arreglos"].items():
+      tipo = np.dtype(tipo)
+      tamano = tipo.itemsize * int(np.prod(forma))
+      setattr(temporada, nombre, np.frombuffer(
+        datos[posicion:posicion+tamano], dtype=tipo).reshape(forma))
+    for nombre in ATRIBUTOS:
+      valor = encabezado[nombre]
+      # JSON convierte las tuplas en listas
+      setattr(temporada, nombre,
+              tuple(valor) if isinstance(valor, list) else valor)
+
+    bye = temporada.bye
+    temporada.partidos = tuple(
+      {"local" : l, "visitante" : v, "estadio" : e, "calificacion" : c}
+      for l, v, e, c in zip(temporada.locales[:bye].tolist(),
+                            temporada.visitantes[:bye].tolist(),
+                            temporada.estadios_partidos[:bye].tolist(),
+                            temporada.calificaciones[:bye].tolist()))
+    temporada.estadios = tuple(
+      {"huso" : temporada.orden_husos[h]}
+      for h in temporada.husos_estadios.tolist())
+    temporada.equipos = tuple(
+      {
+        "acronimo" : acronimo,
+        "conferencia" : conferencia,
+        "division" : division,
+        "bye_anterior" : bye_anterior,
+        "3_consecutivos" : consecutivos,
+        "partidos" : partidos[:-1]
+      } for acronimo, conferencia, division, bye_anterior, consecutivos,
+        partidos in zip(encabezado["acronimo"], encabezado["conferencia"],
+                        encabezado["division"],
+                        temporada.byes_anteriores.tolist(),
+                        encabezado["3_consecutivos"],
+                        temporada.partidos_equipos.tolist()))
+    return temporada
+
+  @classmethod
+  def leer_texto(cls, texto: str) -> "TemporadaNFL":
+    """ Construye una clase desde el contenido del archivo txt
+
+    Parámetros
+    ----------
+    texto : str
+      Contenido del archivo
+
+    Después de las semanas de acción de gracias y navidad puede haber líneas
+    opcionales de la forma CLAVE VALORES... (ver GENERADOR.PY):
+
+    * semanas N : Número de semanas, por defecto los partidos de un equipo
+      más su BYE
+    * sin_horario S1 S2 ... : Semanas sin horarios predefinidos
+    * horarios H1 H2 ... : Horarios estelares de una semana normal
+    * byes S1 S2 : Primera y última semanas en las que se permite el BYE
 
     Devuelve
     --------
     TemporadaNFL : Objeto con los datos de la temporada leidos
     """
-    with open(archivo) as data:
-      info = data.readlines()
+    info = texto.replace("\r\n", "\n").splitlines(keepends=True)
 
     p, e, q = [], [], []
     i = 0
@@ -119,18 +437,140 @@ class TemporadaNFL:
     thanksgiving = int(info[i+1])
     s = info[i+2].split()
     navidad = (int(s[0]), s[1])
-    num_semanas = 18
-    return cls(num_semanas, equipos, partidos, estadios, navidad, thanksgiving)
+
+    opciones = {}
+    for linea in info[i+3:]:
+      s = linea.split()
+      if s:
+        opciones[s[0]] = s[1:]
+    if "semanas" in opciones:
+      num_semanas = int(opciones["semanas"][0])
+    else:
+      num_semanas = max(len(e["partidos"]) for e in equipos) + 1
+    semanas_sin_horario = opciones.get("sin_horario")
+    if semanas_sin_horario is not None:
+      semanas_sin_horario = tuple(map(int, semanas_sin_horario))
+    semanas_bye = opciones.get("byes")
+    if semanas_bye is not None:
+      semanas_bye = tuple(map(int, semanas_bye))
+    return cls(num_semanas, equipos, partidos, estadios, navidad, thanksgiving,
+               semanas_sin_horario, opciones.get("horarios"), semanas_bye)
 
   def guardar_solucion(self, solucion: str) -> str:  
     return " ".join(map(str, solucion.flatten()))
 
-  def leer_solucion(self, archivo: str) -> np.ndarray:  
+  def leer_solucion(self, archivo: str) -> np.ndarray:
+    if Path(archivo).suffix in FORMATOS_BINARIOS:
+      soluciones, _ = self.leer_soluciones(archivo)
+      if len(soluciones) != 1:
+        raise ValueError(f"{archivo} tiene {len(soluciones)} soluciones")
+      return np.asarray(soluciones[0], dtype=self.tipo_solucion)
     with open(archivo) as f:
       a = list(map(int, f.read().split()))
-    return np.array(a, dtype=int).reshape(
+    return np.array(a, dtype=self.tipo_solucion).reshape(
       (self.num_equipos, self.num_semanas, -1))
-  
+
+  @property
+  def tipo_solucion(self) -> np.dtype:
+    """ Devuelve el tipo entero más chico en el que cabe una solución
+
+    Los horarios siempre caben en int8, así que depende del número de
+    partidos: int8 hasta 127 partidos y int16 hasta 32767. Es el tipo de las
+    soluciones en memoria (algoritmo genético, lectura y evaluación) y en los
+    archivos binarios, las reglas sólo usan los valores como índices y en
+    comparaciones así que no hay desbordamientos.
+    """
+    return np.dtype(np.int8 if self.bye < 2**7 else
+                    np.int16 if self.bye < 2**15 else np.int32)
+
+  def guardar_soluciones(self, archivo: "Path", soluciones: np.ndarray,
+      nombres: list = None) -> None:
+    """ Guarda una solución o un lote de soluciones en formato binario
+
+    Las soluciones se guardan con TIPO_SOLUCION. Los archivos .npy se pueden
+    leer mapeados a memoria, los .npz van comprimidos y pueden guardar el
+    nombre de cada solución.
+
+    Parámetros
+    ----------
+    archivo : str or Path
+      Ruta del archivo .npy o .npz
+    soluciones : np.ndarray
+      Solución de la forma (equipos, semanas, 2) o lote de la forma
+      (P, equipos, semanas, 2)
+    nombres : list of str
+      Nombre de cada solución, sólo se guardan en los .npz
+    """
+    soluciones = np.asarray(soluciones)
+    if soluciones.ndim == 3:
+      soluciones = soluciones[None]
+    if soluciones.shape[1:] != (self.num_equipos, self.num_semanas, 2):
+      raise ValueError(f"Las soluciones tienen la forma {soluciones.shape}")
+    soluciones = soluciones.astype(self.tipo_solucion)
+    if Path(archivo).suffix == ".npz":
+      datos = {"soluciones" : soluciones}
+      if nombres is not None:
+        datos["nombres"] = np.array(nombres, dtype=str)
+      np.savez_compressed(archivo, **datos)
+    else:
+      np.save(archivo, soluciones)
+
+  def leer_soluciones(self, ruta: "Path", mapear: bool = True) -> tuple:
+    """ Lee un lote de soluciones
+
+    RUTA puede ser un archivo .npy o .npz con un lote (o una sola solución),
+    un archivo de texto con una solución o un directorio, del que se leen
+    todos los archivos .txt, .npy y .npz en orden alfabético.
+
+    Parámetros
+    ----------
+    ruta : str or Path
+      Archivo o directorio a leer
+    mapear : bool
+      Si es True los .npy se mapean a memoria en lugar de leerse completos.
+      Por defecto es True
+
+    Devuelve
+    --------
+    np.ndarray : Soluciones de la forma (P, equipos, semanas, 2), en
+      TIPO_SOLUCION (los .npy y .npz en el tipo con el que se guardaron, que
+      con GUARDAR_SOLUCIONES es el mismo)
+    list of str : Nombre de cada solución, el del archivo y su índice en el
+      lote si tiene más de una
+    """
+    ruta = Path(ruta)
+    if ruta.is_dir():
+      lotes, nombres = [], []
+      for archivo in sorted(ruta.iterdir()):
+        if archivo.suffix in FORMATOS_BINARIOS + (".txt",):
+          soluciones, n = self.leer_soluciones(archivo, mapear=False)
+          lotes.append(soluciones)
+          nombres += n
+      forma = (0, self.num_equipos, self.num_semanas, 2)
+      return (np.concatenate(lotes).astype(self.tipo_solucion, copy=False)
+              if lotes else np.empty(forma, dtype=self.tipo_solucion), nombres)
+
+    if ruta.suffix == ".npy":
+      soluciones = np.load(ruta, mmap_mode="r" if mapear else None)
+      nombres = None
+    elif ruta.suffix == ".npz":
+      with np.load(ruta) as datos:
+        soluciones = datos["soluciones"]
+        nombres = datos["nombres"].tolist() if "nombres" in datos else None
+    else:
+      soluciones = self.leer_solucion(ruta)
+      nombres = None
+
+    if soluciones.ndim == 3:
+      soluciones = soluciones[None]
+    if soluciones.shape[1:] != (self.num_equipos, self.num_semanas, 2):
+      raise ValueError(
+        f"{ruta} tiene soluciones de la forma {soluciones.shape[1:]}")
+    if nombres is None:
+      nombres = [ruta.name] if len(soluciones) == 1 else \
+        [f"{ruta.name}[{i}]" for i in range(len(soluciones))]
+    return soluciones, nombres
+
   def horarios_semana(self, semana: int) -> list:
     """ Devuelve la lista de horarios codificados de la semana
 
@@ -143,35 +583,15 @@ class TemporadaNFL:
     --------
     list of int : Lista de horarios codificados de la semana
     """
-    horarios = ["MNF", "TNF", "SNF"]
-
-    # Semanas con horarios no predefinidos
-    if semana in self.semanas_sin_horario:
-      return []
-
-    # No hay TNF, pero hay 3 de TDAY
-    if semana == self.thanksgiving:
-      horarios = ["MNF", "SNF"] + ["TDAY"]*3
-
-    # Hay 3 horarios de XMAS
-    if semana == self.navidad[0]:
-      # Se agregan partidos al sabado
-      if self.navidad[1] == "S":
-        horarios += ["XMAS"]*3
-      # No hay SNF
-      if self.navidad[1] == "D":
-        horarios = ["MNF", "TNF"] + ["XMAS"]*3
-      # No hay ni SNF ni MDF
-      if self.navidad[1] == "L":
-        horarios = ["TNF"] + ["XMAS"]*3
-
-    return [self.horarios[v] for v in horarios]
+    return [self.horarios[v] for v in nombres_horarios_semana(
+      semana, self.horarios_base, self.semanas_sin_horario,
+      self.thanksgiving, self.navidad)]
 
   def verifica_solucion(self, solucion: np.ndarray) -> bool:
     """ Verifica que una solución sea válida
 
     Se considera válida una solución que cumple:
-    * La fila i es una permutación de los 17 partidos y el BYE del equipo i.
+    * La fila i es una permutación de los partidos y el BYE del equipo i.
     * La columnas j es una permutación de los posibles horarios de la semana
       j+1 y todos los horarios aparecen en pares.
 